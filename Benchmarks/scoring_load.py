@@ -0,0 +1,174 @@
+import asyncio
+from argparse import ArgumentParser
+from math import isclose
+from os.path import (abspath, dirname, join)
+from random import Random
+from sys import (exit, path)
+from time import perf_counter
+
+# Makes the Src package importable when the script is run directly.
+Root_folder = dirname(dirname(abspath(__file__)))
+path.insert(0, Root_folder)
+
+from Src.keystrokelog import Record
+from Src.resultchannel import decode_message
+from Src.scoringengine import score_words
+from Src.scoringserver import (FRAME_END, FRAME_KEYS, ScoringServer,
+                               encode_frame, encode_start, read_message)
+from Src.textpack import (TextCorpus, iter_pack_words)
+
+
+# Defines the stats of a result compared with the score of the words typed.
+Checked_stats = ('word_sum', 'correct_char_sum', 'total_char_sum',
+                 'precision', 'chars_per_minute', 'words_per_minute')
+
+
+# Types the words in a single session and checks its result.
+async def typist(connect, words: list[str], user: str, text_name: str,
+                  words_per_minute: float, realtime: bool,
+                  error_rate: float, seed: int, Stats: dict) -> None:
+
+    Reader, Writer = await connect()
+    Generator = Random(seed)
+    key_period = round(60e9 / (words_per_minute * 5))
+    timestamp = 0
+    progress = 0
+
+    # Counts progress messages until the result arrives.
+    async def receive() -> dict:
+
+        nonlocal progress
+        while True:
+            message = decode_message(await read_message(Reader))
+            if message['type'] == 'result':
+                return message
+            progress += 1
+
+    Receiver = asyncio.create_task(receive())
+
+    Writer.write(encode_start(text_name, user))
+    typed_words = []
+    for word_index, word in enumerate(words):
+        records = bytearray()
+        typed = ''
+        for letter in word + ' ':
+            if letter != ' ' and Generator.random() < error_rate:
+                letter = '#'
+            records += Record.pack(timestamp, ord(letter), word_index)
+            timestamp += key_period
+            typed += letter
+        typed_words.append(typed[:-1])
+        Writer.write(encode_frame(FRAME_KEYS, bytes(records)))
+        await Writer.drain()
+        if realtime:
+            await asyncio.sleep(key_period * (len(word) + 1) / 1e9)
+
+    end = perf_counter()
+    Writer.write(encode_frame(FRAME_END))
+    await Writer.drain()
+    result = await Receiver
+    Stats['latencies'].append(perf_counter() - end)
+
+    Writer.close()
+
+    Stats['keys'] += sum(len(word) + 1 for word in words)
+    Stats['progress'] += progress
+
+    # Scores the same words locally for the time between the first
+    # and the last keystroke, the server has to agree on every stat.
+    Expected = score_words(words, typed_words,
+                           (timestamp - key_period) / 1e9)
+    if result['status'] != 'finished' or \
+          any(not isclose(result[stat], getattr(Expected, stat))
+              for stat in Checked_stats):
+        Stats['mismatches'] += 1
+
+
+# Runs the sessions concurrently.
+async def load(sessions: int, words: list[str], text_name: str,
+                words_per_minute: float, realtime: bool, error_rate: float,
+                host: str, port: int, unix_socket: str,
+                Corpus: TextCorpus | None) -> dict:
+
+    """
+    Runs the given number of sessions concurrently against the server (one started in this process
+        on a free port if Corpus is given) and returns the counts and timings of the load.
+    """
+
+    Server = Listener = None
+    if Corpus is not None:
+        Server = ScoringServer(Corpus)
+        Listener = await Server.serve_tcp(host, 0)
+        port = Listener.sockets[0].getsockname()[1]
+
+    if unix_socket != '':
+        connect = lambda: asyncio.open_unix_connection(unix_socket)
+    else:
+        connect = lambda: asyncio.open_connection(host, port)
+
+    Stats = {'keys': 0, 'progress': 0, 'mismatches': 0, 'latencies': []}
+    start = perf_counter()
+    await asyncio.gather(*(typist(connect, words, 'load' + str(i),
+                                  text_name, words_per_minute, realtime,
+                                  error_rate, i, Stats)
+                           for i in range(sessions)))
+    Stats['seconds'] = perf_counter() - start
+
+    if Listener is not None:
+        Listener.close()
+        await Listener.wait_closed()
+
+    return Stats
+
+
+if __name__ == '__main__':
+
+    Parser = ArgumentParser(description='Types many concurrent sessions '
+                            'into the scoring server and reports its '
+                            'throughput. Starts a server in this process '
+                            'unless --port or --unix is given. Exits with '
+                            '1 if any session was scored wrong.')
+    Parser.add_argument('--sessions', type=int, default=200)
+    Parser.add_argument('--words', type=int, default=100)
+    Parser.add_argument('--text', default='Lorem Ipsum')
+    Parser.add_argument('--wpm', type=float, default=80)
+    Parser.add_argument('--realtime', action='store_true',
+                        help='send keys at the given WPM instead of as '
+                        'fast as possible')
+    Parser.add_argument('--error-rate', type=float, default=0.05)
+    Parser.add_argument('--host', default='127.0.0.1')
+    Parser.add_argument('--port', type=int, default=0)
+    Parser.add_argument('--unix', default='')
+    Arguments = Parser.parse_args()
+
+    # The client types the same texts the server scores.
+    Corpus = TextCorpus(join(Root_folder, 'Texts'),
+                        join(Root_folder, 'Data', 'Packs'))
+    Corpus.refresh()
+    words = []
+    for word in iter_pack_words(Corpus.pack_path(Arguments.text)):
+        if len(words) >= Arguments.words:
+            break
+        words.append(word)
+
+    in_process = Arguments.port == 0 and Arguments.unix == ''
+    Stats = asyncio.run(load(Arguments.sessions, words, Arguments.text,
+                             Arguments.wpm, Arguments.realtime,
+                             Arguments.error_rate, Arguments.host,
+                             Arguments.port, Arguments.unix,
+                             Corpus if in_process else None))
+
+    latencies = sorted(Stats['latencies'])
+    print('{} sessions, {} keys in {:.2f} s'.format(
+        Arguments.sessions, Stats['keys'], Stats['seconds']))
+    print('{:.0f} keys/s, {:.1f} sessions/s, {} progress messages'.format(
+        Stats['keys'] / Stats['seconds'],
+        Arguments.sessions / Stats['seconds'], Stats['progress']))
+    print('result latency p50 {:.2f} ms, p95 {:.2f} ms, max {:.2f} ms'
+          .format(latencies[len(latencies) // 2] * 1000,
+                  latencies[int(len(latencies) * 0.95)] * 1000,
+                  latencies[-1] * 1000))
+    if Stats['mismatches'] > 0:
+        print('FAIL', Stats['mismatches'], 'sessions were scored wrong')
+
+    exit(1 if Stats['mismatches'] > 0 else 0)
@@ -0,0 +1,112 @@
+from argparse import ArgumentParser
+from os.path import (abspath, dirname)
+from random import Random
+from sys import path
+from time import perf_counter
+from tkinter import (END, Text, Tk)
+
+# Makes the Src package importable when the script is run directly.
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+from Src.tagbatch import TagBatch
+
+
+# Objects of this class count the calls made to the Tcl interpreter.
+class CountingTcl:
+
+    def __init__(self, Tcl) -> None:
+
+        self.Tcl = Tcl
+        self.calls = 0
+
+    # Counts and forwards a call.
+    def call(self, *args):
+
+        self.calls += 1
+        return self.Tcl.call(*args)
+
+    # Counts and forwards an evaluation.
+    def eval(self, script: str):
+
+        self.calls += 1
+        return self.Tcl.eval(script)
+
+    # Forwards everything else to the interpreter.
+    def __getattr__(self, name: str):
+
+        return getattr(self.Tcl, name)
+
+
+# Colors the words one call per character (the way _check_word used to).
+def color_directly(Text_widget: Text, words: list[str],
+                    results: list[list[bool]]) -> None:
+
+    column = 0
+    for word, word_results in zip(words, results):
+        for i, correct in enumerate(word_results):
+            Text_widget.tag_add('CORRECT' if correct else 'INCORRECT',
+                                '1.' + str(column + i))
+        Text_widget.tag_remove('CURRENT', '1.' + str(column),
+                               '1.' + str(column + len(word)))
+        column += len(word) + 1
+        Text_widget.tag_add('CURRENT', '1.' + str(column),
+                            '1.' + str(column + len(word)))
+
+
+# Colors the words through a TagBatch flushed once per word.
+def color_batched(Text_widget: Text, words: list[str],
+                   results: list[list[bool]]) -> None:
+
+    Tags = TagBatch(Text_widget)
+    column = 0
+    for word, word_results in zip(words, results):
+        for i, correct in enumerate(word_results):
+            Tags.add('CORRECT' if correct else 'INCORRECT', 1,
+                     column + i, column + i + 1)
+        Tags.remove('CURRENT', 1, column, column + len(word))
+        column += len(word) + 1
+        Tags.add('CURRENT', 1, column, column + len(word))
+        Tags.flush()
+
+
+if __name__ == '__main__':
+
+    Parser = ArgumentParser(description='Compares Tcl calls and time per '
+                            'submitted word when tags are changed one '
+                            'character at a time and through TagBatch.')
+    Parser.add_argument('--words', type=int, default=300)
+    Parser.add_argument('--error-rate', type=float, default=0.05,
+                        help='chance of every character being incorrect')
+    Arguments = Parser.parse_args()
+
+    Generator = Random(0)
+    words = [''.join(Generator.choice('abcdefghijklmnopqrstuvwxyz')
+                     for _ in range(Generator.randint(2, 10)))
+             for _ in range(Arguments.words)]
+    results = [[Generator.random() >= Arguments.error_rate for _ in word]
+               for word in words]
+
+    Root = Tk()
+    Root.withdraw()
+
+    for name, color in (('direct', color_directly),
+                        ('batched', color_batched)):
+        Text_widget = Text(Root)
+        Text_widget.insert(END, ' '.join(words) + ' ')
+        for tag in ('CURRENT', 'CORRECT', 'INCORRECT'):
+            Text_widget.tag_configure(tag)
+
+        Text_widget.tk = CountingTcl(Text_widget.tk)
+        start = perf_counter()
+        color(Text_widget, words, results)
+        Root.update_idletasks()
+        elapsed = perf_counter() - start
+
+        print(name.ljust(8),
+              '{:6.2f} Tcl calls/word'.format(Text_widget.tk.calls /
+                                              len(words)),
+              '{:8.1f} us/word'.format(elapsed / len(words) * 1e6))
+
+        Text_widget.destroy()
+
+    Root.destroy()
@@ -0,0 +1,359 @@
+from argparse import ArgumentParser
+from json import (dump, load)
+from os import (environ, remove)
+from os.path import (abspath, dirname, exists, join)
+from platform import (platform, python_version)
+from shutil import which
+from subprocess import (DEVNULL, Popen)
+from sys import (exit, path)
+from tempfile import mkstemp
+from time import (perf_counter_ns, process_time_ns, sleep)
+from tkinter import TkVersion
+
+# Makes the Src package importable when the script is run directly.
+Root_folder = dirname(dirname(abspath(__file__)))
+path.insert(0, Root_folder)
+
+from Src.tagbatch import TagBatch
+from Src.textsource import iter_words
+
+
+# Defines the period of a frame in ns (60 frames per second)
+# and the metrics of a run that are compared with the baseline
+# (lower is better for all of them).
+Frame_period = 1_000_000_000 // 60
+Compared_metrics = ('startup_ms', 'summary_ms', 'frames_dropped',
+                    'cpu_idle_percent', 'cpu_typing_percent',
+                    'latency_ms.p50', 'latency_ms.p95',
+                    'check_word_us.p95', 'stats_calculate_us.p95')
+
+
+# Starts Xvfb on the given display.
+def start_virtual_display(display: str = ':99') -> Popen:
+
+    """
+    Starts Xvfb on the given display, points DISPLAY to it and returns its process (terminate it once done).
+    Raises RuntimeError if Xvfb is not installed or doesn't start within 5 seconds.
+    """
+
+    if which('Xvfb') is None:
+        raise RuntimeError('Xvfb is not installed')
+
+    Xvfb = Popen(['Xvfb', display, '-screen', '0', '1280x1024x24',
+                  '-nolisten', 'tcp'], stdout=DEVNULL, stderr=DEVNULL)
+
+    socket_path = '/tmp/.X11-unix/X' + display.lstrip(':').split('.')[0]
+    for _ in range(50):
+        if exists(socket_path):
+            environ['DISPLAY'] = display
+            return Xvfb
+        if Xvfb.poll() is not None:
+            break
+        sleep(0.1)
+
+    Xvfb.terminate()
+    raise RuntimeError('Xvfb did not start on display ' + display)
+
+
+# Returns a percentile of the values.
+def percentile(values: list[float], percent: float) -> float:
+
+    """
+    Returns the given percentile (0 to 100, nearest rank) of the values (0 if there are none).
+    """
+
+    if len(values) < 1:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+# Summarizes durations in ns in the given unit.
+def distribution(durations: list[int], unit: int) -> dict[str, float]:
+
+    return {'count': len(durations),
+            'p50': percentile(durations, 50) / unit,
+            'p95': percentile(durations, 95) / unit,
+            'p99': percentile(durations, 99) / unit,
+            'max': max(durations, default=0) / unit}
+
+
+# Writes the first words of the text (letters only) to a temporary file.
+def benchmark_text(text_path: str, words: int) -> str:
+
+    """
+    Writes the first words of the text stripped of everything but ASCII letters to a temporary file
+        (so every character can be typed by its keysym) and returns its path.
+    The text is repeated if it has fewer words.
+    """
+
+    source = [''.join(letter for letter in word
+                      if letter.isascii() and letter.isalpha())
+              for word in iter_words(text_path)]
+    source = [word for word in source if word != '']
+    if len(source) < 1:
+        raise ValueError(text_path + ' has no words to type')
+
+    handle, temporary_path = mkstemp(suffix='.txt')
+    with open(handle, 'w') as Text_file:
+        Text_file.write(' '.join(source[i % len(source)]
+                                 for i in range(words)))
+
+    return temporary_path
+
+
+# Types the text into a typing window at the given speed.
+def measure_run(text_path: str, words_per_minute: float,
+                 idle_seconds: float = 1.0) -> dict:
+
+    """
+    Runs a typing test of the text typing its words (each followed by space) at the given WPM (5 characters per word)
+        with synthetic key events and returns its measurements:
+    - startup_ms - from calling initiate_typing until the event loop runs;
+    - latency_ms - from a key event being queued until the tag changes it caused were applied;
+    - frames_dropped - 60 Hz frames missed while the event loop was blocked;
+    - cpu_idle_percent, cpu_typing_percent - CPU time of the process relative to wall time
+        before the first keystroke (for idle_seconds) and while typing;
+    - check_word_us, stats_calculate_us - durations of the handlers;
+    - summary_ms - from the summary being shown until it was drawn;
+    - achieved_wpm - WPM measured by the typing window.
+    """
+
+    from Src.typingwindow import TypingWindow
+
+    Typing_window = TypingWindow(text_path)
+
+    with open(text_path) as Text_file:
+        keys = list(Text_file.read().strip().replace(' ', '_') + '_')
+    key_period = round(60e9 / (words_per_minute * 5))
+
+    check_word = Typing_window._check_word
+    stats_calculate = Typing_window._stats_calculate
+    show_summary = Typing_window._show_summary
+    flush = TagBatch.flush
+
+    Measured = {'check_word': [], 'stats_calculate': [], 'latency': [],
+                'frames_dropped': 0}
+    Marks = {}
+    pending_keys = []
+
+    # Times the words being checked.
+    def timed_check_word(event) -> None:
+
+        start = perf_counter_ns()
+        check_word(event)
+        Measured['check_word'].append(perf_counter_ns() - start)
+
+    # Times the stats calculations.
+    def timed_stats_calculate() -> None:
+
+        start = perf_counter_ns()
+        stats_calculate()
+        Measured['stats_calculate'].append(perf_counter_ns() - start)
+
+    # Marks the keys queued before the tag changes as handled.
+    def timed_flush(Tags: TagBatch) -> None:
+
+        flush(Tags)
+        if len(pending_keys) > 0:
+            end = perf_counter_ns()
+            Measured['latency'].extend(end - queued
+                                       for queued in pending_keys)
+            pending_keys.clear()
+
+    # Counts frames missed since the last tick.
+    def tick(last: int) -> None:
+
+        now = perf_counter_ns()
+        Measured['frames_dropped'] += max(0, (now - last) //
+                                          Frame_period - 1)
+        Marks['tick'] = Typing_window.after(Frame_period // 1_000_000,
+                                            tick, now)
+
+    # Marks the event loop running and types after idling.
+    def ready() -> None:
+
+        Marks['ready'] = perf_counter_ns()
+        Marks['idle_cpu'] = process_time_ns()
+        Typing_window.Entry_word.focus_force()
+        tick(perf_counter_ns())
+        Typing_window.after(round(idle_seconds * 1000), begin_typing)
+
+    # Starts typing once the window idled.
+    def begin_typing() -> None:
+
+        Marks['idle_cpu'] = process_time_ns() - Marks['idle_cpu']
+        Marks['idle_wall'] = perf_counter_ns() - Marks['ready']
+        Marks['typing'] = perf_counter_ns()
+        Marks['typing_cpu'] = process_time_ns()
+        press_key(0)
+
+    # Queues the key and schedules the next one on time.
+    def press_key(index: int) -> None:
+
+        if index >= len(keys) or not Typing_window.running and index > 0:
+            return
+
+        keysym = 'space' if keys[index] == '_' else keys[index]
+        pending_keys.append(perf_counter_ns())
+        Typing_window.Entry_word.event_generate('<Key>', keysym=keysym,
+                                                when='tail')
+
+        delay = Marks['typing'] + (index + 1) * key_period - \
+            perf_counter_ns()
+        Typing_window.after(max(0, delay // 1_000_000), press_key,
+                            index + 1)
+
+    # Times the summary until it's drawn and closes it.
+    def timed_show_summary() -> None:
+
+        Marks['typing_cpu'] = process_time_ns() - Marks['typing_cpu']
+        Marks['typing_wall'] = perf_counter_ns() - Marks['typing']
+        Typing_window.after_cancel(Marks['tick'])
+        Marks['summary'] = perf_counter_ns()
+        Typing_window.after(0, summary_drawn)
+        show_summary()
+
+    # Closes the summary once it's drawn.
+    def summary_drawn() -> None:
+
+        Typing_window.update_idletasks()
+        Marks['summary'] = perf_counter_ns() - Marks['summary']
+        Typing_window._close_summary()
+
+    Typing_window._check_word = timed_check_word
+    Typing_window._stats_calculate = timed_stats_calculate
+    Typing_window._show_summary = timed_show_summary
+    TagBatch.flush = timed_flush
+
+    try:
+        Typing_window.after(0, ready)
+        start = perf_counter_ns()
+        Engine = Typing_window.initiate_typing()
+    finally:
+        TagBatch.flush = flush
+        Typing_window.destroy()
+
+    if 'summary' not in Marks:
+        raise RuntimeError('the test ended before the text was typed')
+
+    return {'wpm': words_per_minute,
+            'words': Engine.word_sum,
+            'achieved_wpm': Engine.words_per_minute,
+            'startup_ms': (Marks['ready'] - start) / 1e6,
+            'summary_ms': Marks['summary'] / 1e6,
+            'frames_dropped': Measured['frames_dropped'],
+            'cpu_idle_percent': 100 * Marks['idle_cpu'] /
+            Marks['idle_wall'],
+            'cpu_typing_percent': 100 * Marks['typing_cpu'] /
+            Marks['typing_wall'],
+            'latency_ms': distribution(Measured['latency'], 1_000_000),
+            'check_word_us': distribution(Measured['check_word'], 1000),
+            'stats_calculate_us': distribution(Measured['stats_calculate'],
+                                               1000)}
+
+
+# Returns the value of a metric (nested ones are separated by a dot).
+def metric(run: dict, name: str) -> float:
+
+    for key in name.split('.'):
+        run = run[key]
+    return run
+
+
+# Compares the runs with the baseline.
+def compare(runs: list[dict], baseline: dict,
+             tolerance: float) -> list[str]:
+
+    """
+    Returns descriptions of the metrics of the runs that are more than tolerance (relative) worse
+        than the ones of the baseline run of the same WPM (runs missing from the baseline are skipped).
+    Metrics with baseline values close to 0 are given an absolute allowance of 1.
+    """
+
+    Baseline_runs = {run['wpm']: run for run in baseline['runs']}
+    regressions = []
+
+    for run in runs:
+        Baseline_run = Baseline_runs.get(run['wpm'])
+        if Baseline_run is None:
+            continue
+        for name in Compared_metrics:
+            current = metric(run, name)
+            previous = metric(Baseline_run, name)
+            if current > max(previous * (1 + tolerance), previous + 1):
+                regressions.append('{} WPM {}: {:.3f} (baseline {:.3f})'
+                                   .format(run['wpm'], name, current,
+                                           previous))
+
+    return regressions
+
+
+if __name__ == '__main__':
+
+    Parser = ArgumentParser(description='Types texts into the typing '
+                            'window with synthetic key events at given '
+                            'speeds and measures latency, dropped frames, '
+                            'CPU use, startup and summary time. Results '
+                            'are written as JSON and compared with a '
+                            'baseline, exits with 1 on regressions.')
+    Parser.add_argument('--text', default=join(Root_folder, 'Texts',
+                                                'Lorem Ipsum.txt'))
+    Parser.add_argument('--words', type=int, default=100)
+    Parser.add_argument('--wpm', type=float, nargs='+',
+                        default=[40, 120, 300])
+    Parser.add_argument('--idle', type=float, default=1.0,
+                        help='seconds the window idles before typing')
+    Parser.add_argument('--output', default='typing_latency.json')
+    Parser.add_argument('--baseline', default='',
+                        help='results of a previous run to compare with')
+    Parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative slowdown allowed over the baseline')
+    Parser.add_argument('--xvfb', default='auto',
+                        choices=('auto', 'always', 'never'),
+                        help='run on a virtual display (auto does if '
+                        'DISPLAY is not set)')
+    Parser.add_argument('--display', default=':99')
+    Arguments = Parser.parse_args()
+
+    Xvfb = None
+    if Arguments.xvfb == 'always' or \
+          (Arguments.xvfb == 'auto' and environ.get('DISPLAY', '') == ''):
+        Xvfb = start_virtual_display(Arguments.display)
+
+    text_path = benchmark_text(Arguments.text, Arguments.words)
+    try:
+        runs = []
+        for words_per_minute in Arguments.wpm:
+            run = measure_run(text_path, words_per_minute, Arguments.idle)
+            runs.append(run)
+            print('{:6.0f} WPM  startup {:7.1f} ms  latency p50 {:6.2f} ms '
+                  'p95 {:6.2f} ms  dropped {:3d}  CPU {:5.1f} % / {:5.1f} %'
+                  '  summary {:7.1f} ms'.format(
+                      words_per_minute, run['startup_ms'],
+                      run['latency_ms']['p50'], run['latency_ms']['p95'],
+                      run['frames_dropped'], run['cpu_idle_percent'],
+                      run['cpu_typing_percent'], run['summary_ms']))
+    finally:
+        remove(text_path)
+        if Xvfb is not None:
+            Xvfb.terminate()
+            Xvfb.wait()
+
+    with open(Arguments.output, 'w') as Output:
+        dump({'python': python_version(), 'tk': TkVersion,
+              'platform': platform(), 'words': Arguments.words,
+              'runs': runs}, Output, indent=2)
+
+    if Arguments.baseline == '':
+        exit(0)
+
+    with open(Arguments.baseline) as Baseline_file:
+        regressions = compare(runs, load(Baseline_file),
+                              Arguments.tolerance)
+    for regression in regressions:
+        print('FAIL', regression)
+
+    exit(1 if len(regressions) > 0 else 0)
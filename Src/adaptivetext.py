@@ -0,0 +1,397 @@
+from collections import Counter
+from collections.abc import Sequence
+from importlib.util import find_spec
+from random import Random
+from time import time
+from Src.sessionstore import (SECONDS_PER_DAY, SessionStore, day_of)
+from Src.textpack import (TextCorpus, iter_pack_words, write_pack)
+
+
+# Defines the name the adaptive practice is listed under and saved as.
+ADAPTIVE_TEXT = 'Adaptive practice'
+
+
+# Objects of this class draw indexes with given weights in O(1).
+class AliasTable:
+
+    """Description:
+    ----------------
+
+    Alias table (Vose's method) of a discrete distribution.
+    Building it takes O(n), every draw takes a single random number and O(1) time however many weights there are.
+
+    Methods:
+    ----------------
+
+    sample(Generator : Random) -> int:
+        Returns a random index drawn with the probabilities of the weights.
+
+    Useful Info:
+    ----------------
+
+    - raises ValueError if there are no weights or they don't sum to a positive number.
+    """
+
+    __slots__ = ('Probability', 'Alias')
+
+    def __init__(self, weights: Sequence[float]) -> None:
+
+        """
+        Inits AliasTable object of the given (non-negative) weights.
+        """
+
+        count = len(weights)
+        total = sum(weights)
+        if count < 1 or total <= 0:
+            raise ValueError('weights have to sum to a positive number')
+
+        scaled = [weight * count / total for weight in weights]
+        self.Probability = [1.0] * count
+        self.Alias = list(range(count))
+
+        small = [i for i, value in enumerate(scaled) if value < 1]
+        large = [i for i, value in enumerate(scaled) if value >= 1]
+        while len(small) > 0 and len(large) > 0:
+            less = small.pop()
+            more = large.pop()
+            self.Probability[less] = scaled[less]
+            self.Alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            if scaled[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+
+    # Draws an index.
+    def sample(self, Generator: Random) -> int:
+
+        """
+        Returns a random index drawn with the probabilities of the weights.
+        """
+
+        value = Generator.random() * len(self.Probability)
+        index = min(int(value), len(self.Probability) - 1)
+
+        if value - index < self.Probability[index]:
+            return index
+        return self.Alias[index]
+
+
+# Objects of this class index the words of the texts.
+class WordIndex:
+
+    """Description:
+    ----------------
+
+    Distinct words of all compiled texts along with how many times they appear, read from the packs of the corpus.
+
+    Methods:
+    ----------------
+
+    is_current(Corpus : TextCorpus) -> bool:
+        Returns whether the index was built from the current packs of the corpus.
+
+    Useful Info:
+    ----------------
+
+    - Words and Counts are parallel lists;
+    - packs which can't be read are left out.
+    """
+
+    def __init__(self, Corpus: TextCorpus) -> None:
+
+        """
+        Inits WordIndex object reading every pack of the corpus.
+        """
+
+        self.hashes = self._hashes(Corpus)
+
+        Counts = Counter()
+        for name in Corpus.names():
+            try:
+                Counts.update(iter_pack_words(Corpus.pack_path(name)))
+            except (KeyError, FileNotFoundError, ValueError):
+                continue
+
+        self.Words = list(Counts.keys())
+        self.Counts = list(Counts.values())
+
+    # Returns the hashes of the packs of the corpus.
+    def _hashes(self, Corpus: TextCorpus) -> frozenset[str]:
+
+        return frozenset(Corpus.entry(name)['hash']
+                         for name in Corpus.names())
+
+    # Checks whether the packs changed.
+    def is_current(self, Corpus: TextCorpus) -> bool:
+
+        """
+        Returns whether the index was built from the current packs of the corpus.
+        """
+
+        return self.hashes == self._hashes(Corpus)
+
+    def __len__(self) -> int:
+
+        return len(self.Words)
+
+
+# Objects of this class generate practice texts of the weakest keys.
+class AdaptiveText:
+
+    """Description:
+    ----------------
+
+    Generator of practice texts made of words of the indexed texts weighted toward the characters
+        (and bigrams) typed with the highest error rate.
+    Weight of a word is the square root of how many times it appears in the texts times the cube
+        of the mean error ratio of its characters and bigrams, where the error ratio of a character is its error rate
+        (smoothed so rarely typed characters aren't extreme) divided by the error rate of all characters.
+    Characters and bigrams never typed have the ratio 1, so without any history words are drawn
+        by how common they are.
+
+    Methods:
+    ----------------
+
+    generate(count : int, Generator : Random | None) -> list[str]:
+        Returns count random words.
+
+    write(count : int, pack_path : str, Generator : Random | None) -> dict:
+        Writes count random words as a pack.
+
+    weakest(limit : int) -> list[tuple[str, float]]:
+        Returns the characters and bigrams with the highest error ratios.
+
+    update(letter_stats : dict[str, tuple[int, int]], timestamp : float | None) -> None:
+        Adds the character counters of a new session and recalculates the weights.
+
+    update_from(History : SessionStore, user : str | None) -> None:
+        Adds the character counters of the sessions stored since the last ones added and recalculates the weights.
+
+    Useful Info:
+    ----------------
+
+    - weights are calculated once (O(length of all indexed words)) into an alias table,
+        so every generated word takes O(1) time;
+    - update recalculates the weights without reading the history again,
+        so it takes the same time however many sessions there are (bigram ratios stay as they were);
+    - character counters are kept by day, days older than the window are dropped whenever the counters
+        are updated, so the weights stay calculated from the same days as if they were built again;
+    - last_id is the id of the last session the counters include (see SessionStore.last_id),
+        update doesn't change it, so sessions added by update are added again by update_from;
+    - the same word is not drawn twice in a row (unless it's the only one).
+    """
+
+    # Defines how strongly the error ratios favor words.
+    sharpness = 3
+
+    def __init__(self, Index: WordIndex,
+                  letter_stats: dict[int, dict[str, tuple[int, int]]],
+                  bigram_stats: dict[str, tuple[int, int]] | None = None,
+                  days: float = 30, last_id: int = 0) -> None:
+
+        """
+        Inits AdaptiveText object.
+
+        Args:
+
+            Index(WordIndex):
+                Specifies the words to draw from.
+
+            letter_stats(dict[int, dict[str, tuple[int, int]]]):
+                Specifies the (correct, total) counters of the characters by day (see SessionStore.daily_letter_totals).
+
+        Optional Args:
+
+            bigram_stats(dict[str, tuple[int, int]] | None):
+                Specifies the (errors, total) counters of the bigrams.
+
+            days(float):
+                Specifies how many days the character counters are kept for.
+
+            last_id(int):
+                Specifies the id of the last session the counters include.
+
+        Raises ValueError if the index has no words.
+        """
+
+        self.Index = Index
+        self.days = days
+        self.last_id = last_id
+
+        # Holds the (errors, total) counters by day and summed.
+        self.Daily_stats = {}
+        self.Letter_stats = {}
+        for day, stats in letter_stats.items():
+            self._add(day, stats)
+        self.Bigram_ratios = self._ratios(bigram_stats or {})
+
+        self._build_table()
+
+    # Calculates the weights of the words into the alias table.
+    def _build_table(self) -> None:
+
+        self.Letter_ratios = self._ratios(self.Letter_stats)
+
+        letter_ratio = self.Letter_ratios.get
+        bigram_ratio = self.Bigram_ratios.get
+        weights = []
+        for word, count in zip(self.Index.Words, self.Index.Counts):
+            ratios = [letter_ratio(letter, 1.0) for letter in word]
+            ratios += [bigram_ratio(word[i - 1:i + 1], 1.0)
+                       for i in range(1, len(word))]
+            weights.append(count ** 0.5 *
+                           (sum(ratios) / len(ratios)) ** self.sharpness)
+
+        self.Table = AliasTable(weights)
+
+    # Adds the (correct, total) counters to the day and the sums.
+    def _add(self, day: int, letter_stats: dict[str, tuple[int, int]]
+              ) -> None:
+
+        Day_stats = self.Daily_stats.setdefault(day, {})
+        for letter, (correct, total) in letter_stats.items():
+            for Stats in (Day_stats, self.Letter_stats):
+                errors, previous_total = Stats.get(letter, (0, 0))
+                Stats[letter] = (errors + total - correct,
+                                 previous_total + total)
+
+    # Drops the counters of the days before the window.
+    def _expire(self, timestamp: float) -> None:
+
+        first_day = day_of(timestamp - self.days * SECONDS_PER_DAY)
+        for day in [day for day in self.Daily_stats if day < first_day]:
+            for letter, (errors, total) in self.Daily_stats.pop(day).items():
+                left_errors, left_total = self.Letter_stats[letter]
+                if left_total > total:
+                    self.Letter_stats[letter] = (left_errors - errors,
+                                                 left_total - total)
+                else:
+                    del self.Letter_stats[letter]
+
+    # Adds the counters of a session.
+    def update(self, letter_stats: dict[str, tuple[int, int]],
+                timestamp: float | None = None) -> None:
+
+        """
+        Adds the (correct, total) counters of the characters of a new session typed at the timestamp
+            (the current time if None) to the ones the weights were calculated from, drops the ones of the days
+            before the window and recalculates the weights.
+        """
+
+        if timestamp is None:
+            timestamp = time()
+
+        self._add(day_of(timestamp), letter_stats)
+        self._expire(time())
+        self._build_table()
+
+    # Adds the counters of the sessions stored since the last ones added.
+    def update_from(self, History: SessionStore,
+                     user: str | None = None) -> None:
+
+        """
+        Adds the counters of the sessions of the user (of everyone if None) stored after last_id,
+            drops the ones of the days before the window and recalculates the weights
+            (reads only the new sessions, so no session is added twice or left out).
+        """
+
+        last_id = History.last_id()
+        if last_id <= self.last_id:
+            return
+
+        for day, stats in History.daily_letter_totals(
+                user, after_id=self.last_id, last_id=last_id).items():
+            self._add(day, stats)
+        self.last_id = last_id
+
+        self._expire(time())
+        self._build_table()
+
+    # Returns the smoothed error rates divided by the overall error rate.
+    def _ratios(self, stats: dict[str, tuple[int, int]]
+                 ) -> dict[str, float]:
+
+        if len(stats) < 1:
+            return {}
+
+        overall = (sum(errors for errors, _ in stats.values()) + 1) / \
+            (sum(total for _, total in stats.values()) + 2)
+
+        return {key: (errors + 1) / (total + 2) / overall
+                for key, (errors, total) in stats.items()}
+
+    # Generates the words.
+    def generate(self, count: int,
+                  Generator: Random | None = None) -> list[str]:
+
+        """
+        Returns count words drawn by their weights (from a new unseeded generator if Generator is None).
+        """
+
+        if Generator is None:
+            Generator = Random()
+
+        Words = self.Index.Words
+        sample = self.Table.sample
+        drawn = []
+        previous = -1
+        for _ in range(count):
+            index = sample(Generator)
+            if index == previous and len(Words) > 1:
+                index = sample(Generator)
+            drawn.append(Words[index])
+            previous = index
+
+        return drawn
+
+    # Writes the words as a pack.
+    def write(self, count: int, pack_path: str,
+               Generator: Random | None = None) -> dict:
+
+        """
+        Writes count generated words as a pack to pack_path (see Src.textpack.write_pack).
+        """
+
+        return write_pack(self.generate(count, Generator), pack_path)
+
+    # Returns the weakest characters and bigrams.
+    def weakest(self, limit: int = 10) -> list[tuple[str, float]]:
+
+        """
+        Returns tuples of (character or bigram, error ratio) with the highest ratios, highest first.
+        """
+
+        ratios = list(self.Letter_ratios.items()) + \
+            list(self.Bigram_ratios.items())
+
+        return sorted(ratios, key=lambda item: -item[1])[:limit]
+
+
+# Builds the generator from the history of the user.
+def adaptive_text(Index: WordIndex, History: SessionStore,
+                   Corpus: TextCorpus, user: str | None = None,
+                   days: float = 30) -> AdaptiveText:
+
+    """
+    Returns AdaptiveText weighted by the character counters of the sessions of the user (of everyone if None)
+        from the last days (counted in whole days, see SessionStore.daily_letter_totals), along with the bigrams of their keystroke logs if numpy is installed
+        (see Src.historyanalytics, only logs typed on the current version of their text count).
+    """
+
+    since = day_of(time() - days * SECONDS_PER_DAY) * SECONDS_PER_DAY
+    last_id = History.last_id()
+    letter_stats = History.daily_letter_totals(user, since=since,
+                                               last_id=last_id)
+
+    bigram_stats = None
+    if find_spec('numpy') is not None:
+        # Imported only when needed as it imports numpy.
+        from Src.historyanalytics import HistoryAnalytics
+
+        Analytics = HistoryAnalytics(History, Corpus, user, since=since)
+        bigram_stats = {bigram: (round(error_rate * count), count)
+                        for bigram, error_rate, count, _ in
+                        Analytics.worst_ngrams(2, None, 1)}
+
+    return AdaptiveText(Index, letter_stats, bigram_stats, days, last_id)
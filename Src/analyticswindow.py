@@ -0,0 +1,256 @@
+import sqlite3
+from datetime import datetime
+from threading import Thread
+from tkinter import (END, W, Misc, StringVar, Toplevel)
+from tkinter import ttk
+from Src.historyanalytics import HistoryAnalytics
+from Src.sessionstore import SessionStore
+from Src.textpack import TextCorpus
+from Src.textpicker import TextPicker
+
+
+# Defines the option of the text filter which includes every text.
+ALL_TEXTS = 'All texts'
+
+
+# Objects of this class show the analytics of the stored sessions.
+class AnalyticsWindow:
+
+    """Description:
+    ----------------
+
+    Window showing the analytics of all stored sessions (or the sessions of a single text):
+    - the characters with the lowest accuracy;
+    - the bigrams and trigrams with the highest error rate along with their mean latency;
+    - mean WPM and precision of every week and how much they change per week.
+
+    Methods:
+    ----------------
+
+    show(text : str) -> None:
+        Starts recalculating the analytics of the sessions of the text.
+
+    Necessary modules:
+    ----------------
+
+    - numpy
+        (see Src.historyanalytics, the options menu doesn't open this window without it).
+
+    Useful Info:
+    ----------------
+
+    - analytics are calculated once the window opens and whenever another text is chosen in the searchable
+        text picker (see Src.textpicker), the window is closed by escape or any other means;
+    - analytics are calculated by a thread through its own connection to the database of the store
+        and shown once the window polls them, so the options menu (and the tests it supervises)
+        keeps running meanwhile, only one calculation runs at a time and only the last text chosen
+        while it runs is calculated next.
+    """
+
+    # Defines how many rows every table shows
+    # and how many times a character or n-gram has to be typed to be listed.
+    rows = 10
+    min_count = 5
+
+    # Defines the time between polls of a running calculation in ms.
+    poll_interval = 50
+
+    # Defines the length of the periods of the trend in seconds.
+    period = 7 * 24 * 3600
+
+    def __init__(self, master: Misc, History: SessionStore,
+                  Corpus: TextCorpus, icon_path: str = '') -> None:
+
+        """
+        Inits AnalyticsWindow object opening the window over master.
+
+        Args:
+
+            History(SessionStore):
+                Specifies the store the sessions are read from (a file, it's flushed by the main thread
+                    and read by the calculation through a connection of its own).
+
+            Corpus(TextCorpus):
+                Specifies the texts the keystroke logs are compared with.
+
+        Optional Args:
+
+            icon_path(str):
+                Specifies the path to the icon of the window.
+        """
+
+        self.History = History
+        self.Corpus = Corpus
+
+        self.Window = Toplevel(master)
+        self.Window.title('Typing Analytics')
+        self.Window.resizable(False, False)
+        if icon_path != '':
+            self.Window.iconbitmap(icon_path)
+        self.Window.bind('<Escape>', lambda event: self.Window.destroy())
+
+        self.Text_filter = StringVar(self.Window, value=ALL_TEXTS)
+        Text_picker = TextPicker(self.Window, self.Text_filter,
+                                 [ALL_TEXTS] + History.texts())
+        Text_picker.widget().grid(row=0, column=0, columnspan=3, pady=5)
+
+        # Holds the running calculation (None if there is none),
+        # its results and the text chosen while it was running.
+        self.Calculation = None
+        self.Results = None
+        self.pending_text = None
+
+        self.Overview_value = StringVar(self.Window)
+        ttk.Label(self.Window, textvariable=self.Overview_value
+                  ).grid(row=1, column=0, columnspan=3)
+
+        self.Letters_table = self._table(
+            'Worst Characters', (('letter', 'Char', 50),
+                                 ('accuracy', 'Accuracy', 70),
+                                 ('count', 'Typed', 60)), 2, 0)
+        self.Bigrams_table = self._table(
+            'Worst Bigrams', (('ngram', 'Bigram', 60),
+                              ('errors', 'Errors', 60),
+                              ('count', 'Typed', 60),
+                              ('latency', 'ms', 60)), 2, 1)
+        self.Trigrams_table = self._table(
+            'Worst Trigrams', (('ngram', 'Trigram', 60),
+                               ('errors', 'Errors', 60),
+                               ('count', 'Typed', 60),
+                               ('latency', 'ms', 60)), 2, 2)
+        self.Trend_table = self._table(
+            'Weekly Trend', (('week', 'Week Of', 100),
+                             ('sessions', 'Sessions', 70),
+                             ('wpm', 'WPM', 70),
+                             ('precision', 'Precision', 80)), 3, 0,
+            columnspan=3)
+
+        self.show()
+        self.Text_filter.trace_add('write', lambda *args: self.show())
+        self.Window.focus()
+
+    # Places a table in a labeled frame.
+    def _table(self, title: str, columns: tuple, row: int, column: int,
+                columnspan: int = 1) -> ttk.Treeview:
+
+        Frame = ttk.LabelFrame(self.Window, text=title)
+        Table = ttk.Treeview(Frame, columns=[name for name, _, _
+                                             in columns],
+                             show='headings', height=self.rows)
+        for name, heading, width in columns:
+            Table.heading(name, text=heading)
+            Table.column(name, width=width, anchor=W)
+        Table.pack(padx=5, pady=5)
+        Frame.grid(row=row, column=column, columnspan=columnspan,
+                   padx=5, pady=5)
+
+        return Table
+
+    # Starts recalculating the analytics.
+    def show(self, text: str | None = None) -> None:
+
+        """
+        Starts recalculating the analytics of the sessions of the given text (of the chosen one if it's None,
+            of all of them for ALL_TEXTS), they are shown once they are calculated.
+        Does nothing if no text is chosen.
+        """
+
+        if text is None:
+            text = self.Text_filter.get()
+        if text == '':
+            return
+
+        self.pending_text = text
+        if self.Calculation is None:
+            self._start_calculation()
+
+    # Starts calculating the analytics of the pending text.
+    def _start_calculation(self) -> None:
+
+        text, self.pending_text = self.pending_text, None
+
+        # Writes the added sessions so the calculation reads them.
+        self.History.flush()
+
+        self.Overview_value.set('Calculating...')
+        self.Results = None
+        self.Calculation = Thread(target=self._calculate, args=(text,),
+                                  daemon=True)
+        self.Calculation.start()
+        self.Window.after(self.poll_interval, self._poll)
+
+    # Calculates the analytics (in the thread of the calculation).
+    def _calculate(self, text: str) -> None:
+
+        try:
+            with SessionStore(self.History.database_path) as History:
+                Analytics = HistoryAnalytics(History, self.Corpus,
+                                             text=None if text == ALL_TEXTS
+                                             else text)
+        except (sqlite3.Error, OSError):
+            return
+
+        Trend = Analytics.trend(self.period)
+        self.Results = {
+            'sessions': len(Analytics.Timestamps),
+            'letters': Analytics.worst_letters(self.rows, self.min_count),
+            'ngrams': [Analytics.worst_ngrams(n, self.rows, self.min_count)
+                       for n in (2, 3)],
+            'trend': list(zip(Trend['starts'][::-1],
+                              Trend['sessions'][::-1],
+                              Trend['words_per_minute'][::-1],
+                              Trend['precision'][::-1])),
+            'wpm_slope': Trend['wpm_slope'],
+            'precision_slope': Trend['precision_slope']}
+
+    # Shows the analytics once they are calculated.
+    def _poll(self) -> None:
+
+        if not self.Window.winfo_exists():
+            return
+
+        if self.Calculation.is_alive():
+            self.Window.after(self.poll_interval, self._poll)
+            return
+
+        self.Calculation = None
+        Results = self.Results
+        self.Results = None
+
+        # Analytics of a text which is no longer chosen aren't shown.
+        if self.pending_text is not None:
+            self._start_calculation()
+        elif Results is None:
+            self.Overview_value.set('The analytics could not be calculated')
+        else:
+            self._fill(Results)
+
+    # Shows the calculated analytics.
+    def _fill(self, Results: dict) -> None:
+
+        for Table in (self.Letters_table, self.Bigrams_table,
+                      self.Trigrams_table, self.Trend_table):
+            Table.delete(*Table.get_children())
+
+        for letter, accuracy, count in Results['letters']:
+            self.Letters_table.insert('', END, values=(
+                letter, str(int(accuracy * 100)) + ' %', count))
+
+        for ngrams, Table in zip(Results['ngrams'], (self.Bigrams_table,
+                                                     self.Trigrams_table)):
+            for ngram, error_rate, count, latency in ngrams:
+                Table.insert('', END, values=(
+                    ngram, str(int(error_rate * 100)) + ' %', count,
+                    '{:.0f}'.format(latency)))
+
+        for start, sessions, words_per_minute, precision in Results['trend']:
+            self.Trend_table.insert('', END, values=(
+                datetime.fromtimestamp(start).strftime('%d.%m.%Y'),
+                int(sessions), '{:.2f}'.format(words_per_minute),
+                str(int(precision * 100)) + ' %'))
+
+        self.Overview_value.set(
+            str(Results['sessions']) + ' sessions   ' +
+            '{:+.2f}'.format(Results['wpm_slope']) + ' WPM per week   ' +
+            '{:+.1f}'.format(Results['precision_slope'] * 100) +
+            ' % precision per week')
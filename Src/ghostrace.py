@@ -0,0 +1,134 @@
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from Src.keystrokelog import (KeystrokeLog, Record)
+from Src.textpack import (PACK_EXTENSION, iter_pack_words)
+from Src.textsource import iter_words
+
+
+# Objects of this class replay an earlier session of a text.
+class GhostTimeline:
+
+    """Description:
+    ----------------
+
+    Position of the user over time in an earlier session of the same text, read from its keystroke log
+        (see Src.keystrokelog), so the session can be raced as a ghost.
+    The log is read once into the times every word was submitted (since the first keystroke)
+        and the offsets every word starts at in the text, so finding the position at any time is a bisection
+        and takes the same time however long the text and the session are.
+
+    Methods:
+    ----------------
+
+    position(elapsed : int) -> tuple[int, int]:
+        Returns the word the ghost is typing and how many of its characters it typed.
+
+    column(word_index : int, page_size : int) -> int:
+        Returns the column the word starts at on its page.
+
+    word_length(word_index : int) -> int:
+        Returns the length of the word.
+
+    finished(elapsed : int) -> bool:
+        Returns whether the ghost submitted its last word.
+
+    Useful Info:
+    ----------------
+
+    - raises FileNotFoundError if the log or the text couldn't be opened
+        and ValueError if the log is not a log or the text is empty;
+    - characters are assumed to be typed evenly between the submissions of two words;
+    - the ghost stops at the last word it submitted (finished tells whether it got there).
+    """
+
+    def __init__(self, log_path: str, text_path: str) -> None:
+
+        """
+        Inits GhostTimeline object reading the keystroke log at log_path of a session of the text at text_path
+            (a pack or a text file).
+        """
+
+        # Keeps the time of the last space pressed in every word
+        # (only the one which moved on to the next word counts).
+        submitted = {}
+        start = None
+        with KeystrokeLog(log_path) as Log:
+            for timestamp, key, word in Record.iter_unpack(Log.records()):
+                if start is None:
+                    start = timestamp
+                if key == 32:
+                    submitted[word] = timestamp - start
+
+        self.Times = array('q')
+        while len(self.Times) in submitted:
+            self.Times.append(max(submitted[len(self.Times)],
+                                  self.Times[-1] if len(self.Times) > 0
+                                  else 0))
+
+        # Reads the words typed (and the one after them).
+        if text_path.endswith(PACK_EXTENSION):
+            Words = iter_pack_words(text_path)
+        else:
+            Words = iter_words(text_path)
+        self.Lengths = array('I', [len(word) for word in
+                                   islice(Words, len(self.Times) + 1)])
+        Words.close()
+        if len(self.Lengths) < 1:
+            raise ValueError(text_path + ' is empty')
+        del self.Times[len(self.Lengths):]
+
+        # Every word is followed by a space.
+        self.Starts = array('Q', [0])
+        for length in self.Lengths:
+            self.Starts.append(self.Starts[-1] + length + 1)
+
+    # Returns the position of the ghost.
+    def position(self, elapsed: int) -> tuple[int, int]:
+
+        """
+        Returns tuple of (index of the word, characters typed) of the ghost the given number of ns
+            after its first keystroke.
+        """
+
+        Times = self.Times
+        word_index = bisect_right(Times, elapsed)
+        if word_index >= len(Times) or word_index >= len(self.Lengths):
+            return min(word_index, len(self.Lengths) - 1), 0
+
+        previous = Times[word_index - 1] if word_index > 0 else 0
+        span = Times[word_index] - previous
+        length = self.Lengths[word_index]
+        typed = length if span <= 0 else \
+            max(0, min(length, (elapsed - previous) * length // span))
+
+        return word_index, typed
+
+    # Returns the column of the word on its page.
+    def column(self, word_index: int, page_size: int) -> int:
+
+        """
+        Returns the column the word starts at on its page
+            (pages are page_size words separated by single spaces, see TypingWindow).
+        """
+
+        return self.Starts[word_index] - \
+            self.Starts[word_index - word_index % page_size]
+
+    # Returns the length of the word.
+    def word_length(self, word_index: int) -> int:
+
+        """
+        Returns the length of the word.
+        """
+
+        return self.Lengths[word_index]
+
+    # Checks whether the ghost submitted every word it's going to.
+    def finished(self, elapsed: int) -> bool:
+
+        """
+        Returns whether the ghost submitted its last word the given number of ns after its first keystroke.
+        """
+
+        return len(self.Times) < 1 or elapsed >= self.Times[-1]
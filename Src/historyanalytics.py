@@ -0,0 +1,388 @@
+from os.path import (exists, join)
+from Src.keystrokelog import (BACKSPACE_KEYSYM, KEYSYM_FLAG, KeystrokeLog)
+from Src.sessionstore import SessionStore
+from Src.textpack import (PACK_EXTENSION, TextCorpus, TextPack)
+
+
+# Objects of this class analyse stored sessions in bulk.
+class HistoryAnalytics:
+
+    """Description:
+    ----------------
+
+    Analytics of many stored sessions at once calculated with vectorized NumPy operations:
+    - accuracy of every character (from the per-character counters of the sessions);
+    - error rates and mean latencies of character bigrams and trigrams (from the keystroke logs of the sessions),
+        as matrices indexed by the characters typed or as lists of the worst ones;
+    - WPM and precision trends by period along with their linear slope.
+
+    Methods:
+    ----------------
+
+    letter_accuracy() -> tuple[str, numpy.ndarray, numpy.ndarray]:
+        Returns the characters, their correct counts and their total counts.
+
+    bigram_matrix() -> tuple[str, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        Returns the characters, error counts, total counts and mean latencies of their bigrams.
+
+    worst_letters(limit : int, min_count : int) -> list[tuple[str, float, int]]:
+        Returns the characters with the lowest accuracy.
+
+    worst_ngrams(n : int, limit : int | None, min_count : int) -> list[tuple[str, float, int, float]]:
+        Returns the bigrams or trigrams with the highest error rate.
+
+    trend(period : float) -> dict:
+        Returns the mean WPM and precision of every period and their slopes.
+
+    Necessary modules:
+    ----------------
+
+    - numpy
+        (optional for the rest of the app, this class raises ModuleNotFoundError without it).
+
+    Useful Info:
+    ----------------
+
+    - every keystroke log is read through mmap and rebuilt without Python loops over keystrokes:
+        positions in the entry are a cumulative sum of characters and backspaces per word and a character is kept
+        only if no later keystroke of the word deleted it, so a year of sessions is analysed in seconds;
+    - n-grams only include characters that were typed and kept (missing characters of short words are not),
+        they are made of the characters of the text and latency of an n-gram is the time between its last two keys;
+    - keystroke logs are decoded against the pack of the version of the text the session was typed on
+        (found by the content hash stored with the session, packs are named by it), so sessions stored
+        without a hash, whose text was edited since or is no longer in the corpus are left out of the n-grams,
+        as are sessions without a keystroke log.
+    """
+
+    def __init__(self, History: SessionStore, Corpus: TextCorpus,
+                  user: str | None = None, text: str | None = None,
+                  since: float | None = None,
+                  until: float | None = None) -> None:
+
+        """
+        Inits HistoryAnalytics object loading the sessions of the store which match the filters
+            (see SessionStore.sessions).
+        Raises ModuleNotFoundError if numpy is not installed.
+        """
+
+        # Imports numpy only when analytics are requested as the rest
+        # of the app doesn't need it.
+        import numpy
+
+        self.numpy = numpy
+        np = numpy
+
+        Sessions = list(History.sessions(user, text, since, until))
+        self.Timestamps = np.array([session['timestamp']
+                                    for session in Sessions], dtype=float)
+        self.Words_per_minute = np.array([session['words_per_minute']
+                                          for session in Sessions],
+                                         dtype=float)
+        self.Precision = np.array([session['precision']
+                                   for session in Sessions], dtype=float)
+
+        letters, correct, total = [], [], []
+        for _, letter, letter_correct, letter_total in \
+              History.letter_rows(user, text, since, until):
+            letters.append(ord(letter))
+            correct.append(letter_correct)
+            total.append(letter_total)
+        self.Letter_codes = np.array(letters, dtype=np.int64)
+        self.Letter_correct = np.array(correct, dtype=np.int64)
+        self.Letter_total = np.array(total, dtype=np.int64)
+
+        # Maps the content hashes of the texts to the lengths, start offsets
+        # and code points of their words read so far.
+        self.Texts = {}
+
+        Typed = [self._typed_characters(session['keystroke_log'],
+                                        session['text_hash'], Corpus)
+                 for session in Sessions]
+        Typed = [characters for characters in Typed if characters is not None]
+        if len(Typed) > 0:
+            self.Codes, self.Previous, self.Previous_2, self.Correct, \
+                self.Latency = (np.concatenate(column)
+                                for column in zip(*Typed))
+        else:
+            self.Codes = self.Previous = self.Previous_2 = \
+                np.zeros(0, dtype=np.int64)
+            self.Correct = np.zeros(0, dtype=bool)
+            self.Latency = np.zeros(0, dtype=np.int64)
+
+    # Rebuilds the characters typed in a session from its keystroke log.
+    def _typed_characters(self, log_path: str, text_hash: str,
+                           Corpus: TextCorpus) -> tuple | None:
+
+        np = self.numpy
+
+        if log_path == '' or text_hash == '' or not exists(log_path):
+            return None
+
+        with KeystrokeLog(log_path) as Log:
+            Records = np.frombuffer(Log.records(),
+                                    dtype=np.dtype([('timestamp', '<u8'),
+                                                    ('key', '<u4'),
+                                                    ('word', '<u4')])).copy()
+        if len(Records) < 1:
+            return None
+
+        times = Records['timestamp'].astype(np.int64)
+        keys = Records['key'].astype(np.int64)
+        words = Records['word'].astype(np.int64)
+
+        text = self._text_arrays(text_hash, Corpus, int(words.max()) + 1)
+        if text is None:
+            return None
+        lengths, word_starts, text_codes = text
+
+        # Finds the position in the entry after every keystroke,
+        # counted separately for every word.
+        backspace = (keys == 8) | (keys == KEYSYM_FLAG | BACKSPACE_KEYSYM)
+        character = (keys > 32) & (keys < KEYSYM_FLAG) & (keys != 127)
+        delta = character.astype(np.int64) - backspace
+        position = np.cumsum(delta)
+        starts = np.flatnonzero(np.r_[True, words[1:] != words[:-1]])
+        group = np.repeat(np.arange(len(starts)),
+                          np.diff(np.r_[starts, len(words)]))
+        position -= (position[starts] - delta[starts])[group]
+
+        # Words where backspace was pressed on an empty entry are skipped
+        # as their positions can't be counted this way.
+        broken = np.zeros(len(starts), dtype=bool)
+        broken[group[position < 0]] = True
+
+        # Keeps the characters no later keystroke of their word deleted,
+        # groups are offset so the minimum doesn't cross words.
+        offset = position + group * (len(keys) + 2)
+        later_minimum = np.minimum.accumulate(offset[::-1])[::-1]
+        kept = character & (later_minimum >= offset) & ~broken[group]
+
+        kept_words = words[kept]
+        kept_positions = position[kept] - 1
+        kept_keys = keys[kept]
+        kept_times = times[kept]
+
+        # Looks up the expected characters in the text.
+        valid = kept_words < len(lengths)
+        valid[valid] = kept_positions[valid] < lengths[kept_words[valid]]
+        kept_words = kept_words[valid]
+        kept_positions = kept_positions[valid]
+        kept_keys = kept_keys[valid]
+        kept_times = kept_times[valid]
+
+        codes = text_codes[word_starts[kept_words] + kept_positions]
+
+        # Kept characters of a word are its first ones in order,
+        # so the previous characters of the word are right before them.
+        previous = np.r_[-1, codes[:-1]]
+        previous[kept_positions < 1] = -1
+        previous_2 = np.r_[-1, -1, codes[:-2]][:len(codes)]
+        previous_2[kept_positions < 2] = -1
+        latency = np.r_[0, np.diff(kept_times)]
+        latency[kept_positions < 1] = 0
+
+        return codes, previous, previous_2, kept_keys == codes, latency
+
+    # Returns the arrays of the first words of the text with the content hash
+    # (reading more of its pack if needed, None if there is no such pack).
+    def _text_arrays(self, text_hash: str, Corpus: TextCorpus,
+                      count: int) -> tuple | None:
+
+        np = self.numpy
+
+        text = self.Texts.get(text_hash)
+        if text is not None and (len(text[0]) >= count or text[3]):
+            return text[:3]
+
+        try:
+            Pack = TextPack(join(Corpus.packs_folder,
+                                 text_hash + PACK_EXTENSION))
+        except (OSError, ValueError):
+            return None
+
+        # Reads twice as many words as needed so longer sessions
+        # of the same text rarely read the pack again.
+        with Pack:
+            if text is not None:
+                count = max(count, 2 * len(text[0]))
+            count = min(count, len(Pack))
+            text_words = [Pack[index] for index in range(count)]
+            complete = count == len(Pack)
+
+        if len(text_words) < 1:
+            return None
+
+        lengths = np.array([len(word) for word in text_words],
+                           dtype=np.int64)
+        word_starts = np.r_[0, np.cumsum(lengths)[:-1]]
+        text_codes = np.frombuffer(''.join(text_words).encode('utf-32-le'),
+                                   dtype='<u4').astype(np.int64)
+
+        self.Texts[text_hash] = (lengths, word_starts, text_codes, complete)
+        return lengths, word_starts, text_codes
+
+    # Returns the counters of every character.
+    def letter_accuracy(self) -> tuple[str, 'numpy.ndarray',
+                                       'numpy.ndarray']:
+
+        """
+        Returns tuple of (characters, correct counts, total counts) summed over the sessions,
+            counts are indexed by the position of the character in the (sorted) string of characters.
+        """
+
+        np = self.numpy
+
+        codes, inverse = np.unique(self.Letter_codes, return_inverse=True)
+        correct = np.bincount(inverse, weights=self.Letter_correct,
+                              minlength=len(codes)).astype(np.int64)
+        total = np.bincount(inverse, weights=self.Letter_total,
+                            minlength=len(codes)).astype(np.int64)
+
+        return ''.join(map(chr, codes)), correct, total
+
+    # Returns the bigram matrices.
+    def bigram_matrix(self) -> tuple[str, 'numpy.ndarray', 'numpy.ndarray',
+                                     'numpy.ndarray']:
+
+        """
+        Returns tuple of (characters, errors, totals, mean latencies in ms) of the bigrams typed,
+            matrices are indexed by the positions of the first and the second character of the bigram
+            in the (sorted) string of characters, latencies of bigrams never typed are NaN.
+        """
+
+        np = self.numpy
+
+        paired = self.Previous >= 0
+        alphabet = np.unique(np.r_[self.Codes, self.Previous[paired]])
+        size = len(alphabet)
+
+        cells = np.searchsorted(alphabet, self.Previous[paired]) * size + \
+            np.searchsorted(alphabet, self.Codes[paired])
+        totals = np.bincount(cells, minlength=size * size)
+        errors = np.bincount(cells, weights=~self.Correct[paired],
+                             minlength=size * size)
+        latency = np.bincount(cells, weights=self.Latency[paired],
+                              minlength=size * size)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_latency = np.where(totals > 0, latency / totals / 1e6,
+                                    np.nan)
+
+        return (''.join(map(chr, alphabet)),
+                errors.astype(np.int64).reshape(size, size),
+                totals.reshape(size, size), mean_latency.reshape(size, size))
+
+    # Returns the characters with the lowest accuracy.
+    def worst_letters(self, limit: int = 10,
+                       min_count: int = 5) -> list[tuple[str, float, int]]:
+
+        """
+        Returns tuples of (character, accuracy, total count) of the characters typed at least min_count times
+            with the lowest accuracy, worst first.
+        """
+
+        np = self.numpy
+
+        letters, correct, total = self.letter_accuracy()
+        counted = np.flatnonzero(total >= min_count)
+        accuracy = correct[counted] / total[counted]
+        order = counted[np.argsort(accuracy, kind='stable')[:limit]]
+
+        return [(letters[i], float(correct[i] / total[i]), int(total[i]))
+                for i in order]
+
+    # Returns the n-grams with the highest error rate.
+    def worst_ngrams(self, n: int = 2, limit: int | None = 10,
+                      min_count: int = 5
+                      ) -> list[tuple[str, float, int, float]]:
+
+        """
+        Returns tuples of (n-gram, error rate, count, mean latency in ms) of the bigrams (n = 2) or trigrams (n = 3)
+            typed at least min_count times with the highest error rate (ties by latency), worst first
+            (all of them if limit is None).
+        Raises ValueError for other n.
+        """
+
+        np = self.numpy
+
+        if n == 2:
+            included = self.Previous >= 0
+            columns = (self.Previous[included], self.Codes[included])
+        elif n == 3:
+            included = self.Previous_2 >= 0
+            columns = (self.Previous_2[included], self.Previous[included],
+                       self.Codes[included])
+        else:
+            raise ValueError('only bigrams and trigrams are supported')
+
+        # Packs every n-gram into a single integer
+        # (code points are below 0x110000).
+        ids = np.zeros(int(included.sum()), dtype=np.int64)
+        for column in columns:
+            ids = ids * 0x110000 + column
+
+        ngrams, inverse = np.unique(ids, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(ngrams))
+        errors = np.bincount(inverse, weights=~self.Correct[included],
+                             minlength=len(ngrams))
+        latency = np.bincount(inverse, weights=self.Latency[included],
+                              minlength=len(ngrams)) / \
+            np.maximum(counts, 1) / 1e6
+
+        counted = np.flatnonzero(counts >= min_count)
+        rate = errors[counted] / counts[counted]
+        order = counted[np.lexsort((-latency[counted], -rate))[:limit]]
+
+        worst = []
+        for i in order:
+            packed = int(ngrams[i])
+            letters = []
+            for _ in range(n):
+                packed, code = divmod(packed, 0x110000)
+                letters.append(chr(code))
+            worst.append((''.join(reversed(letters)),
+                          float(errors[i] / counts[i]), int(counts[i]),
+                          float(latency[i])))
+
+        return worst
+
+    # Returns the trends of WPM and precision.
+    def trend(self, period: float = 7 * 24 * 3600) -> dict:
+
+        """
+        Returns dict holding 'starts' (timestamps of the periods with sessions), 'words_per_minute'
+            and 'precision' (means of the sessions of every period), 'sessions' (their counts)
+            and 'wpm_slope' and 'precision_slope' (linear slopes of all sessions per period, 0 for fewer than 2).
+        period is in seconds (a week by default).
+        """
+
+        np = self.numpy
+
+        if len(self.Timestamps) < 1:
+            empty = np.zeros(0)
+            return {'starts': empty, 'words_per_minute': empty,
+                    'precision': empty, 'sessions': empty,
+                    'wpm_slope': 0.0, 'precision_slope': 0.0}
+
+        first = self.Timestamps[0]
+        periods = ((self.Timestamps - first) // period).astype(np.int64)
+        sessions = np.bincount(periods)
+        used = np.flatnonzero(sessions)
+
+        words_per_minute = np.bincount(periods,
+                                       weights=self.Words_per_minute)[used]
+        precision = np.bincount(periods, weights=self.Precision)[used]
+
+        wpm_slope = precision_slope = 0.0
+        elapsed = (self.Timestamps - first) / period
+        if len(self.Timestamps) > 1 and np.ptp(elapsed) > 0:
+            wpm_slope = float(np.polyfit(elapsed, self.Words_per_minute,
+                                         1)[0])
+            precision_slope = float(np.polyfit(elapsed, self.Precision,
+                                               1)[0])
+
+        return {'starts': first + used * period,
+                'words_per_minute': words_per_minute / sessions[used],
+                'precision': precision / sessions[used],
+                'sessions': sessions[used],
+                'wpm_slope': wpm_slope, 'precision_slope': precision_slope}
@@ -0,0 +1,283 @@
+import csv
+from collections.abc import Iterator
+from importlib.util import find_spec
+from os import makedirs
+from os.path import (isfile, join)
+from Src.keystrokelog import (RECORD_SIZE, KeystrokeLog, Record,
+                              decode_key)
+from Src.sessionstore import SessionStore
+
+
+# Defines the tables that can be exported and the formats they can be
+# exported to (arrow is an Arrow IPC file, arrow and parquet need pyarrow).
+EXPORT_TABLES = ('sessions', 'letters', 'keystrokes')
+EXPORT_FORMATS = ('csv', 'arrow', 'parquet')
+
+# Defines the columns of every table as (name, type) pairs,
+# the type is 'int', 'float' or 'str'.
+Table_columns = {
+    'sessions': (('id', 'int'), ('user', 'str'), ('text', 'str'),
+                 ('timestamp', 'float'), ('duration', 'int'),
+                 ('completed', 'int'), ('word_sum', 'int'),
+                 ('correct_char_sum', 'int'), ('total_char_sum', 'int'),
+                 ('precision', 'float'), ('chars_per_minute', 'float'),
+                 ('words_per_minute', 'float'), ('keystroke_log', 'str'),
+                 ('text_hash', 'str')),
+    'letters': (('session_id', 'int'), ('letter', 'str'),
+                ('correct', 'int'), ('total', 'int')),
+    'keystrokes': (('session_id', 'int'), ('time_ns', 'int'),
+                   ('char', 'str'), ('keysym', 'int'),
+                   ('word_index', 'int'))}
+
+
+# Returns the formats the tables can be exported to.
+def export_formats() -> tuple[str, ...]:
+
+    """
+    Returns the formats available (arrow and parquet only if pyarrow is installed).
+    """
+
+    if find_spec('pyarrow') is None:
+        return EXPORT_FORMATS[:1]
+    return EXPORT_FORMATS
+
+
+# Objects of this class export stored sessions.
+class HistoryExport:
+
+    """Description:
+    ----------------
+
+    Export of the sessions matching the filters from a session store (see Src.sessionstore) in three tables:
+    - sessions: the summary of every session (the row of the store);
+    - letters: the correct and total counters of every character of every session;
+    - keystrokes: every key pressed in every session read from its keystroke log
+        (time since the first keystroke, the character or the keysym if the key has none, the word being typed).
+    Rows are read and written in chunks of chunk_size rows, so memory use doesn't depend on how many rows
+        are exported.
+
+    Methods:
+    ----------------
+
+    columns(table : str) -> tuple[tuple[str, str], ...]:
+        Returns the columns of the table.
+
+    chunks(table : str) -> Iterator[list[tuple]]:
+        Returns iterator over the rows of the table in chunks.
+
+    write(table : str, path : str, export_format : str) -> int:
+        Writes the table to the file and returns the number of rows.
+
+    write_all(folder : str, export_format : str, tables : tuple[str, ...]) -> dict[str, int]:
+        Writes the tables to the folder.
+
+    Necessary modules:
+    ----------------
+
+    - pyarrow
+        (only for the arrow and parquet formats, see export_formats).
+
+    Useful Info:
+    ----------------
+
+    - raises ValueError for unknown tables and formats that aren't available;
+    - sessions whose keystroke log is missing or not a log have no keystrokes;
+    - the store has to be used by the thread creating the export only.
+    """
+
+    def __init__(self, History: SessionStore, user: str | None = None,
+                  text: str | None = None, since: float | None = None,
+                  until: float | None = None,
+                  chunk_size: int = 65536) -> None:
+
+        """
+        Inits HistoryExport object.
+
+        Args:
+
+            History(SessionStore):
+                Specifies the store the sessions are read from.
+
+        Optional Args:
+
+            user(str | None):
+                Specifies the user whose sessions are exported (None for every user).
+
+            text(str | None):
+                Specifies the text whose sessions are exported (None for every text).
+
+            since(float | None):
+                Specifies the timestamp the exported sessions start from (inclusive, None for no limit).
+
+            until(float | None):
+                Specifies the timestamp the exported sessions end at (exclusive, None for no limit).
+
+            chunk_size(int):
+                Specifies the number of rows read and written at once.
+        """
+
+        self.History = History
+        self.Filters = {'user': user, 'text': text,
+                        'since': since, 'until': until}
+        self.chunk_size = max(1, chunk_size)
+
+    # Returns the columns of the table.
+    def columns(self, table: str) -> tuple[tuple[str, str], ...]:
+
+        """
+        Returns the columns of the table as (name, type) pairs (type is 'int', 'float' or 'str').
+        """
+
+        if table not in Table_columns:
+            raise ValueError('no such table: ' + table)
+
+        return Table_columns[table]
+
+    # Returns the rows of the table in chunks.
+    def chunks(self, table: str) -> Iterator[list[tuple]]:
+
+        """
+        Returns iterator over lists of at most chunk_size rows of the table (rows are in the order of the columns).
+        """
+
+        self.columns(table)
+
+        if table == 'sessions':
+            names = [name for name, _ in Table_columns['sessions']]
+            return self._cursor_chunks(
+                self.History.sessions(**self.Filters),
+                lambda row: tuple(row[name] for name in names))
+        if table == 'letters':
+            return self._cursor_chunks(
+                self.History.letter_rows(**self.Filters), tuple)
+
+        return self._keystroke_chunks()
+
+    # Fetches the rows of the cursor in chunks.
+    def _cursor_chunks(self, Cursor, convert) -> Iterator[list[tuple]]:
+
+        while True:
+            rows = Cursor.fetchmany(self.chunk_size)
+            if len(rows) < 1:
+                break
+            yield [convert(row) for row in rows]
+
+    # Reads the keystroke logs of the sessions in chunks.
+    def _keystroke_chunks(self) -> Iterator[list[tuple]]:
+
+        # Reads the logs only after the sessions were read, so no cursor
+        # is left open while the chunks are written.
+        logs = [(row['id'], row['keystroke_log'])
+                for row in self.History.sessions(**self.Filters)
+                if row['keystroke_log'] != '']
+
+        chunk = []
+        block_size = self.chunk_size * RECORD_SIZE
+        for session_id, log_path in logs:
+            if not isfile(log_path):
+                continue
+            try:
+                Log = KeystrokeLog(log_path)
+            except ValueError:
+                continue
+
+            with Log:
+                Records = Log.records()
+                start = None
+                for offset in range(0, len(Records), block_size):
+                    # Unpacks a copy of the records, so no view of the
+                    # mapping is held while a chunk is yielded and the log
+                    # closes even if the chunks aren't all consumed.
+                    for timestamp, key, word_index in Record.iter_unpack(
+                          bytes(Records[offset:offset + block_size])):
+                        if start is None:
+                            start = timestamp
+                        char, keysym = decode_key(key)
+                        chunk.append((session_id, timestamp - start, char,
+                                      keysym, word_index))
+
+                        if len(chunk) >= self.chunk_size:
+                            yield chunk
+                            chunk = []
+
+        if len(chunk) > 0:
+            yield chunk
+
+    # Writes the table to the file.
+    def write(self, table: str, path: str,
+               export_format: str = 'csv') -> int:
+
+        """
+        Writes the table to the file at path in the format ('csv', 'arrow' or 'parquet')
+            and returns the number of rows written.
+        """
+
+        if export_format not in export_formats():
+            raise ValueError('format not available: ' + export_format)
+
+        columns = self.columns(table)
+        Chunks = self.chunks(table)
+        if export_format == 'csv':
+            return self._write_csv(columns, Chunks, path)
+        return self._write_arrow(columns, Chunks, path, export_format)
+
+    # Writes the chunks as CSV.
+    def _write_csv(self, columns: tuple, Chunks: Iterator[list[tuple]],
+                    path: str) -> int:
+
+        count = 0
+        with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+            Writer = csv.writer(csv_file)
+            Writer.writerow([name for name, _ in columns])
+            for chunk in Chunks:
+                Writer.writerows(chunk)
+                count += len(chunk)
+
+        return count
+
+    # Writes the chunks as record batches of an Arrow IPC or Parquet file.
+    def _write_arrow(self, columns: tuple, Chunks: Iterator[list[tuple]],
+                      path: str, export_format: str) -> int:
+
+        # Imported only when needed as pyarrow is optional.
+        import pyarrow
+
+        types = {'int': pyarrow.int64(), 'float': pyarrow.float64(),
+                 'str': pyarrow.string()}
+        Schema = pyarrow.schema([(name, types[kind])
+                                 for name, kind in columns])
+
+        if export_format == 'parquet':
+            import pyarrow.parquet
+            Writer = pyarrow.parquet.ParquetWriter(path, Schema)
+        else:
+            import pyarrow.ipc
+            Writer = pyarrow.ipc.new_file(path, Schema)
+
+        count = 0
+        with Writer:
+            for chunk in Chunks:
+                Writer.write_batch(pyarrow.record_batch(
+                    [pyarrow.array(values, type=column_type)
+                     for values, column_type in
+                     zip(zip(*chunk), Schema.types)], schema=Schema))
+                count += len(chunk)
+
+        return count
+
+    # Writes the tables to the folder.
+    def write_all(self, folder: str, export_format: str = 'csv',
+                   tables: tuple[str, ...] = EXPORT_TABLES
+                   ) -> dict[str, int]:
+
+        """
+        Writes every table to <table>.<format> in the folder (creating it if needed)
+            and returns dict of table: number of rows written.
+        """
+
+        makedirs(folder, exist_ok=True)
+
+        return {table: self.write(table, join(folder, table + '.' +
+                                              export_format),
+                                  export_format)
+                for table in tables}
@@ -0,0 +1,229 @@
+from collections.abc import Callable
+from cProfile import Profile
+from functools import wraps
+from json import dump
+from time import perf_counter_ns
+
+
+# Objects of this class count durations in logarithmic buckets.
+class TimingHistogram:
+
+    """Description:
+    ----------------
+
+    HDR style histogram of durations in ns.
+    Durations below 32 ns are counted exactly, longer ones in 16 buckets per power of two
+        (so every bucket is within about 6 % of the durations it holds) which keeps recording O(1)
+        and the histogram small however many durations it holds.
+
+    Methods:
+    ----------------
+
+    record(duration : int) -> None:
+        Counts the duration.
+
+    percentile(percent : float) -> int:
+        Returns the given percentile of the durations.
+
+    to_dict() -> dict:
+        Returns the histogram as a JSON serializable dict.
+    """
+
+    __slots__ = ('Counts', 'count', 'total', 'minimum', 'maximum')
+
+    def __init__(self) -> None:
+
+        self.Counts = {}
+        self.count = 0
+        self.total = 0
+        self.minimum = 0
+        self.maximum = 0
+
+    # Counts the duration in its bucket.
+    def record(self, duration: int) -> None:
+
+        """
+        Counts the duration (in ns).
+        """
+
+        shift = max(0, duration.bit_length() - 5)
+        index = shift * 16 + (duration >> shift)
+        self.Counts[index] = self.Counts.get(index, 0) + 1
+
+        if self.count == 0 or duration < self.minimum:
+            self.minimum = duration
+        if duration > self.maximum:
+            self.maximum = duration
+        self.count += 1
+        self.total += duration
+
+    # Returns a percentile of the durations.
+    def percentile(self, percent: float) -> int:
+
+        """
+        Returns the given percentile (0 to 100) of the durations in ns
+            (the lowest duration of its bucket, 0 if there are no durations).
+        """
+
+        rank = max(1, -(-self.count * percent // 100))
+        for index in sorted(self.Counts):
+            rank -= self.Counts[index]
+            if rank <= 0:
+                return _bucket_start(index)
+
+        return 0
+
+    # Returns the histogram as a dict.
+    def to_dict(self) -> dict:
+
+        """
+        Returns dict holding count, total, min, max, mean and percentiles (50, 90, 99, 99.9) of the durations in ns
+            along with the buckets as [lowest duration, count] pairs.
+        """
+
+        return {'count': self.count, 'total': self.total,
+                'min': self.minimum, 'max': self.maximum,
+                'mean': self.total / self.count if self.count > 0 else 0,
+                'percentiles': {str(percent): self.percentile(percent)
+                                for percent in (50, 90, 99, 99.9)},
+                'buckets': [[_bucket_start(index), self.Counts[index]]
+                            for index in sorted(self.Counts)]}
+
+
+# Returns the lowest duration of the bucket.
+def _bucket_start(index: int) -> int:
+
+    if index < 32:
+        return index
+
+    shift = index // 16 - 1
+    return (index - shift * 16) << shift
+
+
+# Objects of this class time functions of a session.
+class Instrumentation:
+
+    """Description:
+    ----------------
+
+    Timing histograms of functions of a single session (see TimingHistogram),
+        optionally along with a cProfile profile of the whole session.
+
+    Methods:
+    ----------------
+
+    timed(name : str, function : Callable) -> Callable:
+        Returns the function recording every call to the histogram of the given name.
+
+    call(name : str, function : Callable, *args, **kwargs) -> object:
+        Calls the function recording the call to the histogram of the given name.
+
+    start() -> None:
+        Starts profiling (if cProfile is used).
+
+    stop() -> None:
+        Stops profiling (if cProfile is used).
+
+    dump(path_stem : str) -> list[str]:
+        Writes the histograms (and the profile) and returns the paths written.
+
+    Useful Info:
+    ----------------
+
+    - nothing is timed unless functions are replaced by the ones returned by timed or called through call,
+        so code which is not instrumented doesn't pay anything.
+    """
+
+    def __init__(self, use_cprofile: bool = False) -> None:
+
+        """
+        Inits Instrumentation object, use_cprofile specifies whether the session is also profiled by cProfile.
+        """
+
+        self.Histograms = {}
+        self.Profiler = Profile() if use_cprofile else None
+
+    # Wraps the function to record its durations.
+    def timed(self, name: str, function: Callable) -> Callable:
+
+        """
+        Returns the function recording the duration of every call to the histogram of the given name.
+        """
+
+        record = self._histogram(name).record
+
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(perf_counter_ns() - start)
+
+        return timed_function
+
+    # Calls the function recording its duration.
+    def call(self, name: str, function: Callable, *args, **kwargs) -> object:
+
+        """
+        Calls the function with the given arguments recording the duration of the call to the histogram
+            of the given name and returns what the function returned.
+        """
+
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self._histogram(name).record(perf_counter_ns() - start)
+
+    # Returns the histogram of the given name (creating it if needed).
+    def _histogram(self, name: str) -> TimingHistogram:
+
+        Histogram = self.Histograms.get(name)
+        if Histogram is None:
+            Histogram = self.Histograms[name] = TimingHistogram()
+
+        return Histogram
+
+    # Starts profiling.
+    def start(self) -> None:
+
+        """
+        Starts profiling the session (does nothing if cProfile is not used).
+        """
+
+        if self.Profiler is not None:
+            self.Profiler.enable()
+
+    # Stops profiling.
+    def stop(self) -> None:
+
+        """
+        Stops profiling the session (does nothing if cProfile is not used).
+        """
+
+        if self.Profiler is not None:
+            self.Profiler.disable()
+
+    # Writes the histograms and the profile.
+    def dump(self, path_stem: str) -> list[str]:
+
+        """
+        Writes the histograms to path_stem + '.timings.json' (and the profile to path_stem + '.pstats'
+            if cProfile is used) and returns the paths written.
+        """
+
+        paths = [path_stem + '.timings.json']
+        with open(paths[0], 'w') as Timings_file:
+            dump({'unit': 'ns',
+                  'histograms': {name: Histogram.to_dict()
+                                 for name, Histogram in
+                                 self.Histograms.items()}},
+                 Timings_file, indent=1)
+
+        if self.Profiler is not None:
+            paths.append(path_stem + '.pstats')
+            self.Profiler.dump_stats(paths[1])
+
+        return paths
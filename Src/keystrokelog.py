@@ -0,0 +1,256 @@
+from mmap import (mmap, ACCESS_READ)
+from os import remove
+from struct import Struct
+
+
+# Defines the layout of the log files:
+# a header followed by fixed-width little-endian records of
+# (monotonic timestamp in ns, key, index of the word being typed).
+Log_header = b'TTKEYS\x00\x01'
+Record = Struct('<QII')
+RECORD_SIZE = Record.size
+
+# Keys that do not produce a character are stored as their keysym
+# with this flag set, other keys are stored as their code point.
+KEYSYM_FLAG = 1 << 31
+
+# Defines the keysym of the backspace key
+# (Tk reports it with the character '\x08' on some platforms).
+BACKSPACE_KEYSYM = 0xff08
+
+
+# Converts a key to the value stored in the log.
+def encode_key(char: str, keysym_num: int) -> int:
+
+    """
+    Returns the code point of char if it is a single character, otherwise the keysym number with KEYSYM_FLAG set.
+    """
+
+    if len(char) == 1:
+        return ord(char)
+    return (keysym_num & ~KEYSYM_FLAG) | KEYSYM_FLAG
+
+
+# Converts a value stored in the log back to a key.
+def decode_key(key: int) -> tuple[str, int]:
+
+    """
+    Returns tuple of (character, keysym number), character is '' for keys stored as keysyms
+        and keysym number is 0 for keys stored as characters.
+    """
+
+    if key & KEYSYM_FLAG:
+        return '', key & ~KEYSYM_FLAG
+    return chr(key), 0
+
+
+# Deletes a log.
+def remove_log(log_path: str) -> None:
+
+    """
+    Deletes the log file at log_path (does nothing if it doesn't exist or can't be deleted).
+    """
+
+    try:
+        remove(log_path)
+    except OSError:
+        pass
+
+
+# Objects of this class append keystrokes to a log file.
+class KeystrokeLogWriter:
+
+    """Description:
+    ----------------
+
+    Append-only writer of binary keystroke logs.
+    Records are packed into fixed-width records and written through a buffer, so recording is cheap enough
+        to be done on every keypress.
+
+    Methods:
+    ----------------
+
+    record(timestamp : int, key : int, word_index : int) -> None:
+        Appends a keystroke to the log.
+
+    close() -> None:
+        Flushes and closes the log file.
+
+    Useful Info:
+    ----------------
+
+    - raises ValueError if the file exists and is not a keystroke log.
+    """
+
+    def __init__(self, log_path: str, buffer_size: int = 64 * RECORD_SIZE
+                  ) -> None:
+
+        """
+        Inits KeystrokeLogWriter object opening (or creating) the log file at log_path.
+        """
+
+        self.log_path = log_path
+        self.Log_file = open(log_path, 'ab', buffering=buffer_size)
+
+        if self.Log_file.tell() == 0:
+            self.Log_file.write(Log_header)
+        else:
+            with open(log_path, 'rb') as log_file:
+                if log_file.read(len(Log_header)) != Log_header:
+                    self.Log_file.close()
+                    raise ValueError(log_path + ' is not a keystroke log')
+
+        self._pack = Record.pack
+        self._write = self.Log_file.write
+
+    # Appends a keystroke to the log.
+    def record(self, timestamp: int, key: int, word_index: int) -> None:
+
+        """
+        Appends a keystroke to the log
+            (timestamp should come from time.monotonic_ns, key from encode_key).
+        """
+
+        self._write(self._pack(timestamp, key, word_index))
+
+    # Flushes and closes the log.
+    def close(self) -> None:
+
+        """
+        Flushes and closes the log file.
+        """
+
+        if not self.Log_file.closed:
+            self.Log_file.close()
+
+    def __enter__(self) -> 'KeystrokeLogWriter':
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+
+        self.close()
+
+
+# Objects of this class read keystroke logs through mmap.
+class KeystrokeLog:
+
+    """Description:
+    ----------------
+
+    Read-only view of a binary keystroke log which maps the file into memory instead of reading it.
+    Records are unpacked only when they are accessed, slicing returns another view of the same mapping.
+
+    Methods:
+    ----------------
+
+    __len__() -> int:
+        Returns the number of records.
+
+    __getitem__(index : int | slice) -> tuple[int, int, int] | KeystrokeLog:
+        Returns the record at index as (timestamp, key, word_index) or a view of the records in slice.
+
+    __iter__() -> Iterator[tuple[int, int, int]]:
+        Iterates over records.
+
+    records() -> memoryview:
+        Returns the raw bytes of the records in the view.
+
+    close() -> None:
+        Closes the mapping (once no view or buffer uses it).
+
+    Useful Info:
+    ----------------
+
+    - raises ValueError if the file is not a keystroke log;
+    - records appended after the log was opened are not visible.
+    """
+
+    def __init__(self, log_path: str) -> None:
+
+        """
+        Inits KeystrokeLog object mapping the log file at log_path.
+        """
+
+        self.log_path = log_path
+
+        with open(log_path, 'rb') as log_file:
+            if log_file.read(len(Log_header)) != Log_header:
+                raise ValueError(log_path + ' is not a keystroke log')
+            self.Map = mmap(log_file.fileno(), 0, access=ACCESS_READ)
+
+        self.Data = memoryview(self.Map)[len(Log_header):]
+        # Ignores a partially written last record.
+        self.Data = self.Data[:len(self.Data) -
+                               len(self.Data) % RECORD_SIZE]
+
+    # Creates a view sharing the mapping of this one.
+    def _view(self, data: memoryview) -> 'KeystrokeLog':
+
+        View = object.__new__(KeystrokeLog)
+        View.log_path = self.log_path
+        View.Map = self.Map
+        View.Data = data
+
+        return View
+
+    def __len__(self) -> int:
+
+        return len(self.Data) // RECORD_SIZE
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('slice step must be 1')
+            return self._view(self.Data[start * RECORD_SIZE:
+                                        max(start, stop) * RECORD_SIZE])
+
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('record index out of range')
+
+        return Record.unpack_from(self.Data, index * RECORD_SIZE)
+
+    def __iter__(self):
+
+        return Record.iter_unpack(self.Data)
+
+    # Returns the raw records.
+    def records(self) -> memoryview:
+
+        """
+        Returns the raw bytes of the records in the view (RECORD_SIZE bytes per record).
+        """
+
+        return self.Data
+
+    # Closes the mapping.
+    def close(self) -> None:
+
+        """
+        Closes the mapping.
+        Views returned by slicing, iterators and buffers exported from records() keep it open,
+            so it's unmapped only once the last of them is released.
+        """
+
+        # Drops the mapping instead if a view or buffer still uses it,
+        # it's unmapped once the last of them is garbage collected.
+        try:
+            self.Data.release()
+            if self.Map is not None:
+                self.Map.close()
+        except BufferError:
+            self.Data = memoryview(b'')
+            self.Map = None
+
+    def __enter__(self) -> 'KeystrokeLog':
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+
+        self.close()
@@ -0,0 +1,142 @@
+from struct import Struct
+from Src.scoringengine import ScoringEngine
+
+
+# Defines the types of the messages sent from the worker process,
+# every message starts with its type.
+MESSAGE_PROGRESS = 1
+MESSAGE_RESULT = 2
+MESSAGE_SHOWN = 3
+MESSAGE_STARTED = 4
+
+# Defines the statuses of the tests.
+Statuses = ('finished', 'no_such_file', 'crashed', 'cancelled')
+
+# Defines the layout of the messages:
+# shown - type only (sent once the typing window drew its first frame);
+# started - type only (sent once the first keystroke started the test);
+# progress - type, elapsed seconds, words, correct characters,
+#   total characters, precision, CPM and WPM;
+# result - type, status, whether the text was finished, the same stats
+#   as progress, number of characters followed by that many
+#   (code point, correct, total) entries and size of the keystroke
+#   records sent in a separate message after this one (0 if none are).
+Progress = Struct('<BIIIIddd')
+Result_header = Struct('<BBBIIIIdddII')
+Letter_entry = Struct('<III')
+
+
+# Encodes the live stats of a test.
+def encode_progress(Engine: ScoringEngine) -> bytes:
+
+    """
+    Returns the progress message holding the current stats of the engine.
+    """
+
+    return Progress.pack(MESSAGE_PROGRESS, Engine.timer_current,
+                         Engine.word_sum, Engine.correct_char_sum,
+                         Engine.total_char_sum, Engine.precision,
+                         Engine.chars_per_minute, Engine.words_per_minute)
+
+
+# Encodes the notice that the typing window is displayed.
+def encode_shown() -> bytes:
+
+    """
+    Returns the message telling the typing window of the test drew its first frame.
+    """
+
+    return bytes((MESSAGE_SHOWN,))
+
+
+# Encodes the notice that the test started.
+def encode_started() -> bytes:
+
+    """
+    Returns the message telling the first keystroke of the test was accepted and started its timer.
+    """
+
+    return bytes((MESSAGE_STARTED,))
+
+
+# Encodes the result of a test.
+def encode_result(status: str, Engine: ScoringEngine | None = None,
+                   keystrokes_size: int = 0) -> bytes:
+
+    """
+    Returns the result message holding the status of the test and the final stats of the engine (if there is one).
+    keystrokes_size is the size of the keystroke records that are going to be sent right after this message.
+    """
+
+    completed = Engine is not None and Engine.finished
+    if Engine is None:
+        Engine = ScoringEngine([])
+
+    letters = Engine.Letters
+    message = bytearray(Result_header.size +
+                        len(letters) * Letter_entry.size)
+
+    Result_header.pack_into(message, 0, MESSAGE_RESULT,
+                            Statuses.index(status), completed,
+                            Engine.timer_current, Engine.word_sum,
+                            Engine.correct_char_sum, Engine.total_char_sum,
+                            Engine.precision, Engine.chars_per_minute,
+                            Engine.words_per_minute, len(letters),
+                            keystrokes_size)
+
+    offset = Result_header.size
+    for letter, stat in letters.items():
+        Letter_entry.pack_into(message, offset, ord(letter),
+                               stat.correct, stat.total)
+        offset += Letter_entry.size
+
+    return bytes(message)
+
+
+# Decodes a message.
+def decode_message(message: bytes) -> dict:
+
+    """
+    Returns dict holding the contents of a progress, shown, started or result message,
+        its 'type' is 'progress', 'shown', 'started' or 'result'.
+    Results also hold 'status', 'completed', 'letters' (dict of character: (correct, total))
+        and 'keystrokes_size'.
+    Raises ValueError if the message type is unknown.
+    """
+
+    if message[0] == MESSAGE_PROGRESS:
+        _, timer_current, word_sum, correct_char_sum, total_char_sum, \
+            precision, chars_per_minute, words_per_minute = \
+            Progress.unpack(message)
+        return {'type': 'progress', 'timer_current': timer_current,
+                'word_sum': word_sum, 'correct_char_sum': correct_char_sum,
+                'total_char_sum': total_char_sum, 'precision': precision,
+                'chars_per_minute': chars_per_minute,
+                'words_per_minute': words_per_minute}
+
+    if message[0] == MESSAGE_SHOWN:
+        return {'type': 'shown'}
+
+    if message[0] == MESSAGE_STARTED:
+        return {'type': 'started'}
+
+    if message[0] != MESSAGE_RESULT:
+        raise ValueError('unknown message type ' + str(message[0]))
+
+    _, status, completed, timer_current, word_sum, correct_char_sum, \
+        total_char_sum, precision, chars_per_minute, words_per_minute, \
+        letter_count, keystrokes_size = Result_header.unpack_from(message)
+
+    letters = {chr(letter): (correct, total)
+               for letter, correct, total in Letter_entry.iter_unpack(
+                   memoryview(message)[Result_header.size:
+                                       Result_header.size + letter_count *
+                                       Letter_entry.size])}
+
+    return {'type': 'result', 'status': Statuses[status],
+            'completed': bool(completed), 'timer_current': timer_current,
+            'word_sum': word_sum, 'correct_char_sum': correct_char_sum,
+            'total_char_sum': total_char_sum, 'precision': precision,
+            'chars_per_minute': chars_per_minute,
+            'words_per_minute': words_per_minute, 'letters': letters,
+            'keystrokes_size': keystrokes_size}
@@ -0,0 +1,324 @@
+from collections.abc import Iterable
+
+
+# Defines the resolution of the keystroke interval histograms,
+# intervals are counted in 1 ms buckets and the last bucket holds
+# every interval at least INTERVAL_LIMIT ms long (pauses).
+INTERVAL_LIMIT = 2000
+
+
+# Objects of this class count intervals between keystrokes.
+class _Histogram:
+
+    __slots__ = ('Buckets', 'count', 'Cursors')
+
+    def __init__(self) -> None:
+
+        self.Buckets = [0] * (INTERVAL_LIMIT + 1)
+        self.count = 0
+
+        # Maps the percentiles asked for to their cursors,
+        # lists of [bucket, number of intervals in the buckets below it].
+        self.Cursors = {}
+
+    # Counts an interval.
+    def add(self, interval: int) -> None:
+
+        self.Buckets[interval] += 1
+        self.count += 1
+        for Cursor in self.Cursors.values():
+            if interval < Cursor[0]:
+                Cursor[1] += 1
+
+    # Stops counting an interval.
+    def remove(self, interval: int) -> None:
+
+        self.Buckets[interval] -= 1
+        self.count -= 1
+        for Cursor in self.Cursors.values():
+            if interval < Cursor[0]:
+                Cursor[1] -= 1
+
+    # Returns a percentile of the intervals.
+    def percentile(self, percentile: float) -> int:
+
+        if self.count < 1:
+            return 0
+
+        rank = max(1, -(-self.count * percentile // 100))
+        Cursor = self.Cursors.get(percentile)
+        if Cursor is None:
+            Cursor = self.Cursors[percentile] = [0, 0]
+
+        # Moves the cursor from where the last call left it to the bucket
+        # holding the interval of the rank, which is only a few buckets
+        # away as only the intervals since then were added or removed.
+        Buckets = self.Buckets
+        bucket, below = Cursor
+        while below >= rank:
+            bucket -= 1
+            below -= Buckets[bucket]
+        while below + Buckets[bucket] < rank:
+            below += Buckets[bucket]
+            bucket += 1
+        Cursor[0] = bucket
+        Cursor[1] = below
+
+        return bucket
+
+
+# Objects of this class hold the sums of a sliding window.
+class _Window:
+
+    __slots__ = ('span', 'word_tail', 'key_tail', 'words', 'chars',
+                 'Intervals')
+
+    def __init__(self, span: int) -> None:
+
+        self.span = span * 1_000_000_000
+
+        # Absolute indexes of the oldest word and key events in the window.
+        self.word_tail = 0
+        self.key_tail = 0
+
+        self.words = 0
+        self.chars = 0
+        self.Intervals = _Histogram()
+
+
+# Objects of this class calculate live typing metrics incrementally.
+class RollingMetrics:
+
+    """Description:
+    ----------------
+
+    Incremental metrics of a running typing test calculated from timestamped word and keystroke events
+        kept in fixed-size ring buffers.
+    Every event updates the sums it affects and every refresh only drops the events that left the windows,
+        so the cost of keeping the metrics up to date doesn't grow with the length of the test.
+
+    Metrics include:
+    - elapsed time, cumulative WPM and CPM (CPM counts correct characters like ScoringEngine);
+    - WPM and CPM over sliding windows of the last few seconds;
+    - the highest WPM of the shortest window (the fastest burst);
+    - percentiles of intervals between keystrokes, over the whole test or over a window
+        (read through cursors into the histograms of the intervals which follow the keystrokes).
+
+    Methods:
+    ----------------
+
+    start(timestamp : int) -> None:
+        Starts measuring time at the given timestamp.
+
+    record_word(timestamp : int, correct_chars : int) -> None:
+        Records a submitted word.
+
+    record_key(timestamp : int) -> None:
+        Records a keystroke.
+
+    update(timestamp : int) -> None:
+        Recalculates the metrics at the given timestamp.
+
+    interval_percentile(percentile : float, window : int | None) -> int:
+        Returns the given percentile of intervals between keystrokes in ms.
+
+    Useful Info:
+    ----------------
+
+    - timestamps are perf_counter_ns (or any other monotonic clock in nanoseconds) and must not decrease;
+    - capacity must be at least as large as the number of events of the longest window,
+        older events are dropped from the windows before they are overwritten.
+    """
+
+    def __init__(self, windows: Iterable[int] = (5, 15),
+                  capacity: int = 4096) -> None:
+
+        """
+        Inits RollingMetrics object.
+
+        Optional Args:
+
+            windows(Iterable[int]):
+                Specifies the spans of the sliding windows in seconds.
+
+            capacity(int):
+                Specifies how many word and keystroke events the ring buffers hold (must be positive).
+        """
+
+        self.spans = tuple(sorted(windows))
+        self.capacity = capacity
+
+        # Defines the ring buffers (times and correct characters of words,
+        # times and interval buckets of keystrokes, -1 for the first one).
+        self.Word_times = [0] * capacity
+        self.Word_chars = [0] * capacity
+        self.Key_times = [0] * capacity
+        self.Key_intervals = [0] * capacity
+
+        self.reset()
+
+    # Clears all events and metrics.
+    def reset(self) -> None:
+
+        """
+        Clears all events and metrics.
+        """
+
+        self.timer_0 = None
+        self.word_head = 0
+        self.key_head = 0
+        self.last_key = None
+
+        self.word_sum = 0
+        self.correct_char_sum = 0
+        self.Intervals = _Histogram()
+
+        self.Windows = {span: _Window(span) for span in self.spans}
+
+        self.elapsed = 0.0
+        self.words_per_minute = 0.0
+        self.chars_per_minute = 0.0
+        self.Window_words_per_minute = dict.fromkeys(self.spans, 0.0)
+        self.Window_chars_per_minute = dict.fromkeys(self.spans, 0.0)
+        self.peak_words_per_minute = 0.0
+
+    # Starts the timer.
+    def start(self, timestamp: int) -> None:
+
+        """
+        Starts measuring time at the given timestamp.
+        """
+
+        self.timer_0 = timestamp
+
+    # Adds a word to the ring and to the windows.
+    def record_word(self, timestamp: int, correct_chars: int) -> None:
+
+        """
+        Records a word submitted at the given timestamp with the given number of correct characters.
+        """
+
+        # Drops the event about to be overwritten from the windows.
+        if self.word_head >= self.capacity:
+            self._drop_words(self.word_head - self.capacity + 1)
+
+        slot = self.word_head % self.capacity
+        self.Word_times[slot] = timestamp
+        self.Word_chars[slot] = correct_chars
+        self.word_head += 1
+
+        self.word_sum += 1
+        self.correct_char_sum += correct_chars
+        for Window in self.Windows.values():
+            Window.words += 1
+            Window.chars += correct_chars
+
+    # Adds a keystroke to the ring and to the windows.
+    def record_key(self, timestamp: int) -> None:
+
+        """
+        Records a keystroke made at the given timestamp.
+        """
+
+        if self.key_head >= self.capacity:
+            self._drop_keys(self.key_head - self.capacity + 1)
+
+        if self.last_key is None:
+            interval = -1
+        else:
+            interval = min((timestamp - self.last_key) // 1_000_000,
+                           INTERVAL_LIMIT)
+            self.Intervals.add(interval)
+            for Window in self.Windows.values():
+                Window.Intervals.add(interval)
+        self.last_key = timestamp
+
+        slot = self.key_head % self.capacity
+        self.Key_times[slot] = timestamp
+        self.Key_intervals[slot] = interval
+        self.key_head += 1
+
+    # Recalculates the metrics.
+    def update(self, timestamp: int) -> None:
+
+        """
+        Drops the events which left the windows and recalculates the metrics at the given timestamp.
+        """
+
+        if self.timer_0 is None:
+            return
+
+        self.elapsed = (timestamp - self.timer_0) / 1_000_000_000
+        if self.elapsed <= 0:
+            return
+
+        self.words_per_minute = self.word_sum / self.elapsed * 60
+        self.chars_per_minute = self.correct_char_sum / self.elapsed * 60
+
+        for span, Window in self.Windows.items():
+            self._drop_words(self.word_head, timestamp - Window.span,
+                             (Window,))
+            self._drop_keys(self.key_head, timestamp - Window.span,
+                            (Window,))
+
+            # Windows longer than the test so far only span the test.
+            seconds = min(span, self.elapsed)
+            self.Window_words_per_minute[span] = Window.words / seconds * 60
+            self.Window_chars_per_minute[span] = Window.chars / seconds * 60
+
+        # Bursts are only counted once the shortest window is full.
+        if self.elapsed >= self.spans[0]:
+            self.peak_words_per_minute = max(
+                self.peak_words_per_minute,
+                self.Window_words_per_minute[self.spans[0]])
+
+    # Returns a percentile of intervals between keystrokes.
+    def interval_percentile(self, percentile: float,
+                             window: int | None = None) -> int:
+
+        """
+        Returns the given percentile (0 to 100) of intervals between keystrokes in ms
+            (over the given window as of the last update or over the whole test if window is None).
+        Intervals of INTERVAL_LIMIT ms or longer are counted as INTERVAL_LIMIT, 0 is returned if there are none.
+        Every percentile asked for keeps a cursor into the histogram, so asking for it again only moves
+            the cursor by the intervals recorded (or dropped) since.
+        """
+
+        if window is None:
+            return self.Intervals.percentile(percentile)
+        return self.Windows[window].Intervals.percentile(percentile)
+
+    # Drops words from the windows up to the given absolute index
+    # (stopping at the first word newer than oldest).
+    def _drop_words(self, end: int, oldest: int | None = None,
+                     Windows: Iterable[_Window] | None = None) -> None:
+
+        if Windows is None:
+            Windows = self.Windows.values()
+
+        for Window in Windows:
+            while Window.word_tail < end:
+                slot = Window.word_tail % self.capacity
+                if oldest is not None and self.Word_times[slot] > oldest:
+                    break
+                Window.words -= 1
+                Window.chars -= self.Word_chars[slot]
+                Window.word_tail += 1
+
+    # Drops keystrokes from the windows up to the given absolute index
+    # (stopping at the first keystroke newer than oldest).
+    def _drop_keys(self, end: int, oldest: int | None = None,
+                    Windows: Iterable[_Window] | None = None) -> None:
+
+        if Windows is None:
+            Windows = self.Windows.values()
+
+        for Window in Windows:
+            while Window.key_tail < end:
+                slot = Window.key_tail % self.capacity
+                if oldest is not None and self.Key_times[slot] > oldest:
+                    break
+                interval = self.Key_intervals[slot]
+                if interval >= 0:
+                    Window.Intervals.remove(interval)
+                Window.key_tail += 1
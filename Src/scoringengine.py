@@ -0,0 +1,229 @@
+from collections.abc import Iterable
+
+
+# Objects of this class hold the counters of a single character.
+class LetterStat:
+
+    """Description:
+    ----------------
+
+    Counters of how many times a character was typed correctly and how many times it was typed in total.
+    """
+
+    __slots__ = ('correct', 'total')
+
+    def __init__(self, correct: int = 0, total: int = 0) -> None:
+
+        self.correct = correct
+        self.total = total
+
+    def __repr__(self) -> str:
+
+        return 'LetterStat(correct=' + str(self.correct) + \
+            ', total=' + str(self.total) + ')'
+
+
+# Objects of this class score typing tests without any GUI.
+class ScoringEngine:
+
+    """Description:
+    ----------------
+
+    Scoring engine of the typing test that does not depend on tkinter or any display.
+    It is given the words to type and scores the words submitted by the user using the rules of the typing test:
+    - every character of the expected word counts towards total characters;
+    - a character is correct if the typed word has the same character at the same position;
+    - 1 is subtracted from correct characters if the typed word is too long
+        (making sure they don't turn negative);
+    - empty submissions are ignored.
+
+    Methods:
+    ----------------
+
+    submit_word(typed : str) -> list[bool] | None:
+        Scores the typed word against the current word and moves on to the next one.
+
+    calculate_stats(elapsed : float) -> None:
+        Recalculates precision, CPM and WPM for the given number of elapsed seconds.
+
+    correct_letters() -> dict[str, int]:
+        Returns how many times every character was typed correctly.
+
+    total_letters() -> dict[str, int]:
+        Returns how many times every character was typed.
+
+    letter_precision() -> dict[str, float]:
+        Returns the precision of every character sorted by character.
+
+    Useful Info:
+    ----------------
+
+    - words are taken from the given iterable only as they are needed, so it can be a generator
+        (e.g. Src.textsource.iter_words) streaming a text of any length;
+    - score_words function scores a whole list of typed words at once which is useful for rescoring sessions in bulk.
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+
+        """
+        Inits ScoringEngine object with the words to type.
+
+        Args:
+
+            words(Iterable[str]):
+                Specifies the words which will be typed out by user (they must not be empty strings).
+
+        Returns:
+            object:
+        """
+
+        self.Words = iter(words)
+
+        # Holds the word which is to be typed next ('' if the test is finished).
+        self.current_word = next(self.Words, '')
+
+        # Maps every character to its LetterStat.
+        self.Letters = {}
+
+        self.current_word_index = 0
+        # Index of the first character of the current word in the text
+        #   (words are separated by a single space).
+        self.current_index = 0
+        self.finished = self.current_word == ''
+
+        self.timer_current = 0
+        self.precision = 0.00
+        self.correct_char_sum = 0
+        self.total_char_sum = 0
+        self.word_sum = 0
+        self.chars_per_minute = 0.00
+        self.words_per_minute = 0.00
+
+    # Scores the typed word and moves on to the next one.
+    def submit_word(self, typed: str) -> list[bool] | None:
+
+        """
+        Scores the typed word against the current word and moves on to the next one.
+        Returns the correctness of every character of the expected word
+            (None if the submission is empty or the test is already finished).
+        """
+
+        typed = typed.strip()
+
+        if typed == '' or self.finished:
+            return None
+
+        word = self.current_word
+        length_of_word = len(word)
+        length_of_typed = len(typed)
+
+        # Checks the correctness of every character in the word,
+        # characters missing from typed default to incorrect.
+        results = [expected == actual
+                    for expected, actual in zip(word, typed)]
+        if length_of_typed < length_of_word:
+            results.extend([False] * (length_of_word - length_of_typed))
+
+        letters = self.Letters
+        for letter, correct in zip(word, results):
+            stat = letters.get(letter)
+            if stat is None:
+                stat = letters[letter] = LetterStat()
+            stat.total += 1
+            if correct:
+                stat.correct += 1
+
+        self.total_char_sum += length_of_word
+        self.correct_char_sum += results.count(True)
+
+        # Subtracts 1 from the correct characters
+        # if the word typed is too long
+        #  (making sure it doesn't turn negative).
+        if length_of_typed > length_of_word and \
+              self.correct_char_sum > 0:
+            self.correct_char_sum -= 1
+
+        self.word_sum += 1
+        self.current_word_index += 1
+        self.current_index += length_of_word + 1
+
+        self.current_word = next(self.Words, '')
+        if self.current_word == '':
+            self.finished = True
+
+        return results
+
+    # Recalculates stats for the elapsed time.
+    def calculate_stats(self, elapsed: float) -> None:
+
+        """
+        Recalculates precision, CPM and WPM for the given number of elapsed seconds
+            (timer_current holds the whole seconds).
+        Stats that cannot be calculated yet (division by zero) keep their previous values.
+        """
+
+        self.timer_current = int(elapsed)
+
+        if elapsed > 0:
+            self.chars_per_minute = round(
+                (self.correct_char_sum / elapsed) * 60, 2)
+            self.words_per_minute = round(
+                (self.word_sum / elapsed) * 60, 2)
+        if self.total_char_sum > 0:
+            self.precision = round(
+                self.correct_char_sum / self.total_char_sum, 2)
+
+    # Returns correct counts by character.
+    def correct_letters(self) -> dict[str, int]:
+
+        """
+        Returns how many times every character was typed correctly.
+        """
+
+        return {letter: stat.correct
+                 for letter, stat in self.Letters.items()}
+
+    # Returns total counts by character.
+    def total_letters(self) -> dict[str, int]:
+
+        """
+        Returns how many times every character was typed.
+        """
+
+        return {letter: stat.total
+                 for letter, stat in self.Letters.items()}
+
+    # Returns precision by character.
+    def letter_precision(self) -> dict[str, float]:
+
+        """
+        Returns the relation between how many times every character was typed correctly and its total count
+            (sorted by character).
+        """
+
+        return {letter: self.Letters[letter].correct /
+                 self.Letters[letter].total
+                 for letter in sorted(self.Letters)}
+
+
+# Scores a whole session at once.
+def score_words(words: Iterable[str], typed_words: Iterable[str],
+                 elapsed: float = 0) -> ScoringEngine:
+
+    """
+    Scores the typed words against the expected words and returns the ScoringEngine holding the results.
+    Stats are calculated for the given number of elapsed seconds.
+    Typed words left after the test is finished are ignored.
+    """
+
+    Engine = ScoringEngine(words)
+    submit_word = Engine.submit_word
+
+    for typed in typed_words:
+        if Engine.finished:
+            break
+        submit_word(typed)
+
+    Engine.calculate_stats(elapsed)
+
+    return Engine
@@ -0,0 +1,312 @@
+import asyncio
+from collections.abc import Iterable
+from struct import Struct
+from time import monotonic
+from Src.keystrokelog import (BACKSPACE_KEYSYM, KEYSYM_FLAG, Record,
+                               RECORD_SIZE)
+from Src.resultchannel import (encode_progress, encode_result)
+from Src.scoringengine import ScoringEngine
+from Src.sessionstore import SessionStore
+from Src.textpack import (TextCorpus, iter_pack_words)
+
+
+# Defines the frames sent by the clients, every frame is its type
+# and the size of its payload followed by the payload:
+# start - user and name of the text separated by a null character;
+# keys - keystroke records (see Src.keystrokelog);
+# end - empty, the server answers with the result and closes the session.
+Frame_header = Struct('<BI')
+FRAME_START = 1
+FRAME_KEYS = 2
+FRAME_END = 3
+
+# Defines the frames sent by the server, every frame is the size of
+# a message of Src.resultchannel followed by the message.
+Message_header = Struct('<I')
+
+# Defines the largest payload accepted from a client.
+MAX_PAYLOAD = 1 << 20
+
+
+# Encodes a frame sent by a client.
+def encode_frame(frame_type: int, payload: bytes = b'') -> bytes:
+
+    """
+    Returns the frame of the given type (FRAME_START, FRAME_KEYS or FRAME_END) holding the payload.
+    """
+
+    return Frame_header.pack(frame_type, len(payload)) + payload
+
+
+# Encodes the frame starting a session.
+def encode_start(text_name: str, user: str) -> bytes:
+
+    """
+    Returns the frame starting a session of the user typing the text of the given name.
+    """
+
+    return encode_frame(FRAME_START,
+                        (user + '\0' + text_name).encode('utf-8'))
+
+
+# Objects of this class score streams of keystrokes.
+class KeystrokeScorer:
+
+    """Description:
+    ----------------
+
+    Rebuilds what the user typed into the entry of the typing window from keystroke records
+        and scores every submitted word with a ScoringEngine, the same way TypingWindow does:
+    - characters are appended to the entry, backspace removes the last one;
+    - space submits the entry (empty submissions are ignored by the engine);
+    - stats are calculated for the exact time between the first and the last keystroke (not rounded to seconds).
+
+    Methods:
+    ----------------
+
+    feed(records : bytes) -> None:
+        Types the keystrokes.
+
+    calculate_stats() -> None:
+        Recalculates the stats of the engine.
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+
+        """
+        Inits KeystrokeScorer object scoring the given words.
+        """
+
+        self.Engine = ScoringEngine(words)
+        self.Typed = []
+        self.first_timestamp = None
+        self.last_timestamp = 0
+
+    # Types the keystrokes into the entry.
+    def feed(self, records: bytes) -> None:
+
+        """
+        Types the keystroke records (raises ValueError if their size isn't a multiple of the record size).
+        Keystrokes after the text is finished are ignored.
+        """
+
+        if len(records) % RECORD_SIZE != 0:
+            raise ValueError('incomplete keystroke record')
+
+        Engine = self.Engine
+        Typed = self.Typed
+
+        for timestamp, key, _ in Record.iter_unpack(records):
+            if Engine.finished:
+                break
+
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+
+            if key == 32:
+                Engine.submit_word(''.join(Typed))
+                Typed.clear()
+            elif key == 8 or key == KEYSYM_FLAG | BACKSPACE_KEYSYM:
+                if len(Typed) > 0:
+                    Typed.pop()
+            elif 32 < key < KEYSYM_FLAG and key != 127:
+                Typed.append(chr(key))
+
+    # Recalculates the stats.
+    def calculate_stats(self) -> None:
+
+        """
+        Recalculates the stats of the engine for the time between the first and the last keystroke.
+        """
+
+        if self.first_timestamp is not None:
+            self.Engine.calculate_stats(
+                (self.last_timestamp - self.first_timestamp) / 1e9)
+
+
+# Objects of this class score typing sessions of many clients.
+class ScoringServer:
+
+    """Description:
+    ----------------
+
+    asyncio server scoring typing sessions streamed by clients over TCP or Unix sockets without any display.
+    Every connection is a single session, it starts with a start frame, streams keystroke records in keys frames
+        and ends with an end frame (see encode_frame).
+    The server answers with the same binary messages the typing worker sends (see Src.resultchannel),
+        progress at most once per progress_interval while keys arrive and the result once the session ends.
+
+    Methods:
+    ----------------
+
+    handle(Reader : asyncio.StreamReader, Writer : asyncio.StreamWriter) -> None:
+        Runs a session of a connection (coroutine).
+
+    serve_tcp(host : str, port : int) -> asyncio.Server:
+        Starts accepting connections over TCP (coroutine).
+
+    serve_unix(socket_path : str) -> asyncio.Server:
+        Starts accepting connections over a Unix socket (coroutine).
+
+    close() -> None:
+        Saves the pending results.
+
+    Useful Info:
+    ----------------
+
+    - sessions of unknown texts are answered with a 'no_such_file' result,
+        connections that break the protocol or drop before the end frame are closed without a result;
+    - results of sessions with at least one word typed are saved to the session store if there is one
+        (in batches, see Src.sessionstore);
+    - active_sessions and completed_sessions count the sessions.
+    """
+
+    def __init__(self, Corpus: TextCorpus, history_path: str = '',
+                  progress_interval: float = 0.1) -> None:
+
+        """
+        Inits ScoringServer object.
+
+        Args:
+
+            Corpus(TextCorpus):
+                Specifies the texts the clients can type.
+
+        Optional Args:
+
+            history_path(str):
+                Specifies the session store results are saved to (nothing is saved if it's empty).
+
+            progress_interval(float):
+                Specifies the least number of seconds between progress messages of a session.
+        """
+
+        self.Corpus = Corpus
+        self.progress_interval = progress_interval
+        self.History = SessionStore(history_path) if history_path != '' \
+            else None
+
+        self.active_sessions = 0
+        self.completed_sessions = 0
+
+    # Sends a message to the client.
+    def _send(self, Writer: asyncio.StreamWriter, message: bytes) -> None:
+
+        Writer.write(Message_header.pack(len(message)) + message)
+
+    # Runs a session.
+    async def handle(self, Reader: asyncio.StreamReader,
+                      Writer: asyncio.StreamWriter) -> None:
+
+        """
+        Runs the session of a connection until it ends (passed to asyncio.start_server).
+        """
+
+        self.active_sessions += 1
+        try:
+            await self._run_session(Reader, Writer)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.active_sessions -= 1
+            Writer.close()
+
+    # Reads the frames of a session and answers them.
+    async def _run_session(self, Reader: asyncio.StreamReader,
+                            Writer: asyncio.StreamWriter) -> None:
+
+        frame_type, payload = await self._read_frame(Reader)
+        if frame_type != FRAME_START:
+            return
+
+        user, _, text_name = payload.decode('utf-8').partition('\0')
+        try:
+            content_hash = self.Corpus.entry(text_name)['hash']
+            Scorer = KeystrokeScorer(iter_pack_words(
+                self.Corpus.pack_path(text_name)))
+        except (KeyError, FileNotFoundError):
+            self._send(Writer, encode_result('no_such_file'))
+            await Writer.drain()
+            return
+
+        last_progress = monotonic()
+        while True:
+            frame_type, payload = await self._read_frame(Reader)
+
+            if frame_type == FRAME_KEYS:
+                Scorer.feed(payload)
+                now = monotonic()
+                if now - last_progress >= self.progress_interval:
+                    last_progress = now
+                    Scorer.calculate_stats()
+                    self._send(Writer, encode_progress(Scorer.Engine))
+                    await Writer.drain()
+            elif frame_type == FRAME_END:
+                break
+            else:
+                return
+
+        Scorer.calculate_stats()
+        self._send(Writer, encode_result('finished', Scorer.Engine))
+        await Writer.drain()
+
+        self.completed_sessions += 1
+        if self.History is not None and Scorer.Engine.word_sum > 0:
+            self.History.add(Scorer.Engine, text_name, user,
+                             text_hash=content_hash)
+
+    # Reads a frame.
+    async def _read_frame(self, Reader: asyncio.StreamReader
+                           ) -> tuple[int, bytes]:
+
+        frame_type, size = Frame_header.unpack(
+            await Reader.readexactly(Frame_header.size))
+        if size > MAX_PAYLOAD:
+            raise ValueError('frame too large')
+
+        return frame_type, await Reader.readexactly(size)
+
+    # Starts accepting connections over TCP.
+    async def serve_tcp(self, host: str = '127.0.0.1',
+                         port: int = 8765) -> asyncio.Server:
+
+        """
+        Starts accepting connections on the given host and port and returns the server.
+        """
+
+        return await asyncio.start_server(self.handle, host, port)
+
+    # Starts accepting connections over a Unix socket.
+    async def serve_unix(self, socket_path: str) -> asyncio.Server:
+
+        """
+        Starts accepting connections on the Unix socket at the given path and returns the server.
+        """
+
+        return await asyncio.start_unix_server(self.handle, socket_path)
+
+    # Saves the pending results.
+    def close(self) -> None:
+
+        """
+        Writes the pending results to the session store and closes it.
+        """
+
+        if self.History is not None:
+            self.History.close()
+            self.History = None
+
+
+# Reads a message sent by the server.
+async def read_message(Reader: asyncio.StreamReader) -> bytes:
+
+    """
+    Returns the next message sent by the server (decode it with Src.resultchannel.decode_message).
+    Raises asyncio.IncompleteReadError if the connection is closed.
+    """
+
+    size, = Message_header.unpack(
+        await Reader.readexactly(Message_header.size))
+
+    return await Reader.readexactly(size)
@@ -0,0 +1,485 @@
+import sqlite3
+from os import makedirs
+from os.path import dirname
+from time import time
+from Src.scoringengine import ScoringEngine
+
+
+# Defines the schema of the store.
+Schema = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    text TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    duration INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    word_sum INTEGER NOT NULL,
+    correct_char_sum INTEGER NOT NULL,
+    total_char_sum INTEGER NOT NULL,
+    precision REAL NOT NULL,
+    chars_per_minute REAL NOT NULL,
+    words_per_minute REAL NOT NULL,
+    keystroke_log TEXT NOT NULL DEFAULT '',
+    text_hash TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS sessions_text_timestamp
+    ON sessions (text, timestamp);
+CREATE INDEX IF NOT EXISTS sessions_user_timestamp
+    ON sessions (user, timestamp);
+CREATE INDEX IF NOT EXISTS sessions_timestamp
+    ON sessions (timestamp);
+CREATE TABLE IF NOT EXISTS letter_stats (
+    session_id INTEGER NOT NULL REFERENCES sessions (id)
+        ON DELETE CASCADE,
+    letter TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (session_id, letter)
+) WITHOUT ROWID;
+'''
+
+# Defines the length of the days the counters are summed by.
+SECONDS_PER_DAY = 24 * 3600
+
+Session_columns = ('user', 'text', 'timestamp', 'duration', 'completed',
+                   'word_sum', 'correct_char_sum', 'total_char_sum',
+                   'precision', 'chars_per_minute', 'words_per_minute',
+                   'keystroke_log', 'text_hash')
+
+# Defines the columns added after the first version of the schema
+# (added to older databases when they are opened).
+Added_columns = {'text_hash': "TEXT NOT NULL DEFAULT ''"}
+
+
+# Returns the day of the timestamp.
+def day_of(timestamp: float) -> int:
+
+    """
+    Returns the number of whole days from the epoch to the timestamp (the day its sessions are summed under).
+    """
+
+    return int(timestamp // SECONDS_PER_DAY)
+
+
+# Objects of this class store the results of typing tests.
+class SessionStore:
+
+    """Description:
+    ----------------
+
+    SQLite backed store of typing test results (in WAL mode so it can be read while it's being written to).
+    Every session holds its metadata (user, text, time), summary stats and per-character counters.
+    Sessions are added in batches which are written in a single transaction.
+
+    Methods:
+    ----------------
+
+    add(Engine : ScoringEngine, text : str, user : str, timestamp : float, keystroke_log : str, text_hash : str) -> None:
+        Adds the results of a test to the batch.
+
+    flush() -> None:
+        Writes the batch to the database.
+
+    recent(limit : int, user : str | None) -> list[sqlite3.Row]:
+        Returns the most recent sessions.
+
+    personal_bests(user : str) -> list[sqlite3.Row]:
+        Returns the best session of the user for every text.
+
+    trend(user : str, text : str | None, limit : int) -> list[sqlite3.Row]:
+        Returns the stats of the last sessions of the user in chronological order.
+
+    leaderboard(text : str, limit : int) -> list[sqlite3.Row]:
+        Returns the best result of every user on the text.
+
+    best_run(user : str, text : str, text_hash : str) -> sqlite3.Row | None:
+        Returns the best completed session of the user on this version of the text which has a keystroke log.
+
+    letter_stats(session_id : int) -> dict[str, tuple[int, int]]:
+        Returns the per-character counters of a session.
+
+    texts() -> list[str]:
+        Returns the names of the texts with stored sessions.
+
+    sessions(user : str | None, text : str | None, since : float | None, until : float | None) -> sqlite3.Cursor:
+        Returns the matching sessions in chronological order.
+
+    letter_rows(user : str | None, text : str | None, since : float | None, until : float | None) -> sqlite3.Cursor:
+        Returns the per-character counters of the matching sessions.
+
+    letter_totals(user : str | None, text : str | None, since : float | None, until : float | None) -> dict[str, tuple[int, int]]:
+        Returns the per-character counters summed over the matching sessions.
+
+    last_id() -> int:
+        Returns the id of the last stored session.
+
+    daily_letter_totals(user : str | None, since : float | None, after_id : int, last_id : int | None) -> dict[int, dict[str, tuple[int, int]]]:
+        Returns the per-character counters of the matching sessions summed by day.
+
+    close() -> None:
+        Writes the batch and closes the database.
+
+    Useful Info:
+    ----------------
+
+    - rows returned by queries can be indexed by column names;
+    - text_hash is the content hash of the text the session was typed on (see Src.textpack.text_hash),
+        empty for sessions stored without one;
+    - queries flush the batch first so they always include every added session.
+    """
+
+    def __init__(self, database_path: str, batch_size: int = 64) -> None:
+
+        """
+        Inits SessionStore object opening (or creating) the database at database_path.
+
+        Optional Args:
+
+            batch_size(int):
+                Specifies how many sessions are held before they are written automatically.
+        """
+
+        self.database_path = database_path
+        self.batch_size = batch_size
+
+        if database_path != ':memory:' and dirname(database_path) != '':
+            makedirs(dirname(database_path), exist_ok=True)
+
+        self.Connection = sqlite3.connect(database_path)
+        self.Connection.row_factory = sqlite3.Row
+        self.Connection.execute('PRAGMA journal_mode=WAL')
+        self.Connection.execute('PRAGMA synchronous=NORMAL')
+        self.Connection.execute('PRAGMA foreign_keys=ON')
+        self.Connection.executescript(Schema)
+
+        # Brings databases created by older versions up to the schema.
+        columns = {row['name'] for row in
+                   self.Connection.execute('PRAGMA table_info(sessions)')}
+        with self.Connection:
+            for column, definition in Added_columns.items():
+                if column not in columns:
+                    self.Connection.execute('ALTER TABLE sessions ADD '
+                                            'COLUMN ' + column + ' ' +
+                                            definition)
+
+        # Holds tuples of (session row, letter rows) waiting to be written.
+        self.Batch = []
+
+    # Adds session to the batch.
+    def add(self, Engine: ScoringEngine, text: str, user: str,
+             timestamp: float | None = None,
+             keystroke_log: str = '', text_hash: str = '') -> None:
+
+        """
+        Adds the results held by the engine to the batch (writing the batch if it's full).
+        The timestamp defaults to the current time, text_hash is the content hash of the text typed.
+        """
+
+        if timestamp is None:
+            timestamp = time()
+
+        session = (user, text, timestamp, Engine.timer_current,
+                   int(Engine.finished), Engine.word_sum,
+                   Engine.correct_char_sum, Engine.total_char_sum,
+                   Engine.precision, Engine.chars_per_minute,
+                   Engine.words_per_minute, keystroke_log, text_hash)
+        letters = [(letter, stat.correct, stat.total)
+                   for letter, stat in Engine.Letters.items()]
+
+        self.Batch.append((session, letters))
+
+        if len(self.Batch) >= self.batch_size:
+            self.flush()
+
+    # Writes the batch.
+    def flush(self) -> None:
+
+        """
+        Writes the batch to the database in a single transaction.
+        """
+
+        if len(self.Batch) < 1:
+            return
+
+        insert_session = 'INSERT INTO sessions (' + \
+            ', '.join(Session_columns) + ') VALUES (' + \
+            ', '.join('?' * len(Session_columns)) + ')'
+
+        with self.Connection:
+            letter_rows = []
+            for session, letters in self.Batch:
+                session_id = self.Connection.execute(insert_session,
+                                                     session).lastrowid
+                letter_rows.extend((session_id, letter, correct, total)
+                                   for letter, correct, total in letters)
+            self.Connection.executemany(
+                'INSERT INTO letter_stats VALUES (?, ?, ?, ?)',
+                letter_rows)
+
+        self.Batch = []
+
+    # Returns the most recent sessions.
+    def recent(self, limit: int = 10,
+                user: str | None = None) -> list[sqlite3.Row]:
+
+        """
+        Returns the most recent sessions (of the user if one is given), newest first.
+        """
+
+        self.flush()
+
+        if user is None:
+            return self.Connection.execute(
+                'SELECT * FROM sessions ORDER BY timestamp DESC LIMIT ?',
+                (limit,)).fetchall()
+
+        return self.Connection.execute(
+            'SELECT * FROM sessions WHERE user = ? '
+            'ORDER BY timestamp DESC LIMIT ?', (user, limit)).fetchall()
+
+    # Returns the best sessions of the user.
+    def personal_bests(self, user: str) -> list[sqlite3.Row]:
+
+        """
+        Returns the session with the highest WPM of the user for every text, sorted by text.
+        """
+
+        self.flush()
+
+        return self.Connection.execute(
+            'SELECT *, MAX(words_per_minute) AS best FROM sessions '
+            'WHERE user = ? GROUP BY text ORDER BY text',
+            (user,)).fetchall()
+
+    # Returns the latest stats of the user.
+    def trend(self, user: str, text: str | None = None,
+               limit: int = 50) -> list[sqlite3.Row]:
+
+        """
+        Returns timestamp, precision, CPM and WPM of the last sessions of the user (on the text if one is given)
+            in chronological order.
+        """
+
+        self.flush()
+
+        if text is None:
+            rows = self.Connection.execute(
+                'SELECT timestamp, precision, chars_per_minute, '
+                'words_per_minute FROM sessions WHERE user = ? '
+                'ORDER BY timestamp DESC LIMIT ?', (user, limit)).fetchall()
+        else:
+            rows = self.Connection.execute(
+                'SELECT timestamp, precision, chars_per_minute, '
+                'words_per_minute FROM sessions '
+                'WHERE user = ? AND text = ? '
+                'ORDER BY timestamp DESC LIMIT ?',
+                (user, text, limit)).fetchall()
+
+        rows.reverse()
+
+        return rows
+
+    # Returns the best results on the text.
+    def leaderboard(self, text: str, limit: int = 10) -> list[sqlite3.Row]:
+
+        """
+        Returns the session with the highest WPM of every user on the text, best first.
+        """
+
+        self.flush()
+
+        return self.Connection.execute(
+            'SELECT *, MAX(words_per_minute) AS best FROM sessions '
+            'WHERE text = ? GROUP BY user ORDER BY best DESC LIMIT ?',
+            (text, limit)).fetchall()
+
+    # Returns the best session of the user with a keystroke log.
+    def best_run(self, user: str, text: str,
+                  text_hash: str) -> sqlite3.Row | None:
+
+        """
+        Returns the session with the highest WPM of the user on the text among the completed ones with a keystroke log
+            typed on the version of the text with the given content hash (None if there is none).
+        """
+
+        self.flush()
+
+        return self.Connection.execute(
+            "SELECT * FROM sessions WHERE user = ? AND text = ? "
+            "AND completed = 1 AND keystroke_log != '' AND text_hash = ? "
+            'ORDER BY words_per_minute DESC LIMIT 1',
+            (user, text, text_hash)).fetchone()
+
+    # Returns the per-character counters of a session.
+    def letter_stats(self, session_id: int) -> dict[str, tuple[int, int]]:
+
+        """
+        Returns the counters of every character of the session as tuples of (correct, total).
+        """
+
+        self.flush()
+
+        return {row[0]: (row[1], row[2])
+                for row in self.Connection.execute(
+                    'SELECT letter, correct, total FROM letter_stats '
+                    'WHERE session_id = ?', (session_id,))}
+
+    # Returns the texts with sessions.
+    def texts(self) -> list[str]:
+
+        """
+        Returns the names of the texts with stored sessions, sorted (read from the index of texts).
+        """
+
+        self.flush()
+
+        return [row[0] for row in self.Connection.execute(
+            'SELECT DISTINCT text FROM sessions ORDER BY text')]
+
+    # Builds the condition matching sessions by the filters.
+    def _filter(self, user: str | None, text: str | None,
+                 since: float | None, until: float | None
+                 ) -> tuple[str, list]:
+
+        conditions = []
+        parameters = []
+        for condition, value in (('sessions.user = ?', user),
+                                 ('sessions.text = ?', text),
+                                 ('sessions.timestamp >= ?', since),
+                                 ('sessions.timestamp < ?', until)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        if len(conditions) < 1:
+            return '', parameters
+        return ' WHERE ' + ' AND '.join(conditions), parameters
+
+    # Returns the matching sessions.
+    def sessions(self, user: str | None = None, text: str | None = None,
+                  since: float | None = None,
+                  until: float | None = None) -> sqlite3.Cursor:
+
+        """
+        Returns cursor over the sessions of the user on the text with timestamps from since (inclusive)
+            until until (exclusive) in chronological order, filters which are None match every session.
+        Rows are fetched as the cursor is iterated, so any number of sessions can be read with bounded memory.
+        """
+
+        self.flush()
+
+        condition, parameters = self._filter(user, text, since, until)
+        return self.Connection.execute(
+            'SELECT * FROM sessions' + condition +
+            ' ORDER BY timestamp, id', parameters)
+
+    # Returns the per-character counters of the matching sessions.
+    def letter_rows(self, user: str | None = None,
+                     text: str | None = None,
+                     since: float | None = None,
+                     until: float | None = None) -> sqlite3.Cursor:
+
+        """
+        Returns cursor over (session_id, letter, correct, total) rows of the sessions matching the filters
+            (see sessions) ordered by session.
+        """
+
+        self.flush()
+
+        condition, parameters = self._filter(user, text, since, until)
+        return self.Connection.execute(
+            'SELECT letter_stats.session_id, letter_stats.letter, '
+            'letter_stats.correct, letter_stats.total '
+            'FROM letter_stats JOIN sessions '
+            'ON sessions.id = letter_stats.session_id' + condition +
+            ' ORDER BY sessions.timestamp, sessions.id', parameters)
+
+    # Returns the per-character counters summed over the matching sessions.
+    def letter_totals(self, user: str | None = None,
+                       text: str | None = None,
+                       since: float | None = None,
+                       until: float | None = None
+                       ) -> dict[str, tuple[int, int]]:
+
+        """
+        Returns dict of letter: (correct, total) summed over the sessions matching the filters (see sessions).
+        """
+
+        self.flush()
+
+        condition, parameters = self._filter(user, text, since, until)
+        return {row[0]: (row[1], row[2])
+                for row in self.Connection.execute(
+                    'SELECT letter_stats.letter, SUM(letter_stats.correct), '
+                    'SUM(letter_stats.total) '
+                    'FROM letter_stats JOIN sessions '
+                    'ON sessions.id = letter_stats.session_id' + condition +
+                    ' GROUP BY letter_stats.letter', parameters)}
+
+    # Returns the id of the last session.
+    def last_id(self) -> int:
+
+        """
+        Returns the id of the last stored session (0 if there are none), sessions stored later have higher ids.
+        """
+
+        self.flush()
+
+        return self.Connection.execute(
+            'SELECT COALESCE(MAX(id), 0) FROM sessions').fetchone()[0]
+
+    # Returns the per-character counters summed by day.
+    def daily_letter_totals(self, user: str | None = None,
+                             since: float | None = None,
+                             after_id: int = 0,
+                             last_id: int | None = None
+                             ) -> dict[int, dict[str, tuple[int, int]]]:
+
+        """
+        Returns dict of day (see day_of): dict of letter: (correct, total) summed over the sessions of the user
+            (of everyone if None) from since with ids above after_id up to last_id (filters which are None match
+            every session).
+        """
+
+        self.flush()
+
+        condition, parameters = self._filter(user, None, since, None)
+        for clause, value in (('sessions.id > ?', after_id),
+                              ('sessions.id <= ?', last_id)):
+            if value is not None:
+                condition += (' AND ' if condition != '' else
+                              ' WHERE ') + clause
+                parameters.append(value)
+
+        Totals = {}
+        for row in self.Connection.execute(
+                'SELECT CAST(sessions.timestamp / ? AS INTEGER) AS day, '
+                'letter_stats.letter, SUM(letter_stats.correct), '
+                'SUM(letter_stats.total) '
+                'FROM letter_stats JOIN sessions '
+                'ON sessions.id = letter_stats.session_id' + condition +
+                ' GROUP BY day, letter_stats.letter',
+                [SECONDS_PER_DAY] + parameters):
+            Totals.setdefault(row[0], {})[row[1]] = (row[2], row[3])
+
+        return Totals
+
+    # Writes the batch and closes the database.
+    def close(self) -> None:
+
+        """
+        Writes the batch and closes the database.
+        """
+
+        self.flush()
+        self.Connection.close()
+
+    def __enter__(self) -> 'SessionStore':
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+
+        self.close()
+
@@ -0,0 +1,263 @@
+from collections import deque
+from collections.abc import Callable
+from tkinter import Misc
+from Src.resultchannel import (decode_message, encode_result)
+from Src.typingworker import TypingWorker
+
+
+# Defines the statuses of sessions which haven't ended yet.
+Active_statuses = ('queued', 'running')
+
+
+# Objects of this class run many typing tests at once.
+class SessionSupervisor:
+
+    """Description:
+    ----------------
+
+    Runs typing tests in a pool of worker processes (see TypingWorker) from the tkinter main loop,
+        at most limit of them at once while the rest wait in a queue.
+    The workers are polled with after, so nothing blocks the main loop, no thread waits for a process
+        and every callback runs on the thread running tkinter.
+
+    Methods:
+    ----------------
+
+    submit(test : dict) -> int:
+        Queues a test and returns the id of its session.
+
+    cancel(session_id : int) -> None:
+        Cancels a queued or running session.
+
+    set_limit(limit : int) -> None:
+        Changes how many sessions run at once.
+
+    active() -> int:
+        Returns the number of queued and running sessions.
+
+    prestart() -> None:
+        Spawns a worker ahead of time.
+
+    close() -> None:
+        Cancels every session and stops the workers.
+
+    Useful Info:
+    ----------------
+
+    - Sessions maps ids to dicts holding 'id', 'test', 'status' ('queued', 'running', then the status of the result:
+        'finished', 'no_such_file', 'crashed' or 'cancelled'), 'shown' (whether its typing window was drawn),
+        'started' (whether its first keystroke was accepted), 'progress' (the last progress message) and 'result';
+    - every session runs in its own process, so a crash ends only that session
+        (the worker is respawned for the next one);
+    - on_update is called with the session every time its status changes or progress arrives;
+    - workers are kept for the next sessions, up to limit of them.
+    """
+
+    def __init__(self, master: Misc,
+                  worker_factory: Callable[[], TypingWorker],
+                  limit: int = 1, poll_interval: int = 50,
+                  on_update: Callable[[dict], None] | None = None) -> None:
+
+        """
+        Inits SessionSupervisor object.
+
+        Args:
+
+            master(Misc):
+                Specifies the widget whose main loop polls the workers.
+
+            worker_factory(Callable[[], TypingWorker]):
+                Specifies the function creating a worker.
+
+        Optional Args:
+
+            limit(int):
+                Specifies the largest number of sessions running at once.
+
+            poll_interval(int):
+                Specifies the time between polls of the workers in ms (they are polled only while sessions run).
+
+            on_update(Callable[[dict], None] | None):
+                Specifies the function called with a session whenever it changes.
+        """
+
+        self.Master = master
+        self.worker_factory = worker_factory
+        self.limit = max(1, limit)
+        self.poll_interval = poll_interval
+        self.on_update = on_update
+
+        self.Sessions = {}
+        self.Queue = deque()
+        self.Running = {}
+        self.Idle_workers = []
+
+        self.next_id = 1
+        self.poll_job = None
+
+    # Queues a test.
+    def submit(self, test: dict) -> int:
+
+        """
+        Queues the test (dict of TypingWorker.submit arguments) and returns the id of its session,
+            the test starts as soon as fewer than limit sessions are running.
+        """
+
+        session_id = self.next_id
+        self.next_id += 1
+
+        self.Sessions[session_id] = {'id': session_id, 'test': test,
+                                     'status': 'queued', 'shown': False,
+                                     'started': False, 'progress': None,
+                                     'result': None}
+        self.Queue.append(session_id)
+        self._update(self.Sessions[session_id])
+        self._start_queued()
+
+        return session_id
+
+    # Cancels a session.
+    def cancel(self, session_id: int) -> None:
+
+        """
+        Cancels the session (closing its window if it's running, nothing is saved for it).
+        Does nothing if the session already ended.
+        """
+
+        Session = self.Sessions.get(session_id)
+        if Session is None or Session['status'] not in Active_statuses:
+            return
+
+        if Session['status'] == 'queued':
+            self.Queue.remove(session_id)
+            self._end(Session, decode_message(encode_result('cancelled')))
+        else:
+            Worker = self.Running.pop(session_id)
+            self._end(Session, Worker.cancel())
+            self._release(Worker)
+            self._start_queued()
+
+    # Changes the largest number of sessions running at once.
+    def set_limit(self, limit: int) -> None:
+
+        """
+        Changes the largest number of sessions running at once (running sessions aren't stopped if it's lowered).
+        """
+
+        self.limit = max(1, limit)
+
+        while len(self.Idle_workers) > 0 and \
+              len(self.Idle_workers) + len(self.Running) > self.limit:
+            self.Idle_workers.pop().close()
+        self._start_queued()
+
+    # Returns the number of sessions which haven't ended.
+    def active(self) -> int:
+
+        """
+        Returns the number of queued and running sessions.
+        """
+
+        return len(self.Queue) + len(self.Running)
+
+    # Spawns a worker ahead of time.
+    def prestart(self) -> None:
+
+        """
+        Spawns a worker ahead of time (if none is idle) so the next session starts quickly.
+        """
+
+        if len(self.Idle_workers) < 1 and len(self.Running) < self.limit:
+            Worker = self.worker_factory()
+            Worker.start()
+            self.Idle_workers.append(Worker)
+
+    # Starts the queued sessions while there are free slots.
+    def _start_queued(self) -> None:
+
+        while len(self.Queue) > 0 and len(self.Running) < self.limit:
+            Session = self.Sessions[self.Queue.popleft()]
+
+            if len(self.Idle_workers) > 0:
+                Worker = self.Idle_workers.pop()
+            else:
+                Worker = self.worker_factory()
+
+            Worker.submit(**Session['test'])
+            self.Running[Session['id']] = Worker
+            Session['status'] = 'running'
+            self._update(Session)
+
+        if len(self.Running) > 0 and self.poll_job is None:
+            self.poll_job = self.Master.after(self.poll_interval, self._poll)
+
+    # Reads the messages of the running sessions.
+    def _poll(self) -> None:
+
+        self.poll_job = None
+
+        for session_id, Worker in list(self.Running.items()):
+            Session = self.Sessions[session_id]
+            for message in Worker.poll():
+                # Skips the rest if a callback already ended the session.
+                if self.Running.get(session_id) is not Worker:
+                    break
+
+                if message['type'] == 'progress':
+                    Session['progress'] = message
+                    self._update(Session)
+                elif message['type'] in ('shown', 'started'):
+                    Session[message['type']] = True
+                    self._update(Session)
+                else:
+                    del self.Running[session_id]
+                    self._end(Session, message)
+                    self._release(Worker)
+
+        self._start_queued()
+
+    # Keeps the worker for the next sessions (or stops it).
+    def _release(self, Worker: TypingWorker) -> None:
+
+        if len(self.Idle_workers) + len(self.Running) < self.limit:
+            self.Idle_workers.append(Worker)
+        else:
+            Worker.close()
+
+    # Ends the session with its result.
+    def _end(self, Session: dict, result: dict) -> None:
+
+        Session['status'] = result['status']
+        Session['result'] = result
+        self._update(Session)
+
+    # Reports the change of the session.
+    def _update(self, Session: dict) -> None:
+
+        if self.on_update is not None:
+            self.on_update(Session)
+
+    # Cancels every session and stops the workers.
+    def close(self) -> None:
+
+        """
+        Cancels every queued and running session and stops the workers.
+        """
+
+        for session_id in list(self.Queue):
+            self.cancel(session_id)
+
+        # Workers of running sessions are stopped rather than respawned.
+        for session_id, Worker in list(self.Running.items()):
+            del self.Running[session_id]
+            Worker.close()
+            self._end(self.Sessions[session_id],
+                      decode_message(encode_result('cancelled')))
+
+        if self.poll_job is not None:
+            self.Master.after_cancel(self.poll_job)
+            self.poll_job = None
+
+        for Worker in self.Idle_workers:
+            Worker.close()
+        self.Idle_workers = []
@@ -0,0 +1,152 @@
+from collections.abc import Sequence
+
+
+# Picks the points that preserve the shape of the series.
+def lttb_indexes(times: Sequence[float], series: Sequence[Sequence[float]],
+                  count: int) -> list[int]:
+
+    """
+    Returns the indexes of count (at least 3) points (first and last included) picked by Largest-Triangle-Three-Buckets
+        from series sharing the given times.
+    Every point of a bucket is scored by the area of the triangle it forms with the point picked from the previous
+        bucket and the average of the next one, areas of the series are normalized by their ranges and summed,
+        so a peak in any of them is kept.
+    Returns all indexes if there are no more than count points.
+    """
+
+    length = len(times)
+    if count >= length:
+        return list(range(length))
+
+    scales = []
+    for values in series:
+        spread = max(values) - min(values)
+        scales.append(1 / spread if spread > 0 else 0.0)
+
+    indexes = [0]
+    bucket_size = (length - 2) / (count - 2)
+    picked = 0
+
+    for bucket in range(count - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Averages the next bucket (the last point for the last bucket).
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, length)
+        if next_start >= length - 1:
+            next_start, next_end = length - 1, length
+        next_time = sum(times[next_start:next_end]) / (next_end - next_start)
+        next_values = [sum(values[next_start:next_end]) /
+                       (next_end - next_start) for values in series]
+
+        picked_time = times[picked]
+        best_area = -1.0
+        best = start
+        for i in range(start, end):
+            area = 0.0
+            for values, scale, next_value in zip(series, scales,
+                                                 next_values):
+                area += abs((picked_time - next_time) *
+                            (values[i] - values[picked]) -
+                            (picked_time - times[i]) *
+                            (next_value - values[picked])) * scale
+            if area > best_area:
+                best_area = area
+                best = i
+
+        indexes.append(best)
+        picked = best
+
+    indexes.append(length - 1)
+
+    return indexes
+
+
+# Objects of this class hold the speed and precision of a test over time.
+class SpeedTimeline:
+
+    """Description:
+    ----------------
+
+    Samples of WPM and precision taken while the test is running, held in a buffer of fixed size.
+    Once the buffer is full it's downsampled to half of its size with Largest-Triangle-Three-Buckets
+        (which keeps the peaks and dips of the lines), so an hour long test takes the same memory
+        and time to draw as a 30 second one.
+
+    Methods:
+    ----------------
+
+    sample(elapsed : float, words_per_minute : float, precision : float) -> None:
+        Adds a sample.
+
+    points(count : int) -> tuple[list[float], list[float], list[float]]:
+        Returns times, WPM and precision of at most count samples.
+
+    reset() -> None:
+        Removes all samples.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+
+        """
+        Inits SpeedTimeline object holding at most capacity samples (must be at least 4).
+        """
+
+        self.capacity = capacity
+        self.reset()
+
+    # Returns the number of samples.
+    def __len__(self) -> int:
+
+        return len(self.Times)
+
+    # Removes all samples.
+    def reset(self) -> None:
+
+        """
+        Removes all samples.
+        """
+
+        self.Times = []
+        self.Words_per_minute = []
+        self.Precision = []
+
+    # Adds a sample, downsampling the buffer if it's full.
+    def sample(self, elapsed: float, words_per_minute: float,
+                precision: float) -> None:
+
+        """
+        Adds a sample taken after elapsed seconds (samples must be added in order of time).
+        """
+
+        if len(self.Times) >= self.capacity:
+            self._keep(lttb_indexes(self.Times, (self.Words_per_minute,
+                                                 self.Precision),
+                                    self.capacity // 2))
+
+        self.Times.append(elapsed)
+        self.Words_per_minute.append(words_per_minute)
+        self.Precision.append(precision)
+
+    # Returns downsampled samples.
+    def points(self, count: int) -> tuple[list[float], list[float],
+                                          list[float]]:
+
+        """
+        Returns times, WPM and precision of at most count samples picked to preserve the shape of the lines.
+        """
+
+        indexes = lttb_indexes(self.Times, (self.Words_per_minute,
+                                            self.Precision), count)
+
+        return ([self.Times[i] for i in indexes],
+                [self.Words_per_minute[i] for i in indexes],
+                [self.Precision[i] for i in indexes])
+
+    # Keeps only the samples at the given indexes.
+    def _keep(self, indexes: list[int]) -> None:
+
+        self.Times = [self.Times[i] for i in indexes]
+        self.Words_per_minute = [self.Words_per_minute[i] for i in indexes]
+        self.Precision = [self.Precision[i] for i in indexes]
@@ -0,0 +1,303 @@
+from importlib.util import find_spec
+from tkinter import (Canvas, Misc)
+from Src.speedtimeline import SpeedTimeline
+
+
+# Defines the look shared by the graphs.
+Graph_title = 'Precision By Character'
+Timeline_title = 'WPM And Precision Over Time'
+Bar_colors = ('blue', 'orange')
+
+# Defines how many bars the canvas graph draws when the backend is
+# chosen automatically (more are drawn by matplotlib).
+CANVAS_BAR_LIMIT = 100
+
+
+# Objects of this class draw the summary graph on a tkinter Canvas.
+class CanvasGraph:
+
+    """Description:
+    ----------------
+
+    Bar graph of precision by character drawn directly on a tkinter Canvas, which takes a few milliseconds
+        as it doesn't need matplotlib at all.
+
+    Methods:
+    ----------------
+
+    draw(values : dict[str, float]) -> None:
+        Draws the bars of the given values (replacing the previous ones).
+
+    widget() -> Canvas:
+        Returns the widget to place in the window.
+    """
+
+    # Defines the margins around the plot (left, top, right, bottom).
+    Margins = (50, 35, 20, 30)
+
+    def __init__(self, master: Misc, width: int = 1000,
+                  height: int = 400) -> None:
+
+        self.width = width
+        self.height = height
+        self.Canvas = Canvas(master, width=width, height=height,
+                             bg='white', highlightthickness=0)
+
+    # Draws the bars.
+    def draw(self, values: dict[str, float]) -> None:
+
+        """
+        Draws the bars of the given values (0 to 1) replacing the previous ones.
+        """
+
+        left, top, right, bottom = self.Margins
+        plot_width = self.width - left - right
+        plot_height = self.height - top - bottom
+        Canvas = self.Canvas
+
+        Canvas.delete('all')
+        Canvas.create_text(self.width / 2, top / 2, text=Graph_title,
+                           font=('Arial', 12))
+
+        # Draws the y axis with its ticks.
+        for tick in range(6):
+            y = top + plot_height * (1 - tick / 5)
+            Canvas.create_line(left, y, left + plot_width, y,
+                               fill='#e0e0e0')
+            Canvas.create_text(left - 5, y, text='{:.1f}'.format(tick / 5),
+                               anchor='e', font=('Arial', 9))
+        Canvas.create_line(left, top, left, top + plot_height)
+        Canvas.create_line(left, top + plot_height, left + plot_width,
+                           top + plot_height)
+
+        if len(values) < 1:
+            return
+
+        slot = plot_width / len(values)
+        for i, (letter, value) in enumerate(values.items()):
+            x = left + slot * i
+            Canvas.create_rectangle(x + slot * 0.1,
+                                    top + plot_height * (1 - value),
+                                    x + slot * 0.9, top + plot_height,
+                                    fill=Bar_colors[i % 2], width=0)
+            Canvas.create_text(x + slot / 2, top + plot_height + 5,
+                               text=letter, anchor='n', font=('Arial', 9))
+
+    # Returns the canvas.
+    def widget(self) -> Canvas:
+
+        """
+        Returns the widget to place in the window.
+        """
+
+        return self.Canvas
+
+
+# Objects of this class draw the summary graph with matplotlib.
+class MatplotlibGraph:
+
+    """Description:
+    ----------------
+
+    Bar graph of precision by character drawn by matplotlib.
+    The figure, its axes and the canvas are created once and reused, drawing only updates the heights of the bars
+        and the labels (the bars are recreated only if their count changes).
+
+    Methods:
+    ----------------
+
+    draw(values : dict[str, float]) -> None:
+        Draws the bars of the given values (replacing the previous ones).
+
+    widget() -> Widget:
+        Returns the widget to place in the window.
+
+    Necessary modules:
+    ----------------
+
+    - matplotlib.
+    """
+
+    def __init__(self, master: Misc, width: int = 1000,
+                  height: int = 400) -> None:
+
+        # Imports matplotlib only when it's needed as it takes
+        # longer to import than everything else the window uses.
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.Figure = Figure(figsize=(width / 100, height / 100), dpi=100)
+        self.Graph = self.Figure.add_subplot(111)
+        self.Graph.set_title(Graph_title)
+        self.Graph.set_ylim(0, 1)
+        self.Canvas = FigureCanvasTkAgg(self.Figure, master=master)
+        self.Bars = None
+
+    # Draws the bars.
+    def draw(self, values: dict[str, float]) -> None:
+
+        """
+        Draws the bars of the given values (0 to 1) replacing the previous ones.
+        """
+
+        heights = list(values.values())
+        positions = range(len(heights))
+
+        if self.Bars is None or len(self.Bars) != len(heights):
+            if self.Bars is not None:
+                self.Bars.remove()
+            self.Bars = self.Graph.bar(positions, heights,
+                                       color=Bar_colors)
+        else:
+            for Bar, height in zip(self.Bars, heights):
+                Bar.set_height(height)
+
+        self.Graph.set_xticks(positions, list(values.keys()))
+        self.Graph.set_xlim(-0.5, len(heights) - 0.5)
+        self.Canvas.draw_idle()
+
+    # Returns the widget of the canvas.
+    def widget(self):
+
+        """
+        Returns the widget to place in the window.
+        """
+
+        return self.Canvas.get_tk_widget()
+
+
+# Objects of this class draw WPM and precision over time on a tkinter Canvas.
+class TimelineGraph:
+
+    """Description:
+    ----------------
+
+    Line graph of WPM (left axis) and precision (right axis) over the time of the test
+        drawn directly on a tkinter Canvas.
+    The lines are downsampled to a few points per pixel column before drawing (see Src.speedtimeline),
+        so it takes the same time to draw however long the test was.
+
+    Methods:
+    ----------------
+
+    draw(Timeline : SpeedTimeline) -> None:
+        Draws the lines of the samples of the timeline (replacing the previous ones).
+
+    widget() -> Canvas:
+        Returns the widget to place in the window.
+    """
+
+    # Defines the margins around the plot (left, top, right, bottom).
+    Margins = (50, 35, 50, 30)
+
+    def __init__(self, master: Misc, width: int = 1000,
+                  height: int = 200) -> None:
+
+        self.width = width
+        self.height = height
+        self.Canvas = Canvas(master, width=width, height=height,
+                             bg='white', highlightthickness=0)
+
+    # Draws the lines.
+    def draw(self, Timeline: SpeedTimeline) -> None:
+
+        """
+        Draws the lines of the samples of the timeline replacing the previous ones
+            (nothing but the axes is drawn if it has less than 2 samples).
+        """
+
+        left, top, right, bottom = self.Margins
+        plot_width = self.width - left - right
+        plot_height = self.height - top - bottom
+        Canvas = self.Canvas
+
+        Canvas.delete('all')
+        Canvas.create_text(self.width / 2, top / 2, text=Timeline_title,
+                           font=('Arial', 12))
+        Canvas.create_line(left, top, left, top + plot_height)
+        Canvas.create_line(left + plot_width, top, left + plot_width,
+                           top + plot_height)
+        Canvas.create_line(left, top + plot_height, left + plot_width,
+                           top + plot_height)
+
+        if len(Timeline) < 2:
+            return
+
+        times, words_per_minute, precision = \
+            Timeline.points(max(3, plot_width // 2))
+
+        # Rounds the top of the WPM axis up to a multiple of 20.
+        top_speed = max(20, -(-max(words_per_minute) // 20) * 20)
+        duration = max(times[-1] - times[0], 1e-9)
+
+        for tick in range(5):
+            y = top + plot_height * (1 - tick / 4)
+            Canvas.create_line(left, y, left + plot_width, y,
+                               fill='#e0e0e0')
+            Canvas.create_text(left - 5, y,
+                               text=str(round(top_speed * tick / 4)),
+                               anchor='e', font=('Arial', 9),
+                               fill=Bar_colors[0])
+            Canvas.create_text(left + plot_width + 5, y,
+                               text=str(25 * tick) + ' %',
+                               anchor='w', font=('Arial', 9),
+                               fill=Bar_colors[1])
+        for tick in range(5):
+            x = left + plot_width * tick / 4
+            seconds = round(times[0] + duration * tick / 4)
+            Canvas.create_text(x, top + plot_height + 5,
+                               text=str(seconds // 60) + ':' +
+                               '{:02d}'.format(seconds % 60),
+                               anchor='n', font=('Arial', 9))
+
+        for values, scale, color in ((words_per_minute, top_speed,
+                                      Bar_colors[0]),
+                                     (precision, 1, Bar_colors[1])):
+            coordinates = []
+            for time, value in zip(times, values):
+                coordinates.append(left + plot_width *
+                                   (time - times[0]) / duration)
+                coordinates.append(top + plot_height *
+                                   (1 - min(value / scale, 1)))
+            Canvas.create_line(*coordinates, fill=color, width=2)
+
+    # Returns the canvas.
+    def widget(self) -> Canvas:
+
+        """
+        Returns the widget to place in the window.
+        """
+
+        return self.Canvas
+
+
+# Tells which graph should draw the values.
+def choose_backend(values: dict[str, float], backend: str = 'auto') -> str:
+
+    """
+    Returns 'canvas' or 'matplotlib'.
+    backend 'auto' chooses canvas for up to CANVAS_BAR_LIMIT bars (or if matplotlib is not installed),
+        other values are returned as they are.
+    """
+
+    if backend != 'auto':
+        return backend
+
+    if len(values) <= CANVAS_BAR_LIMIT or find_spec('matplotlib') is None:
+        return 'canvas'
+    return 'matplotlib'
+
+
+# Creates the graph for the backend.
+def create_graph(master: Misc, backend: str) -> CanvasGraph | MatplotlibGraph:
+
+    """
+    Returns new graph of the given backend ('canvas' or 'matplotlib'), raises ValueError for other backends.
+    """
+
+    if backend == 'canvas':
+        return CanvasGraph(master)
+    if backend == 'matplotlib':
+        return MatplotlibGraph(master)
+
+    raise ValueError('unknown graph backend ' + backend)
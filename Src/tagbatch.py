@@ -0,0 +1,140 @@
+from tkinter import Text
+
+
+# Objects of this class collect tag changes of a Text widget.
+class TagBatch:
+
+    """Description:
+    ----------------
+
+    Collects tag changes of a tkinter Text widget and applies all of them in a single Tcl evaluation.
+    Characters of the same tag next to each other on a line are merged into a single range,
+        so coloring a word takes one range per run of correct or incorrect characters instead of a call per character.
+
+    Methods:
+    ----------------
+
+    add(tag : str, line : int, start : int, end : int) -> None:
+        Adds the tag to the characters of line from start to end (exclusive).
+
+    remove(tag : str, line : int, start : int, end : int) -> None:
+        Removes the tag from the characters of line from start to end (exclusive).
+
+    flush() -> None:
+        Applies the collected changes.
+
+    cancel() -> None:
+        Discards the collected changes.
+
+    Useful Info:
+    ----------------
+
+    - changes are applied automatically once Tk is idle (so every change made while handling the events of a frame
+        is applied together), flush must be called before text is inserted or deleted
+        as the collected changes refer to lines and columns;
+    - changes of different tags don't affect each other, so only the order of the changes of the same tag is kept;
+    - tcl_calls counts the Tcl evaluations made by flush.
+    """
+
+    def __init__(self, Text_widget: Text) -> None:
+
+        """
+        Inits TagBatch object collecting tag changes of the given Text widget.
+        """
+
+        self.Text_widget = Text_widget
+        self.path = str(Text_widget)
+
+        # Maps every tag to its list of changes,
+        # every change is [operation, line, ranges]
+        # and every range is [start, end].
+        self.Changes = {}
+        self.flush_job = None
+        self.tcl_calls = 0
+
+    # Adds change to the batch.
+    def _change(self, operation: str, tag: str, line: int, start: int,
+                 end: int) -> None:
+
+        changes = self.Changes.get(tag)
+        if changes is None:
+            changes = self.Changes[tag] = []
+
+        # Extends the last range if the change is of the same kind
+        # and continues it, otherwise starts a new one.
+        if len(changes) > 0 and changes[-1][0] == operation and \
+              changes[-1][1] == line:
+            last_range = changes[-1][2][-1]
+            if last_range[1] == start:
+                last_range[1] = end
+            else:
+                changes[-1][2].append([start, end])
+        else:
+            changes.append([operation, line, [[start, end]]])
+
+        if self.flush_job is None:
+            self.flush_job = self.Text_widget.after_idle(self._idle_flush)
+
+    # Adds the tag to characters.
+    def add(self, tag: str, line: int, start: int, end: int) -> None:
+
+        """
+        Adds the tag to the characters of line from start to end (exclusive).
+        """
+
+        self._change('add', tag, line, start, end)
+
+    # Removes the tag from characters.
+    def remove(self, tag: str, line: int, start: int, end: int) -> None:
+
+        """
+        Removes the tag from the characters of line from start to end (exclusive).
+        """
+
+        self._change('remove', tag, line, start, end)
+
+    # Applies the changes once Tk is idle.
+    def _idle_flush(self) -> None:
+
+        self.flush_job = None
+        self.flush()
+
+    # Applies the changes.
+    def flush(self) -> None:
+
+        """
+        Applies the collected changes in a single Tcl evaluation.
+        """
+
+        if self.flush_job is not None:
+            self.Text_widget.after_cancel(self.flush_job)
+            self.flush_job = None
+
+        if len(self.Changes) < 1:
+            return
+
+        commands = []
+        for tag, changes in self.Changes.items():
+            for operation, line, ranges in changes:
+                line_prefix = ' ' + str(line) + '.'
+                commands.append(self.path + ' tag ' + operation + ' ' +
+                                tag + ''.join(line_prefix + str(start) +
+                                              line_prefix + str(end)
+                                              for start, end in ranges))
+        self.Changes = {}
+
+        self.Text_widget.tk.eval('\n'.join(commands))
+        self.tcl_calls += 1
+
+    # Discards the changes.
+    def cancel(self) -> None:
+
+        """
+        Discards the collected changes.
+        """
+
+        if self.flush_job is not None:
+            self.Text_widget.after_cancel(self.flush_job)
+            self.flush_job = None
+
+        self.Changes = {}
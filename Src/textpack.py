@@ -0,0 +1,403 @@
+import json
+from array import array
+from collections import Counter
+from hashlib import sha256
+from locale import getpreferredencoding
+from mmap import (mmap, ACCESS_READ)
+from os import (listdir, makedirs, remove, replace, stat)
+from os.path import (exists, join)
+from struct import Struct
+from sys import byteorder
+
+
+# Defines the layout of the pack files:
+# a header, (code point, count) pairs of the character histogram,
+# word_count + 1 little-endian offsets of the words into the blob and
+# the blob (UTF-8 encoded words, each followed by a single space).
+Pack_header = b'TTPACK\x00\x01'
+Header = Struct('<32sIII')
+Histogram_entry = Struct('<II')
+
+PACK_EXTENSION = '.pack'
+TEXT_EXTENSION = '.txt'
+
+
+# Compiles a text into a pack.
+def compile_text(text_path: str, pack_path: str) -> dict:
+
+    """
+    Tokenizes the text at text_path and writes it as a pack to pack_path.
+    Returns dict with the content hash (hex), word count and character histogram of the text.
+    Raises FileNotFoundError if the text couldn't be opened.
+    """
+
+    try:
+        with open(text_path, 'rb') as text_file:
+            content = text_file.read()
+    except OSError:
+        raise FileNotFoundError
+
+    # Decodes the text the same way open does by default.
+    words = content.decode(getpreferredencoding(False)).split()
+
+    return write_pack(words, pack_path, sha256(content).digest())
+
+
+# Writes words as a pack.
+def write_pack(words: list[str], pack_path: str,
+                digest: bytes | None = None) -> dict:
+
+    """
+    Writes the words as a pack to pack_path (digest is the hash stored in the pack, the hash of the words by default).
+    Returns dict with the content hash (hex), word count and character histogram of the words.
+    """
+
+    histogram = Counter(''.join(words))
+
+    blob = ''.join([word + ' ' for word in words]).encode()
+    if digest is None:
+        digest = sha256(blob).digest()
+    offsets = array('I', [0])
+    offset = 0
+    for word in words:
+        offset += len(word.encode()) + 1
+        offsets.append(offset)
+    if byteorder != 'little':
+        offsets.byteswap()
+
+    with open(pack_path + '.tmp', 'wb') as pack_file:
+        pack_file.write(Pack_header)
+        pack_file.write(Header.pack(digest, len(words), len(histogram),
+                                    len(blob)))
+        for letter, count in sorted(histogram.items()):
+            pack_file.write(Histogram_entry.pack(ord(letter), count))
+        pack_file.write(offsets.tobytes())
+        pack_file.write(blob)
+    replace(pack_path + '.tmp', pack_path)
+
+    return {'hash': digest.hex(), 'word_count': len(words),
+            'histogram': dict(histogram)}
+
+
+# Objects of this class read packs through mmap.
+class TextPack:
+
+    """Description:
+    ----------------
+
+    Read-only view of a compiled text which maps the pack into memory instead of reading it.
+    Words are decoded only when they are accessed.
+
+    Methods:
+    ----------------
+
+    __len__() -> int:
+        Returns the number of words.
+
+    __getitem__(index : int) -> str:
+        Returns the word at index.
+
+    __iter__() -> Iterator[str]:
+        Iterates over words.
+
+    histogram() -> dict[str, int]:
+        Returns how many times every character appears in the text.
+
+    close() -> None:
+        Closes the mapping.
+
+    Useful Info:
+    ----------------
+
+    - raises FileNotFoundError if the pack couldn't be opened and ValueError if the file is not a pack.
+    """
+
+    def __init__(self, pack_path: str) -> None:
+
+        """
+        Inits TextPack object mapping the pack at pack_path.
+        """
+
+        self.pack_path = pack_path
+
+        try:
+            with open(pack_path, 'rb') as pack_file:
+                if pack_file.read(len(Pack_header)) != Pack_header:
+                    raise ValueError(pack_path + ' is not a text pack')
+                self.Map = mmap(pack_file.fileno(), 0, access=ACCESS_READ)
+        except OSError:
+            raise FileNotFoundError
+
+        digest, self.word_count, histogram_count, blob_size = \
+            Header.unpack_from(self.Map, len(Pack_header))
+        self.hash = digest.hex()
+
+        self.histogram_start = len(Pack_header) + Header.size
+        offsets_start = self.histogram_start + \
+            histogram_count * Histogram_entry.size
+        blob_start = offsets_start + (self.word_count + 1) * 4
+
+        self.histogram_count = histogram_count
+        self.Offsets = memoryview(self.Map)[offsets_start:
+                                            blob_start].cast('I')
+        if byteorder != 'little':
+            self.Offsets = array('I', self.Offsets)
+            self.Offsets.byteswap()
+        self.Blob = memoryview(self.Map)[blob_start:
+                                         blob_start + blob_size]
+
+    def __len__(self) -> int:
+
+        return self.word_count
+
+    def __getitem__(self, index: int) -> str:
+
+        if index < 0:
+            index += self.word_count
+        if not 0 <= index < self.word_count:
+            raise IndexError('word index out of range')
+
+        return str(self.Blob[self.Offsets[index]:
+                             self.Offsets[index + 1] - 1], 'utf-8')
+
+    def __iter__(self):
+
+        Blob = self.Blob
+        Offsets = self.Offsets
+        for index in range(self.word_count):
+            yield str(Blob[Offsets[index]:Offsets[index + 1] - 1], 'utf-8')
+
+    # Returns the character histogram.
+    def histogram(self) -> dict[str, int]:
+
+        """
+        Returns how many times every character appears in the text.
+        """
+
+        return {chr(letter): count
+                for letter, count in Histogram_entry.iter_unpack(
+                    self.Map[self.histogram_start:self.histogram_start +
+                             self.histogram_count *
+                             Histogram_entry.size])}
+
+    # Closes the mapping.
+    def close(self) -> None:
+
+        """
+        Closes the mapping.
+        """
+
+        if isinstance(self.Offsets, memoryview):
+            self.Offsets.release()
+        self.Blob.release()
+        self.Map.close()
+
+    def __enter__(self) -> 'TextPack':
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+
+        self.close()
+
+
+# Yields the words of a pack.
+def iter_pack_words(pack_path: str):
+
+    """
+    Yields the words of the pack at pack_path, closing the pack once all of them were yielded.
+    Raises FileNotFoundError once the first word is requested if the pack couldn't be opened.
+    """
+
+    with TextPack(pack_path) as Pack:
+        yield from Pack
+
+
+# Returns the content hash of a text.
+def text_hash(text_path: str) -> str:
+
+    """
+    Returns the content hash (hex) of the text or pack at text_path (the hash held by its manifest entry),
+        a pack's is read from its header.
+    Raises FileNotFoundError if the file couldn't be opened and ValueError if a .pack file is not a pack.
+    """
+
+    if text_path.endswith(PACK_EXTENSION):
+        with TextPack(text_path) as Pack:
+            return Pack.hash
+
+    try:
+        with open(text_path, 'rb') as text_file:
+            return sha256(text_file.read()).hexdigest()
+    except OSError:
+        raise FileNotFoundError
+
+
+# Objects of this class keep the texts compiled.
+class TextCorpus:
+
+    """Description:
+    ----------------
+
+    Manifest of the texts in a folder and of the packs they are compiled to.
+    Every entry holds the modification time, size, content hash, word count and pack of the text,
+        so the list of texts is available without touching the texts themselves.
+
+    Methods:
+    ----------------
+
+    names() -> list[str]:
+        Returns the sorted names of the texts.
+
+    refresh() -> bool:
+        Recompiles the texts which changed since the last refresh.
+
+    pack_path(name : str) -> str:
+        Returns the path to the pack of the text.
+
+    entry(name : str) -> dict:
+        Returns the manifest entry of the text.
+
+    Useful Info:
+    ----------------
+
+    - names of the texts are the file names without the .txt extension;
+    - packs are named by the content hash of the text, so identical texts share a pack.
+    """
+
+    def __init__(self, texts_folder: str, packs_folder: str) -> None:
+
+        """
+        Inits TextCorpus object loading the manifest from packs_folder (if there is one).
+        """
+
+        self.texts_folder = texts_folder
+        self.packs_folder = packs_folder
+        self.manifest_path = join(packs_folder, 'manifest.json')
+
+        try:
+            with open(self.manifest_path, 'r') as manifest_file:
+                self.Manifest = json.load(manifest_file)['texts']
+        except (OSError, ValueError, KeyError):
+            self.Manifest = {}
+
+    # Returns the names of the texts.
+    def names(self) -> list[str]:
+
+        """
+        Returns the sorted names of the texts in the manifest.
+        """
+
+        return list(self.Manifest.keys())
+
+    # Returns the path to the pack of the text.
+    def pack_path(self, name: str) -> str:
+
+        """
+        Returns the path to the pack of the text (raises KeyError if there is no such text).
+        """
+
+        return join(self.packs_folder,
+                    self.Manifest[name]['hash'] + PACK_EXTENSION)
+
+    # Returns the manifest entry of the text.
+    def entry(self, name: str) -> dict:
+
+        """
+        Returns the manifest entry of the text (raises KeyError if there is no such text).
+        """
+
+        return self.Manifest[name]
+
+    # Updates the manifest to match the texts folder.
+    def refresh(self) -> bool:
+
+        """
+        Compiles texts which were added or changed (by modification time and size, then by content hash)
+            and drops the ones that were removed.
+        Returns whether the list of texts or the content of any of them changed
+            (a text which was only touched keeps its entry, only its modification time is updated).
+        """
+
+        makedirs(self.packs_folder, exist_ok=True)
+
+        Manifest = {}
+        changed = False
+        touched = False
+
+        for file in listdir(self.texts_folder):
+            if not file.endswith(TEXT_EXTENSION):
+                continue
+
+            name = file[:-len(TEXT_EXTENSION)]
+            text_path = join(self.texts_folder, file)
+            try:
+                text_stat = stat(text_path)
+            except OSError:
+                continue
+
+            entry = self.Manifest.get(name)
+            if entry is not None and \
+                  entry['mtime_ns'] == text_stat.st_mtime_ns and \
+                  entry['size'] == text_stat.st_size and \
+                  exists(join(self.packs_folder,
+                              entry['hash'] + PACK_EXTENSION)):
+                Manifest[name] = entry
+                continue
+
+            with open(text_path, 'rb') as text_file:
+                content_hash = sha256(text_file.read()).hexdigest()
+            pack_path = join(self.packs_folder,
+                             content_hash + PACK_EXTENSION)
+
+            if entry is not None and entry['hash'] == content_hash and \
+                  exists(pack_path):
+                word_count = entry['word_count']
+            elif exists(pack_path):
+                with TextPack(pack_path) as Pack:
+                    word_count = len(Pack)
+            else:
+                word_count = compile_text(text_path,
+                                          pack_path)['word_count']
+
+            Manifest[name] = {'file': file,
+                              'mtime_ns': text_stat.st_mtime_ns,
+                              'size': text_stat.st_size,
+                              'hash': content_hash,
+                              'word_count': word_count}
+            touched = True
+            changed = changed or entry is None or \
+                entry['hash'] != content_hash
+
+        changed = changed or Manifest.keys() != self.Manifest.keys()
+        self.Manifest = dict(sorted(Manifest.items()))
+
+        # Saves the modification times of touched texts too,
+        # so they aren't hashed again by the next refresh.
+        if changed or touched or not exists(self.manifest_path):
+            self._save()
+        if changed:
+            self._remove_unused_packs()
+
+        return changed
+
+    # Writes the manifest.
+    def _save(self) -> None:
+
+        with open(self.manifest_path + '.tmp', 'w') as manifest_file:
+            json.dump({'version': 1, 'texts': self.Manifest},
+                      manifest_file)
+        replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    # Removes packs no text refers to.
+    def _remove_unused_packs(self) -> None:
+
+        used = {entry['hash'] + PACK_EXTENSION
+                for entry in self.Manifest.values()}
+
+        for file in listdir(self.packs_folder):
+            if file.endswith(PACK_EXTENSION) and file not in used:
+                try:
+                    remove(join(self.packs_folder, file))
+                except OSError:
+                    pass
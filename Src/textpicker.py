@@ -0,0 +1,347 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Sequence
+from operator import itemgetter
+from tkinter import (END, VERTICAL, Listbox, Misc, StringVar)
+from tkinter import ttk
+
+
+# Objects of this class search the names of the texts.
+class TextIndex:
+
+    """Description:
+    ----------------
+
+    Index of the names of the texts sorted case-insensitively.
+    Names starting with the query are found by bisection, names containing it by scanning only the names
+        which contain its rarest character (or the matches of the previous query if the query extends it,
+        as it does while the user types, every name if that character wasn't searched for yet).
+
+    Methods:
+    ----------------
+
+    position(name : str) -> int | None:
+        Returns the position of the name.
+
+    search(query : str) -> Sequence[int]:
+        Returns the positions of the names containing the query.
+
+    Useful Info:
+    ----------------
+
+    - Names holds the sorted names, positions index it;
+    - postings (the names containing a character) are built the first time the character alone is searched for.
+    """
+
+    def __init__(self, names: list[str]) -> None:
+
+        """
+        Inits TextIndex object of the given names.
+        """
+
+        self.Names = sorted(names, key=str.casefold)
+        self.Folded = [name.casefold() for name in self.Names]
+        self.Positions = {name: i for i, name in enumerate(self.Names)}
+
+        self.Letter_counts = Counter(''.join(self.Folded))
+        self.Postings = {}
+        self.last_query = ''
+        self.Last_matches = []
+
+    def __len__(self) -> int:
+
+        return len(self.Names)
+
+    # Returns the position of the name.
+    def position(self, name: str) -> int | None:
+
+        """
+        Returns the position of the name in Names (None if there is no such name).
+        """
+
+        return self.Positions.get(name)
+
+    # Returns the positions of the names containing the character.
+    def _posting(self, letter: str) -> array:
+
+        Posting = self.Postings.get(letter)
+        if Posting is None:
+            Posting = self.Postings[letter] = array(
+                'I', [i for i, name in enumerate(self.Folded)
+                      if letter in name])
+
+        return Posting
+
+    # Returns the positions of the matching names.
+    def search(self, query: str) -> Sequence[int]:
+
+        """
+        Returns the positions of the names containing the query (case-insensitive),
+            the ones starting with it first, then the rest in order.
+        """
+
+        query = query.casefold()
+        if query == '':
+            return range(len(self.Names))
+
+        # Only the matches of the query it extends (or the names containing
+        # the rarest character of the query, none if no name contains it)
+        # can match. Building a posting takes as long as scanning every
+        # name, so a longer query without one scans the names instead.
+        Folded = self.Folded
+        Candidates = None
+        if self.last_query != '' and query.startswith(self.last_query):
+            Candidates = self.Last_matches
+        else:
+            rarest = min(query, key=self.Letter_counts.__getitem__)
+            if self.Letter_counts[rarest] < 1:
+                Candidates = []
+            elif len(query) == 1 or rarest in self.Postings:
+                Candidates = self._posting(rarest)
+
+        if Candidates is None:
+            matches = [i for i, name in enumerate(Folded) if query in name]
+        elif len(query) == 1:
+            matches = list(Candidates)
+        elif len(Candidates) > 0:
+            matches = [i for i, name in
+                       zip(Candidates, itemgetter(*Candidates)(Folded))
+                       if query in name] if len(Candidates) > 1 else \
+                [i for i in Candidates if query in Folded[i]]
+        else:
+            matches = []
+        self.last_query = query
+        self.Last_matches = matches
+
+        # Names starting with the query are a single block
+        # of the sorted names and so of the matches.
+        start = bisect_left(Folded, query)
+        end = bisect_left(Folded, query + '\U0010ffff', start)
+        low = bisect_left(matches, start)
+        high = bisect_left(matches, end, low)
+
+        return matches[low:high] + matches[:low] + matches[high:]
+
+
+# Objects of this class let the user search and choose a text.
+class TextPicker:
+
+    """Description:
+    ----------------
+
+    Search box over a list of the names of the texts, the chosen name is set to the given variable.
+    The list is virtual, the listbox only ever holds the visible rows, so any number of texts is shown at once
+        and moving the selection or scrolling takes the same time however many there are.
+
+    Methods:
+    ----------------
+
+    set_names(names : list[str]) -> None:
+        Replaces the names listed.
+
+    move(step : int) -> None:
+        Moves the selection by step rows.
+
+    has(name : str) -> bool:
+        Returns whether the name is listed.
+
+    widget() -> ttk.Frame:
+        Returns the widget to place in the window.
+
+    Useful Info:
+    ----------------
+
+    - typing into the search box filters the names, the first match is chosen (none if nothing matches);
+    - keyboard shortcuts of the window don't fire while typing into the search box,
+        up and down (page up and page down) move the selection and escape returns the focus to the window
+        (other keys, like enter, have to be bound to Entry to work while typing).
+    """
+
+    # Defines the placeholder shown if there are no names.
+    placeholder = 'No text in folder'
+
+    def __init__(self, master: Misc, Variable: StringVar, names: list[str],
+                  rows: int = 4, width: int = 40) -> None:
+
+        """
+        Inits TextPicker object.
+
+        Args:
+
+            Variable(StringVar):
+                Specifies the variable the chosen name is set to.
+
+            names(list[str]):
+                Specifies the names listed.
+
+        Optional Args:
+
+            rows(int):
+                Specifies the number of visible rows.
+
+            width(int):
+                Specifies the width of the list in characters.
+        """
+
+        self.Variable = Variable
+        self.rows = rows
+
+        self.Frame = ttk.Frame(master)
+        self.Query = StringVar(self.Frame)
+        self.Entry = ttk.Entry(self.Frame, textvariable=self.Query,
+                               width=width)
+        self.List = Listbox(self.Frame, height=rows, width=width,
+                            activestyle='none', exportselection=False)
+        self.Scrollbar = ttk.Scrollbar(self.Frame, orient=VERTICAL,
+                                       command=self._scroll)
+
+        self.Entry.grid(row=0, column=0, columnspan=2, sticky='we')
+        self.List.grid(row=1, column=0, sticky='we')
+        self.Scrollbar.grid(row=1, column=1, sticky='ns')
+
+        # Keeps the shortcuts of the window from firing while typing.
+        self.Entry.bindtags((str(self.Entry), 'TEntry', 'all'))
+        for sequence, step in (('<Up>', -1), ('<Down>', 1),
+                               ('<Prior>', -rows), ('<Next>', rows)):
+            self.Entry.bind(sequence, lambda event, step=step:
+                            self.move(step))
+        self.Entry.bind('<Escape>', lambda event: self.Frame.winfo_toplevel(
+            ).focus())
+
+        # Moves the selection once (not by both the listbox and the window).
+        for sequence, step in (('<Up>', -1), ('<Down>', 1),
+                               ('<Prior>', -rows), ('<Next>', rows)):
+            self.List.bind(sequence, lambda event, step=step:
+                           self.move(step) or 'break')
+        self.List.bind('<<ListboxSelect>>', self._click)
+        self.List.bind('<MouseWheel>', lambda event: self._scroll(
+            'scroll', -1 if event.delta > 0 else 1, 'units'))
+        self.List.bind('<Button-4>', lambda event: self._scroll(
+            'scroll', -1, 'units'))
+        self.List.bind('<Button-5>', lambda event: self._scroll(
+            'scroll', 1, 'units'))
+
+        self.Query.trace_add('write', lambda *args: self._search())
+
+        # Holds the positions of the matching names (in Index.Names),
+        # the first visible and the selected one (in Matches).
+        self.Matches = range(0)
+        self.first = 0
+        self.selected = -1
+
+        self.set_names(names)
+
+    # Returns the widget.
+    def widget(self) -> ttk.Frame:
+
+        """
+        Returns the widget to place in the window.
+        """
+
+        return self.Frame
+
+    # Replaces the names.
+    def set_names(self, names: list[str]) -> None:
+
+        """
+        Replaces the names listed keeping the chosen one if it's still there (choosing the first one otherwise).
+        """
+
+        self.Index = TextIndex(names)
+        self._search()
+
+    # Checks whether the name is listed.
+    def has(self, name: str) -> bool:
+
+        """
+        Returns whether the name is listed (whether or not it matches the search).
+        """
+
+        return self.Index.position(name) is not None
+
+    # Filters the names by the search.
+    def _search(self) -> None:
+
+        self.Matches = self.Index.search(self.Query.get())
+        self.first = 0
+
+        # Without a search the chosen name stays chosen.
+        position = self.Index.position(self.Variable.get())
+        if self.Query.get() == '' and position is not None:
+            self._select(position)
+        else:
+            self._select(0)
+
+    # Moves the selection.
+    def move(self, step: int) -> None:
+
+        """
+        Moves the selection by step rows (up if step is negative) stopping at the first and the last row.
+        """
+
+        if len(self.Matches) > 0:
+            self._select(max(0, min(len(self.Matches) - 1,
+                                    self.selected + step)))
+
+    # Selects the row and scrolls to it.
+    def _select(self, selected: int) -> None:
+
+        if len(self.Matches) < 1:
+            self.selected = -1
+            self.Variable.set('')
+        else:
+            self.selected = selected
+            self.Variable.set(self.Index.Names[self.Matches[selected]])
+
+            if selected < self.first:
+                self.first = selected
+            elif selected >= self.first + self.rows:
+                self.first = selected - self.rows + 1
+
+        self._render()
+
+    # Selects the clicked row.
+    def _click(self, event) -> None:
+
+        rows = self.List.curselection()
+        if len(rows) > 0 and len(self.Matches) > 0:
+            self._select(min(self.first + rows[0], len(self.Matches) - 1))
+
+    # Scrolls the list (called by the scrollbar and the mouse wheel).
+    def _scroll(self, action: str, amount: str | int,
+                 unit: str = 'units') -> str:
+
+        count = len(self.Matches)
+        if action == 'moveto':
+            first = int(float(amount) * count)
+        elif unit == 'pages':
+            first = self.first + int(amount) * self.rows
+        else:
+            first = self.first + int(amount)
+        self.first = max(0, min(count - self.rows, first))
+
+        self._render()
+        return 'break'
+
+    # Fills the listbox with the visible rows.
+    def _render(self) -> None:
+
+        List = self.List
+        count = len(self.Matches)
+
+        List.delete(0, END)
+        if len(self.Index) < 1:
+            List.insert(END, self.placeholder)
+        elif count > 0:
+            List.insert(END, *[self.Index.Names[i] for i in
+                               self.Matches[self.first:
+                                            self.first + self.rows]])
+            if self.first <= self.selected < self.first + self.rows:
+                List.selection_set(self.selected - self.first)
+
+        if count > 0:
+            self.Scrollbar.set(self.first / count,
+                               min(1, (self.first + self.rows) / count))
+        else:
+            self.Scrollbar.set(0, 1)
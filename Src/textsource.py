@@ -0,0 +1,44 @@
+from collections.abc import Iterator
+from itertools import islice
+
+
+# Reads words from file at given path lazily.
+def iter_words(text_path: str, chunk_size: int = 1 << 16) -> Iterator[str]:
+
+    """
+    Yields the words (separated by whitespace) of the file at text_path reading it chunk_size characters at a time,
+        so even very large files start yielding words immediately.
+    Raises FileNotFoundError once the first word is requested if the file couldn't be opened.
+    """
+
+    try:
+        text_file = open(text_path, 'r')
+    except OSError:
+        raise FileNotFoundError
+
+    with text_file:
+        # Holds the end of the last chunk which may be part of a word
+        # continuing in the next chunk.
+        rest = ''
+        while True:
+            chunk = text_file.read(chunk_size)
+            if chunk == '':
+                break
+            words = (rest + chunk).split()
+            if len(words) > 0 and not chunk[-1].isspace():
+                rest = words.pop()
+            else:
+                rest = ''
+            yield from words
+        if rest != '':
+            yield rest
+
+
+# Takes the next page of words from the iterator.
+def next_page(Words: Iterator[str], page_size: int) -> list[str]:
+
+    """
+    Returns the next (at most) page_size words of the iterator ([] if it is exhausted).
+    """
+
+    return list(islice(Words, page_size))
@@ -1,8 +1,21 @@
-from time import (sleep, time)
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from collections import deque
+from itertools import (chain, tee)
+from os import makedirs
+from os.path import (join, splitext)
+from collections.abc import Callable
+from time import (monotonic_ns, perf_counter_ns, time_ns)
 from tkinter import *
 from tkinter import ttk
+from Src.scoringengine import ScoringEngine
+from Src.keystrokelog import (KeystrokeLogWriter, encode_key)
+from Src.textsource import (iter_words, next_page)
+from Src.textpack import (PACK_EXTENSION, iter_pack_words)
+from Src.summarygraph import (TimelineGraph, choose_backend, create_graph)
+from Src.speedtimeline import SpeedTimeline
+from Src.instrumentation import Instrumentation
+from Src.tagbatch import TagBatch
+from Src.rollingmetrics import RollingMetrics
+from Src.ghostrace import GhostTimeline
 
 
 # Objects of this class are the typing speed test windows themselves.
@@ -15,36 +28,87 @@ class TypingWindow(Tk):
     
     Customizable parts of them include:
     - the text to be typed
-        (more precisely the path to it);
+        (more precisely the path to it or to the pack it was compiled to, see Src.textpack);
     - whether or not the time should be displayed;
     - whether or not the precision should be displayed
         (precision is correct characters/ total characters,
         1 is subtracted from correct characters if word typed is too long);
     - whether or not characters per minute should be displayed;
-    - whether or not words per minute should be displayed;
+    - whether or not words per minute should be displayed
+        (together with WPM over the last few seconds, the fastest burst and the median and 95th percentile
+        of intervals between keystrokes);
     - whether or not the final graph illustrating precision on a per character basis should be displayed on summary;
-    - delay between window updates.
+    - whether or not the graph of WPM and precision over time should be displayed on summary;
+    - delay between stats refreshes;
+    - how many words are rendered per page;
+    - how the final graph is drawn (on a tkinter Canvas or by matplotlib);
+    - whether or not the current word should be highlighted while it's being typed;
+    - the folder keystroke logs are recorded to
+        (every key pressed during the test is recorded to a new log file in it, see Src.keystrokelog);
+    - whether or not the test is profiled;
+    - the keystroke log of an earlier session of the same text raced as a ghost.
 
     Necessary modules:
     ----------------
 
-    - matplotlib;
+    - matplotlib
+        (optional, only the matplotlib graph backend needs it and it's imported only once that graph is drawn);
 
 
     Methods:
     ----------------
 
-    initiate_typing() -> None:
-        Starts the typing test and displays it for the user. 
+    initiate_typing() -> ScoringEngine:
+        Starts the typing test and displays it for the user, returns the engine holding the results. 
         
     set_text_path(text_path : str) -> None:
         Sets the text to type to the one at the given path.
+
+    set_display(display_time : bool, display_precision : bool, display_chars_per_minute : bool,
+                display_words_per_minute : bool, display_final_graph : bool,
+                display_speed_graph : bool) -> None:
+        Sets which stats and whether the final graph and the speed graph should be displayed.
+
+    set_progress_callback(callback : Callable[[ScoringEngine], None] | None) -> None:
+        Sets the function called with the engine every time the stats are refreshed.
+
+    set_shown_callback(callback : Callable[[], None] | None) -> None:
+        Sets the function called once the typing window drew its first frame.
+
+    set_started_callback(callback : Callable[[], None] | None) -> None:
+        Sets the function called once the first keystroke started the test.
+
+    set_profile(profile : str) -> None:
+        Sets whether and how the tests are profiled.
+
+    set_ghost(log_path : str) -> None:
+        Sets the keystroke log of the session raced as a ghost.
+
+    set_keystroke_log_path(log_path : str) -> None:
+        Sets the file the keystroke log of the next test is recorded to.
         
     
     Useful Info:
     ----------------
 
-    - use of del keyword over destroy method is preferred when terminating the window completely.
+    - use of del keyword over destroy method is preferred when terminating the window completely;
+    - the text is streamed from the file and only the pages around the current word are rendered
+        (the previous, the current and the next one), so texts of any length start immediately;
+    - tags of the text are changed through a TagBatch (Src.tagbatch) which applies all changes made while handling
+        the events of a frame in a single Tcl evaluation;
+    - profiled tests record timing histograms of the key handlers, the stats refreshes and the updates of the text
+        (see Src.instrumentation) next to their keystroke log, handlers are bound through dispatchers
+        which time them only while profiling is on;
+    - scoring is done by a ScoringEngine (Src.scoringengine) given the exact elapsed time, so the results
+        aren't rounded to whole seconds;
+    - live metrics (elapsed time, cumulative WPM and CPM, WPM over sliding windows, the fastest burst
+        and percentiles of intervals between keystrokes) are kept by a RollingMetrics (Src.rollingmetrics)
+        available as Metrics, they are measured with perf_counter_ns, the stat widgets display them
+        and are updated only when their text changes;
+    - the window is driven by Tk's event loop, input is handled as it arrives while stats are refreshed
+        by callbacks scheduled with after, so the window stays idle while nothing is happening;
+    - the ghost (see Src.ghostrace) is highlighted where the earlier session was the same time after its first
+        keystroke, its position is looked up by bisection every frame and the text is changed only when it moves.
     """
 
     # Defines fonts.
@@ -52,13 +116,30 @@ class TypingWindow(Tk):
     Current_font = ('Times New Roman', 15, 'underline')
     Stat_font = ('Arial', 25)
 
+    # Defines the handlers timed when the test is profiled
+    # (they are bound through Handlers, see _dispatcher).
+    Profiled_handlers = ('_start_timer', '_check_word', '_force_stop',
+                         '_refresh_stats')
+
+    # Defines the spans of the sliding windows of the live metrics in seconds.
+    Metric_windows = (5, 15)
+
+    # Defines the time between frames of the ghost in ms.
+    ghost_frame_delay = 33
+
     def __init__(self, text_path: str, display_time: bool = True,
                   display_precision: bool = True,
                   display_chars_per_minute: bool = True,
                   display_words_per_minute: bool = True,
                   display_final_graph: bool = True,
-                  update_delay: float = 0.005,
-                  icon_path: str = '') -> None:
+                  display_speed_graph: bool = True,
+                  update_delay: float = 0.1,
+                  page_size: int = 300,
+                  graph_backend: str = 'auto',
+                  live_highlighting: bool = True,
+                  icon_path: str = '',
+                  log_folder: str = '',
+                  profile: str = 'off') -> None:
 
         """
         Inits TypingWindow object with the atributes given.
@@ -66,7 +147,8 @@ class TypingWindow(Tk):
         Args:
 
             text_path(str):
-                Specifies the path to the text which will be typed out by user.
+                Specifies the path to the text which will be typed out by user
+                    (texts compiled to packs are recognised by the .pack extension and load without tokenizing).
 
         Returns:
             object:
@@ -87,14 +169,39 @@ class TypingWindow(Tk):
             
             display_final_graph(bool):
                 Specifies whether or not to display the final graph. 
+
+            display_speed_graph(bool):
+                Specifies whether or not to display the graph of WPM and precision over time.
             
             update_delay(float):
-                Specifies how long the update loop for the window sleeps after every iteration
-                    (must be non-negative).
+                Specifies how many seconds pass between stats refreshes while the test is running
+                    (must be non-negative, it is rounded to whole milliseconds with a minimum of 1 ms).
             
+            page_size(int):
+                Specifies how many words are rendered per page, every page is displayed as a paragraph
+                    (must be positive).
+
+            graph_backend(str):
+                Specifies how the final graph is drawn, 'canvas' (directly on a tkinter Canvas),
+                    'matplotlib' or 'auto' (canvas for smaller graphs, see Src.summarygraph.choose_backend).
+
+            live_highlighting(bool):
+                Specifies whether or not the characters of the current word should be colored on every keystroke
+                    (the word is still scored only once it's submitted).
+
             icon_path(str):
                 Specifies the icon used by TypingWindow in form of bitmap (more specifivally in this case path
                     (raises _tkinter.TclError if path is incorrect).
+
+            log_folder(str):
+                Specifies the folder keystroke logs are recorded to
+                    (nothing is recorded if it's empty, the folder is created if it doesn't exist).
+
+            profile(str):
+                Specifies whether the tests are profiled, 'off', 'timings' (timing histograms)
+                    or 'cprofile' (timing histograms and cProfile stats), profiles are written next to
+                    the keystroke logs (<log>.timings.json and <log>.pstats) so nothing is profiled
+                    without log_folder.
         """
 
         self.text_path = text_path
@@ -103,25 +210,87 @@ class TypingWindow(Tk):
         self.display_chars_per_minute = display_chars_per_minute
         self.display_words_per_minute = display_words_per_minute
         self.display_final_graph = display_final_graph
+        self.display_speed_graph = display_speed_graph
         self.display_stats = display_time or display_precision or \
               display_chars_per_minute or display_words_per_minute
         self.update_delay = update_delay
+        self.page_size = page_size
+        self.graph_backend = graph_backend
+        self.live_highlighting = live_highlighting
+        self.log_folder = log_folder
+        self.profile = profile
         self.display_summary = self.display_stats or \
-              display_final_graph
+              display_final_graph or display_speed_graph
+
+        # Defines the words yet to be rendered, the word counts
+        # of the rendered pages (page n is on line n of Text_label)
+        # and the position of the current word.
+        self.Page_words = iter(())
+        self.Page_lengths = deque()
+        self.current_line = 1
+        self.current_column = 0
+        self.words_left_in_page = 0
+
+        # Defines placeholder for the engine which scores the test
+        # (created every time the test is initiated).
+        self.Engine = ScoringEngine([])
+        self.Graph_values = {}
 
-        self.Text_to_type = []
+        # Defines the live metrics of the test
+        # (the shortest window is displayed).
+        self.Metrics = RollingMetrics(self.Metric_windows)
 
-        self.Correct_letters = {}
-        self.Total_letters = {}
-        self.Graph_values = {}
+        # Defines the samples of WPM (over the shortest window)
+        # and precision taken on every stats refresh.
+        self.Timeline = SpeedTimeline()
 
         self.running = False
         self.terminate = False
         self.displaying_summary = False
 
-        self.current_word = ''
-        self.current_word_index = 0
-        self.current_index = 0
+        # Holds the id of the scheduled stats refresh (None if there is none),
+        # the function called after every refresh, the one called once
+        # the typing window is drawn and the one called once the first
+        # keystroke is accepted (None if there is none).
+        self.stats_job = None
+        self.Progress_callback = None
+        self.Shown_callback = None
+        self.Started_callback = None
+
+        # Defines placeholder for the batch of tag changes of the text.
+        self.Tags = None
+
+        # Defines the text of the entry as it was last highlighted
+        # and placeholder for the id of the trace that highlights it.
+        self.live_typed = ''
+        self.live_trace = None
+
+        # Defines placeholder for the keystroke log of the running test,
+        # the path to the log of the last test ('' if none was recorded)
+        # and the path the log of the next one is recorded to
+        # ('' for a new file in log_folder).
+        self.Keystroke_log = None
+        self.keystroke_log_path = ''
+        self.next_keystroke_log_path = ''
+
+        # Defines placeholder for the instrumentation of the running test
+        # and the paths to the profile of the last test (empty if none was).
+        self.Instrumentation = None
+        self.profile_paths = []
+
+        # Defines the functions the profiled handlers are bound through.
+        self.Handlers = {name: self._dispatcher(name)
+                         for name in self.Profiled_handlers}
+
+        # Defines the log of the session raced as a ghost ('' if none is),
+        # placeholders for its timeline, the id of its next frame and
+        # the (page, start, end) range it's highlighted at, and how many
+        # pages were dropped from the top of Text_label.
+        self.ghost_log_path = ''
+        self.Ghost = None
+        self.ghost_job = None
+        self.Ghost_range = None
+        self.first_page = 0
 
         # Defines tkinter window.
         super().__init__()
@@ -137,14 +306,8 @@ class TypingWindow(Tk):
         if self.display_stats:
             self.Stats_frame.grid(row=0, column=1, padx=10)
 
-        self.timer_0 = 0
-        self.timer_current = 0
-        self.precision = 0.00
-        self.correct_char_sum = 0
-        self.total_char_sum = 0
-        self.word_sum = 0
-        self.chars_per_minute = 0.00
-        self.words_per_minute = 0.00
+        # Maps the name of every stat variable to the text it displays.
+        self.Displayed_values = {}
 
         self.Time_value = StringVar(self.Stats_frame,
                                      value='0:00')
@@ -154,6 +317,14 @@ class TypingWindow(Tk):
                                                 value='0.00')
         self.Words_per_minute_value = StringVar(self.Stats_frame,
                                                 value='0.00')
+        self.Recent_words_per_minute_value = StringVar(self.Stats_frame,
+                                                       value='0.00')
+        self.Peak_words_per_minute_value = StringVar(self.Stats_frame,
+                                                     value='0.00')
+        self.Median_interval_value = StringVar(self.Stats_frame,
+                                               value='0 ms')
+        self.Slow_interval_value = StringVar(self.Stats_frame,
+                                             value='0 ms')
 
         self.Time_header = ttk.Label(self.Stats_frame, text='Time',
                                       font=self.Stat_font)
@@ -186,22 +357,58 @@ class TypingWindow(Tk):
                                      self.Words_per_minute_value,
                                      font=self.Stat_font,
                                      foreground='blue')
+        self.Recent_WPM_header = ttk.Label(self.Stats_frame,
+                                            text='WPM (' +
+                                            str(self.Metric_windows[0]) +
+                                            ' s)',
+                                            font=self.Stat_font)
+        self.Recent_WPM_label = ttk.Label(self.Stats_frame,
+                                           textvariable=
+                                           self.Recent_words_per_minute_value,
+                                           font=self.Stat_font,
+                                           foreground='blue')
+        self.Peak_WPM_header = ttk.Label(self.Stats_frame,
+                                          text='Peak WPM',
+                                          font=self.Stat_font)
+        self.Peak_WPM_label = ttk.Label(self.Stats_frame,
+                                         textvariable=
+                                         self.Peak_words_per_minute_value,
+                                         font=self.Stat_font,
+                                         foreground='blue')
+        self.Median_interval_header = ttk.Label(self.Stats_frame,
+                                                 text='Gap 50 %',
+                                                 font=self.Stat_font)
+        self.Median_interval_label = ttk.Label(self.Stats_frame,
+                                                textvariable=
+                                                self.Median_interval_value,
+                                                font=self.Stat_font,
+                                                foreground='blue')
+        self.Slow_interval_header = ttk.Label(self.Stats_frame,
+                                               text='Gap 95 %',
+                                               font=self.Stat_font)
+        self.Slow_interval_label = ttk.Label(self.Stats_frame,
+                                              textvariable=
+                                              self.Slow_interval_value,
+                                              font=self.Stat_font,
+                                              foreground='blue')
         
         if self.display_stats:
             self._show_stat_widgets()
         
-        # Defines placeholders that will be
-        # used for displaying the graph.
-        # Got code help from 
-        # https://www.pythontutorial.net/tkinter/tkinter-matplotlib/.
-        self.Figure = None
-        self.Graph = None
-        self.Canvas = None
+        # Defines the graphs created for displaying the final graph
+        # by their backend (they are reused by every summary)
+        # and placeholder for the one currently displayed.
+        self.Summary_graphs = {}
+        self.Summary_graph = None
+
+        # Defines placeholder for the graph of WPM and precision over time
+        # (created the first time it's displayed).
+        self.Speed_graph = None
 
     # "PUBLIC" METHODS
 
     # Starts the test.
-    def initiate_typing(self) -> None:
+    def initiate_typing(self) -> ScoringEngine:
 
         """
         Starts the typing test and displays it for the user. 
@@ -217,44 +424,42 @@ class TypingWindow(Tk):
         - end the test prematurely by another means including escape thereby not displaying the summary;
         - track their stats in real time;
         - close the summary by pressing escape or any other means.
+        Returns the ScoringEngine holding the results of the test.
         """
 
-        # Loads text and sets the current word to the first one 
-        #   (the first one in the default sentence if file is empty).
+        # Starts streaming the text to the engine and to the view
+        #   (default sentence is used if file is empty).
         self._get_text() 
-        try:
-            self.current_word = \
-            self.Text_to_type[self.current_word_index]
-        except IndexError:
-            self.Text_to_type = \
-            ['There', 'should', 'be', 'something', 'here']
-            self.current_word = self.Text_to_type[0]
+        self._load_ghost()
+
+        self._open_keystroke_log()
+        self._start_profiling()
         
         # Shows typing window to user.
         self._show_typing_window()
 
-        # Program is blocked until user 
-        # presses a key inside the window.
-        while not self.running and not self.terminate:
-            self.update()
-            sleep(self.update_delay)
+        # Program is blocked until the test ends, the first keypress
+        # starts the timer which schedules the stats refreshes.
+        self.mainloop()
 
-        # Runs mainloop substitute that uses
-        # stats_calculate method to update stats.
-        while self.running:
-            self._stats_calculate()
-            self.update()
-            sleep(self.update_delay)
+        if self.Keystroke_log is not None:
+            self.Keystroke_log.close()
+            self.Keystroke_log = None
 
-        there_is_no_data_for_graph = len(dict(
-            filter(lambda item: item[1] > 0,
-                    self.Correct_letters.items()))) < 1 and \
+        there_is_no_data_for_graph = not any(
+            stat.correct > 0 for stat in self.Engine.Letters.values()) and \
         self.display_final_graph
 
+        there_is_no_data_for_speed_graph = len(self.Timeline) < 2 and \
+            self.display_speed_graph
+
         if there_is_no_data_for_graph:
             self.display_final_graph = False
-            self.display_summary = self.display_summary and \
-                self.display_stats
+        if there_is_no_data_for_speed_graph:
+            self.display_speed_graph = False
+        self.display_summary = self.display_summary and \
+            (self.display_stats or self.display_final_graph or
+             self.display_speed_graph)
 
         # Displays summary if typing test was "meant to end".
         if self.display_summary:
@@ -264,11 +469,16 @@ class TypingWindow(Tk):
 
         if there_is_no_data_for_graph:
             self.display_final_graph = True
-            self.display_summary = self.display_summary and \
-                  self.display_stats
+        if there_is_no_data_for_speed_graph:
+            self.display_speed_graph = True
+
+        self._stop_profiling()
 
+        Engine = self.Engine
         self._reset_test()
 
+        return Engine
+
     # Sets the text_path field to the one given.
     def set_text_path(self, text_path: str) -> None:
 
@@ -279,6 +489,105 @@ class TypingWindow(Tk):
 
         self.text_path = text_path
 
+    # Sets the display fields to the ones given.
+    def set_display(self, display_time: bool = True,
+                     display_precision: bool = True,
+                     display_chars_per_minute: bool = True,
+                     display_words_per_minute: bool = True,
+                     display_final_graph: bool = True,
+                     display_speed_graph: bool = True) -> None:
+
+        """
+        Sets which stats and whether the final graph and the speed graph should be displayed.
+        Does not affect the test which is currently running (if it is running). 
+        """
+
+        self.display_time = display_time
+        self.display_precision = display_precision
+        self.display_chars_per_minute = display_chars_per_minute
+        self.display_words_per_minute = display_words_per_minute
+        self.display_final_graph = display_final_graph
+        self.display_speed_graph = display_speed_graph
+        self.display_stats = display_time or display_precision or \
+              display_chars_per_minute or display_words_per_minute
+        self.display_summary = self.display_stats or \
+              display_final_graph or display_speed_graph
+
+        for widget in self.Stats_frame.grid_slaves():
+            widget.grid_forget()
+
+        if self.display_stats:
+            self.Stats_frame.grid(row=0, column=1, padx=10)
+            self._show_stat_widgets()
+        else:
+            self.Stats_frame.grid_forget()
+
+    # Sets the Progress_callback field to the one given.
+    def set_progress_callback(self,
+                               callback: Callable[[ScoringEngine], None]
+                               | None) -> None:
+
+        """
+        Sets the function called with the engine every time the stats are refreshed while the test is running
+            (None to not call anything).
+        """
+
+        self.Progress_callback = callback
+
+    # Sets the Shown_callback field to the one given.
+    def set_shown_callback(self, callback: Callable[[], None] | None
+                            ) -> None:
+
+        """
+        Sets the function called once the typing window of every test drew its first frame
+            (None to not call anything).
+        """
+
+        self.Shown_callback = callback
+
+    # Sets the Started_callback field to the one given.
+    def set_started_callback(self, callback: Callable[[], None] | None
+                              ) -> None:
+
+        """
+        Sets the function called once the first keystroke of every test was accepted and started its timer
+            (None to not call anything).
+        """
+
+        self.Started_callback = callback
+
+    # Sets the profile field to the one given.
+    def set_profile(self, profile: str = 'off') -> None:
+
+        """
+        Sets whether the tests are profiled ('off', 'timings' or 'cprofile', see __init__).
+        Does not affect the test which is currently running (if it is running). 
+        """
+
+        self.profile = profile
+
+    # Sets the ghost_log_path field to the one given.
+    def set_ghost(self, log_path: str = '') -> None:
+
+        """
+        Sets the keystroke log of an earlier session of the same text raced as a ghost ('' to race no one).
+        The ghost is left out if the log can't be read.
+        Does not affect the test which is currently running (if it is running). 
+        """
+
+        self.ghost_log_path = log_path
+
+    # Sets the path the next keystroke log is recorded to.
+    def set_keystroke_log_path(self, log_path: str = '') -> None:
+
+        """
+        Sets the file the keystroke log of the next test is recorded to
+            ('' for a new file in log_folder named by the time it's opened).
+        Nothing is recorded without log_folder, the path applies to the next test only.
+        """
+
+        self.next_keystroke_log_path = log_path
+
     # __init__ METHODS
 
     # Adds the stat methods to their frame if they are to be displayed.
@@ -299,24 +608,259 @@ class TypingWindow(Tk):
         if self.display_words_per_minute:
             self.WPM_header.grid(row=3, column=0, sticky=W)
             self.WPM_label.grid(row=3, column=1, sticky=W)
+            self.Recent_WPM_header.grid(row=4, column=0, sticky=W)
+            self.Recent_WPM_label.grid(row=4, column=1, sticky=W)
+            self.Peak_WPM_header.grid(row=5, column=0, sticky=W)
+            self.Peak_WPM_label.grid(row=5, column=1, sticky=W)
+            self.Median_interval_header.grid(row=6, column=0, sticky=W)
+            self.Median_interval_label.grid(row=6, column=1, sticky=W)
+            self.Slow_interval_header.grid(row=7, column=0, sticky=W)
+            self.Slow_interval_label.grid(row=7, column=1, sticky=W)
 
     # RUNTIME METHODS
 
-    # Loads chosen text from file at given path.
+    # Starts streaming chosen text from file at given path.
     def _get_text(self) -> None:
 
+        if self.text_path.endswith(PACK_EXTENSION):
+            Words = iter_pack_words(self.text_path)
+        else:
+            Words = iter_words(self.text_path)
+        first_page = next_page(Words, self.page_size)
+        if len(first_page) < 1:
+            first_page = ['There', 'should', 'be', 'something', 'here']
+
+        # The engine and the view take the words from separate branches
+        # so the view can render pages ahead of the current word.
+        Engine_words, self.Page_words = tee(chain(first_page, Words))
+        self.Engine = ScoringEngine(Engine_words)
+
+    # Renders the next page of the text (if there is one).
+    def _render_page(self) -> None:
+
+        page = next_page(self.Page_words, self.page_size)
+        if len(page) < 1:
+            return
+
+        self.Text_label.config(state=NORMAL)
+        self.Text_label.insert(END,
+                                ('\n' if len(self.Page_lengths) > 0
+                                  else '') +
+                                ' '.join(page) + ' ')
+        self.Text_label.config(state=DISABLED)
+
+        self.Page_lengths.append(len(page))
+
+    # Moves the position of the current word past the submitted one,
+    # paging in the next page and dropping the old one when the
+    # current word moves on to the next page.
+    def _advance_position(self, length_of_word: int) -> None:
+
+        self.words_left_in_page -= 1
+        if self.words_left_in_page > 0:
+            self.current_column += length_of_word + 1
+            return
+
+        # Applies the tag changes before the lines they refer to move.
+        self.Tags.flush()
+
+        self.current_line += 1
+        self.current_column = 0
+        self.words_left_in_page = self.Page_lengths[self.current_line - 1]
+
+        self._render_page()
+
+        if self.current_line > 2:
+            self.Text_label.config(state=NORMAL)
+            self.Text_label.delete('1.0', '2.0')
+            self.Text_label.config(state=DISABLED)
+            self.Page_lengths.popleft()
+            self.current_line -= 1
+            self.first_page += 1
+
+    # Reads the timeline of the ghost (if there is one).
+    def _load_ghost(self) -> None:
+
+        self.Ghost = None
+        if self.ghost_log_path == '':
+            return
+
         try:
-            with open(self.text_path, 'r') as text_file:
-                self.Text_to_type = text_file.read().split()
-        except OSError:
-            raise FileNotFoundError
+            self.Ghost = GhostTimeline(self.ghost_log_path, self.text_path)
+        except (OSError, ValueError):
+            pass
+
+    # Schedules the next frame of the ghost.
+    def _schedule_ghost(self) -> None:
+
+        self.ghost_job = self.after(self.ghost_frame_delay,
+                                     self._ghost_frame)
+
+    # Moves the ghost to where it is at the current time.
+    def _ghost_frame(self) -> None:
+
+        self.ghost_job = None
+        if not self.running:
+            return
+
+        elapsed = perf_counter_ns() - self.Metrics.timer_0
+        word_index, typed = self.Ghost.position(elapsed)
+
+        # Highlights the characters the ghost typed and its cursor.
+        column = self.Ghost.column(word_index, self.page_size)
+        Range = (word_index // self.page_size, column, column + typed + 1)
+        if Range != self.Ghost_range:
+            self._move_ghost(Range)
+
+        if not self.Ghost.finished(elapsed):
+            self._schedule_ghost()
+
+    # Moves the highlight of the ghost to the range
+    # (pages that are not rendered are skipped).
+    def _move_ghost(self, Range: tuple[int, int, int]) -> None:
+
+        if self.Ghost_range is not None:
+            page, start, end = self.Ghost_range
+            line = page - self.first_page + 1
+            if 1 <= line <= len(self.Page_lengths):
+                self.Tags.remove('GHOST', line, start, end)
+
+        page, start, end = Range
+        line = page - self.first_page + 1
+        if 1 <= line <= len(self.Page_lengths):
+            self.Tags.add('GHOST', line, start, end)
+            self.Ghost_range = Range
+        else:
+            self.Ghost_range = None
+
+    # Opens a new keystroke log in log_folder (if there is one).
+    def _open_keystroke_log(self) -> None:
+
+        if self.log_folder == '':
+            return
+
+        makedirs(self.log_folder, exist_ok=True)
+        self.keystroke_log_path = self.next_keystroke_log_path
+        if self.keystroke_log_path == '':
+            self.keystroke_log_path = join(self.log_folder,
+                                            str(time_ns()) + '.keys')
+        self.next_keystroke_log_path = ''
+        self.Keystroke_log = KeystrokeLogWriter(self.keystroke_log_path)
+
+    # Returns the function the handler is bound through.
+    def _dispatcher(self, name: str) -> Callable:
+
+        # Looks the handler and the instrumentation up on every call,
+        # so the handler is timed while the test is profiled
+        # however long before that it was bound.
+        def dispatch(*args):
+
+            if self.Instrumentation is None:
+                return getattr(self, name)(*args)
+            return self.Instrumentation.call(name, getattr(self, name),
+                                             *args)
+
+        return dispatch
+
+    # Starts timing the handlers if the test is profiled.
+    def _start_profiling(self) -> None:
+
+        self.profile_paths = []
+        if self.profile == 'off' or self.keystroke_log_path == '':
+            return
+
+        self.Instrumentation = Instrumentation(self.profile == 'cprofile')
+        self.Instrumentation.start()
+
+    # Writes the profile of the test.
+    def _stop_profiling(self) -> None:
+
+        if self.Instrumentation is None:
+            return
+
+        self.Instrumentation.stop()
+
+        self.profile_paths = self.Instrumentation.dump(
+            splitext(self.keystroke_log_path)[0])
+        self.Instrumentation = None
+
+    # Records the key pressed to the metrics and to the keystroke log.
+    def _record_key(self, event) -> None:
+
+        if event.char != '':
+            self.Metrics.record_key(perf_counter_ns())
+
+        if self.Keystroke_log is not None:
+            self.Keystroke_log.record(monotonic_ns(),
+                                       encode_key(event.char,
+                                                  event.keysym_num),
+                                       self.Engine.current_word_index)
 
     # Starts the timer and sets the running field to True.
     def _start_timer(self, event) -> None:
 
         self.unbind('<Key>')
         self.running = True
-        self.timer_0 = time()
+        self.Metrics.start(perf_counter_ns())
+        self._schedule_stats()
+        if self.Ghost is not None:
+            self._schedule_ghost()
+        if self.Started_callback is not None:
+            self.Started_callback()
+
+    # Schedules the next stats refresh.
+    def _schedule_stats(self) -> None:
+
+        self.stats_job = self.after(max(1, round(self.update_delay * 1000)),
+                                     self.Handlers['_refresh_stats'])
+
+    # Refreshes stats and schedules the next refresh while the test is running.
+    def _refresh_stats(self) -> None:
+
+        self.stats_job = None
+        if not self.running:
+            return
+
+        self._stats_calculate()
+        self._sample_timeline()
+        if self.Progress_callback is not None:
+            self.Progress_callback(self.Engine)
+        self._schedule_stats()
+
+    # Adds the current WPM and precision to the timeline.
+    def _sample_timeline(self) -> None:
+
+        if self.Engine.total_char_sum > 0:
+            precision = self.Engine.correct_char_sum / \
+                self.Engine.total_char_sum
+        else:
+            precision = 0.0
+
+        self.Timeline.sample(self.Metrics.elapsed,
+                             self.Metrics.Window_words_per_minute[
+                                 self.Metric_windows[0]],
+                             precision)
+
+    # Stops the test, cancelling the pending stats refresh
+    # and returning control from the event loop.
+    def _stop_typing(self) -> None:
+
+        was_running = self.running
+        self.running = False
+
+        if self.stats_job is not None:
+            self.after_cancel(self.stats_job)
+            self.stats_job = None
+        if self.ghost_job is not None:
+            self.after_cancel(self.ghost_job)
+            self.ghost_job = None
+
+        # Makes sure the stats reflect the last submitted word.
+        if was_running:
+            self._stats_calculate()
+            self._sample_timeline()
+
+        self.quit()
 
     # Shows typing window.
     def _show_typing_window(self) -> None:
@@ -332,8 +876,16 @@ class TypingWindow(Tk):
                                 wrap=WORD,
                                 font=self.Text_font,
                                 bg='black', fg='white')
+        self.Typed_value = StringVar(self.Typing_frame)
         self.Entry_word = ttk.Entry(self.Typing_frame,
-                                     font=self.Text_font)
+                                     font=self.Text_font,
+                                     textvariable=self.Typed_value)
+
+        # Highlights the current word every time the entry changes.
+        self.live_typed = ''
+        if self.live_highlighting:
+            self.live_trace = self.Typed_value.trace_add('write',
+                                                         self._live_update)
 
         # Defines tags.
         self.Text_label.tag_configure('CURRENT',
@@ -342,164 +894,179 @@ class TypingWindow(Tk):
                                        foreground='green')
         self.Text_label.tag_configure('INCORRECT',
                                        foreground='red')
+        self.Text_label.tag_configure('LIVE_CORRECT',
+                                       foreground='green')
+        self.Text_label.tag_configure('LIVE_INCORRECT',
+                                       foreground='red')
+        self.Text_label.tag_configure('GHOST',
+                                       background='#34345c')
 
         # Inserts typing widgets into Typing_frame.
         self.Text_label.grid(row=0, column=0)
         self.Entry_word.grid(row=1, column=0, pady=20)
 
-        # Inserts the text into text widget.
-        self.Text_label.insert(END,
-                                ''.join([i + ' ' 
-                                             for i in 
-                                             self.Text_to_type]))
-        self.Text_label.config(state=DISABLED)
-
-        self.Text_label.tag_add('CURRENT', '1.0',
-                                 '1.' + str(len(self.current_word)))
-
-        self.bind('<Key>', self._start_timer)
-        self.bind('<space>', self._check_word)
-        self.bind('<Control_L>', self._force_stop)
-        self.bind('<Escape>', self._force_stop)
+        self.Tags = TagBatch(self.Text_label)
+        if self.Instrumentation is not None:
+            self.Tags.flush = self.Instrumentation.timed('update',
+                                                         self.Tags.flush)
+
+        # Inserts the first two pages of the text into text widget.
+        self.Page_lengths.clear()
+        self._render_page()
+        self._render_page()
+        self.first_page = 0
+        self.Ghost_range = None
+        self.current_line = 1
+        self.current_column = 0
+        self.words_left_in_page = self.Page_lengths[0]
+
+        self.Tags.add('CURRENT', 1, 0, len(self.Engine.current_word))
+
+        # Keys are recorded by the entry before the window handles them.
+        self.Entry_word.bind('<Key>', self._record_key)
+        self.bind('<Key>', self.Handlers['_start_timer'])
+        self.bind('<space>', self.Handlers['_check_word'])
+        self.bind('<Control_L>', self.Handlers['_force_stop'])
+        self.bind('<Escape>', self.Handlers['_force_stop'])
 
         # Defines protocol that handles terminating the process 
         # if user closes window unexpectedly.
-        self.protocol('WM_DELETE_WINDOW', self._force_stop)
+        self.protocol('WM_DELETE_WINDOW', self.Handlers['_force_stop'])
+
+        # Reports the first frame once the text is exposed and redrawn.
+        if self.Shown_callback is not None:
+            self.Text_label.bind('<Expose>', self._report_shown)
 
         self.deiconify()
         self.focus()
         self.Entry_word.focus()
 
-    # Calculates and updates stats.
-    def _stats_calculate(self) -> None:
+    # Calls Shown_callback after the redraw of the first exposure.
+    def _report_shown(self, event) -> None:
 
-        if self.display_time or self.display_chars_per_minute or \
-             self.display_words_per_minute:
-            self.timer_current = round(time() - self.timer_0)
+        self.Text_label.unbind('<Expose>')
+        self.after_idle(self.Shown_callback)
 
-        try:
-            if self.display_chars_per_minute:
-                self.chars_per_minute = round(
-                    (self.correct_char_sum / self.timer_current) * 60,
-                     2)
-            if self.display_words_per_minute:
-                self.words_per_minute = round(
-                    (self.word_sum / self.timer_current) * 60,
-                     2)
-            if self.display_precision:
-                self.precision = round(
-                    self.correct_char_sum / self.total_char_sum,
-                     2)
-        except ZeroDivisionError:
-            pass
+    # Calculates stats and updates the widgets whose text changed.
+    def _stats_calculate(self) -> None:
+
+        # The engine is given the exact elapsed time, so the results
+        # (and the stats sent with them) aren't rounded to whole seconds.
+        Metrics = self.Metrics
+        Metrics.update(perf_counter_ns())
+        self.Engine.calculate_stats(Metrics.elapsed)
 
-        # Updates the widgets with the new values
-        #  (accounting for formatting).
         if self.display_time:
-            temp_minutes = str(self.timer_current // 60)
-            temp_seconds = str(self.timer_current % 60)
-            if len(temp_seconds) < 2:
-                temp_seconds = '0' + temp_seconds
-            self.Time_value.set(temp_minutes + ':' + temp_seconds)
+            minutes, seconds = divmod(int(Metrics.elapsed), 60)
+            self._display(self.Time_value,
+                          str(minutes) + ':' + '{:02d}'.format(seconds))
         if self.display_precision:
-            self.Precision_value.set(
-                str(int(self.precision * 100)) + ' %')
+            self._display(self.Precision_value,
+                          str(int(self.Engine.precision * 100)) + ' %')
         if self.display_chars_per_minute:
-            self.Chars_per_minute_value.set(str(self.chars_per_minute))
-            if len(str(self.chars_per_minute).split('.')[1]) < 2:
-                self.Chars_per_minute_value.set(
-                    self.Chars_per_minute_value.get() + '0')
-        if self.words_per_minute:
-            self.Words_per_minute_value.set(str(self.words_per_minute))
-            if len(str(self.words_per_minute).split('.')[1]) < 2:
-                self.Words_per_minute_value.set(
-                    self.Words_per_minute_value.get() + '0')
+            self._display(self.Chars_per_minute_value,
+                          '{:.2f}'.format(Metrics.chars_per_minute))
+        if self.display_words_per_minute:
+            self._display(self.Words_per_minute_value,
+                          '{:.2f}'.format(Metrics.words_per_minute))
+            self._display(self.Recent_words_per_minute_value,
+                          '{:.2f}'.format(Metrics.Window_words_per_minute[
+                              self.Metric_windows[0]]))
+            self._display(self.Peak_words_per_minute_value,
+                          '{:.2f}'.format(Metrics.peak_words_per_minute))
+            self._display(self.Median_interval_value,
+                          str(Metrics.interval_percentile(50)) + ' ms')
+            self._display(self.Slow_interval_value,
+                          str(Metrics.interval_percentile(95)) + ' ms')
+
+    # Sets the variable to the text unless it's displaying it already.
+    def _display(self, Variable: StringVar, text: str) -> None:
+
+        name = str(Variable)
+        if self.Displayed_values.get(name) != text:
+            self.Displayed_values[name] = text
+            Variable.set(text)
 
     # Checks the word in the box once user presses spacebar.
     def _check_word(self, event) -> None:
 
-        typed = self.Entry_word.get().strip()
+        typed = self.Entry_word.get()
         self.Entry_word.delete(0, 'end')
 
-        if typed == '' or typed == ' ':
+        correct_char_sum = self.Engine.correct_char_sum
+        results = self.Engine.submit_word(typed)
+
+        if results is None:
             return
 
-        length_of_word = len(self.current_word)
-        length_of_typed = len(typed)
+        self.Metrics.record_word(perf_counter_ns(),
+                                  self.Engine.correct_char_sum -
+                                  correct_char_sum)
 
-        # Checks the correctness of every character in the word.
-        for i in range(length_of_word):
+        line = self.current_line
+        column = self.current_column
 
-            self.total_char_sum += 1
+        # Colors every character in the word based on its correctness
+        #   (runs of the same color are merged by the batch).
+        for i, correct in enumerate(results):
+            self.Tags.add('CORRECT' if correct else 'INCORRECT',
+                           line, column + i, column + i + 1)
 
-            # If there is still another character in typed
-            # checks if it's correct, otherwise defaults to incorrect.
-            if length_of_typed >= i + 1 and \
-                  self.current_word[i] == typed[i]:
-                self.Text_label.tag_add('CORRECT',
-                                         '1.' +
-                                         str(self.current_index + i))
-                self._letter_stat_update(self.current_word[i], True)
-                self.correct_char_sum += 1
-            else:
-                self.Text_label.tag_add('INCORRECT',
-                                         '1.' + 
-                                         str(self.current_index + i))
-                self._letter_stat_update(self.current_word[i], False)
-
-        # Subtracts 1 from the correct characters
-        # if the word typed is too long
-        #  (making sure it doesn't turn negative).
-        if length_of_typed > length_of_word and \
-              self.correct_char_sum > 0:
-            self.correct_char_sum -= 1
-
-        self.Text_label.tag_remove('CURRENT',
-                                   '1.' + 
-                                   str(self.current_index),
-                                   '1.' + 
-                                   str(self.current_index +
-                                        length_of_word))
-
-        self.word_sum += 1
-        self.current_word_index += 1
-        self.current_index += length_of_word + 1
-
-        # If the index now points to a non-existent word ends the test.
-        if self.current_word_index >= len(self.Text_to_type):
-            self.running = False
+        self.Tags.remove('CURRENT', line, column, column + len(results))
+
+        # If there is no word left ends the test.
+        if self.Engine.finished:
+            self._stop_typing()
             return
 
-        self.Text_label.tag_add('CURRENT',
-                                '1.' + str(self.current_index),
-                                '1.' +
-                                str(self.current_index + 
-                                len(self.Text_to_type
-                                    [self.current_word_index])))
+        self._advance_position(len(results))
+
+        self.Tags.add('CURRENT', self.current_line, self.current_column,
+                       self.current_column + len(self.Engine.current_word))
+        self.Text_label.see(str(self.current_line) + '.' +
+                             str(self.current_column))
 
-        self.current_word = self.Text_to_type[self.current_word_index]
+    # Colors the characters of the current word which changed since
+    # the last keystroke (usually just the last one) to match the entry.
+    def _live_update(self, *args) -> None:
 
-    # Updates letter stats.
-    def _letter_stat_update(self, letter: str, correct: bool) -> None:
+        typed = self.Typed_value.get()
+        previous = self.live_typed
+        self.live_typed = typed
+        word = self.Engine.current_word
 
-        if letter in self.Total_letters.keys():
-            self.Total_letters[letter] += 1
-            if correct:
-                self.Correct_letters[letter] += 1
+        # Finds the first character that changed.
+        if typed.startswith(previous):
+            first = len(previous)
+        elif previous.startswith(typed):
+            first = len(typed)
         else:
-            self.Total_letters.update({letter: 1})
-            if correct:
-                self.Correct_letters.update({letter: 1})
+            first = 0
+            while typed[first] == previous[first]:
+                first += 1
+
+        last = min(max(len(typed), len(previous)), len(word))
+        line = self.current_line
+
+        for position in range(first, last):
+            column = self.current_column + position
+            if position >= len(typed):
+                self.Tags.remove('LIVE_CORRECT', line, column, column + 1)
+                self.Tags.remove('LIVE_INCORRECT', line, column, column + 1)
+            elif typed[position] == word[position]:
+                self.Tags.remove('LIVE_INCORRECT', line, column, column + 1)
+                self.Tags.add('LIVE_CORRECT', line, column, column + 1)
             else:
-                self.Correct_letters.update({letter: 0})
+                self.Tags.remove('LIVE_CORRECT', line, column, column + 1)
+                self.Tags.add('LIVE_INCORRECT', line, column, column + 1)
 
     # Handles force stop scenarios.
     def _force_stop(self, event=None) -> None:
         
-        self.running = False
         self.terminate = True
         if not ('keysym=Control_L' in str(event)):
             self.display_summary = False
+        self._stop_typing()
 
     # SUMMARY METHODS
 
@@ -510,87 +1077,98 @@ class TypingWindow(Tk):
 
         self.displaying_summary = True
 
-        if self.display_stats and self.display_final_graph:
-            self.minsize(1000, 600)
-            self.maxsize(1000, 600)
-        elif self.display_stats and not self.display_final_graph:
-            self.minsize(300, 200)
-            self.maxsize(300, 200)
-        else:
-            self.minsize(1000, 400)
-            self.maxsize(1000, 400)
+        # Stacks the stats and the graphs that are displayed.
+        width = 1000 if self.display_final_graph or \
+            self.display_speed_graph else 350
+        height = (250 + 150 * self.display_words_per_minute) * \
+            self.display_stats + \
+            400 * self.display_final_graph + \
+            200 * self.display_speed_graph
+        self.minsize(width, height)
+        self.maxsize(width, height)
 
         if self.display_final_graph:
 
             # Fills the Graph_values dictionary with letters
             # and the relations between how many were
-            # correctly typed and total count.
-            for i in self.Total_letters.keys():
-                self.Graph_values.update({i: self.Correct_letters[i] / 
-                                          self.Total_letters[i]})
-
-            # Uses line of code from this thread:
-            # https://stackoverflow.com/questions/613183/how-do-i-sort-a-dictionary-by-value,
-            # but sorted by key.
-            self.Graph_values = dict(sorted(self.Graph_values.items(),
-                                             key=lambda item: item[0]))
-
-            # Adds The Graph to the window.
-            self.Figure = Figure(figsize=(10, 4), dpi=100)
-            self.Graph = self.Figure.add_subplot(111)
-            self.Canvas = FigureCanvasTkAgg(self.Figure, master=self)
-            self.Graph.set_title('Precision By Character')
-            self.Graph.bar(self.Graph_values.keys(),
-                            self.Graph_values.values(),
-                            color=['blue', 'orange'])
-            self.Canvas.get_tk_widget().grid(row=1, column=1)
-
+            # correctly typed and total count (sorted by letter).
+            self.Graph_values = self.Engine.letter_precision()
+
+            # Adds The Graph to the window (creating it
+            # only the first time its backend is used).
+            backend = choose_backend(self.Graph_values,
+                                     self.graph_backend)
+            if backend not in self.Summary_graphs:
+                self.Summary_graphs[backend] = create_graph(self, backend)
+            self.Summary_graph = self.Summary_graphs[backend]
+            self.Summary_graph.draw(self.Graph_values)
+            self.Summary_graph.widget().grid(row=1, column=1)
+
+        if self.display_speed_graph:
+            if self.Speed_graph is None:
+                self.Speed_graph = TimelineGraph(self)
+            self.Speed_graph.draw(self.Timeline)
+            self.Speed_graph.widget().grid(row=2, column=1)
+
+        # Keys of the test don't reach the summary (they are bound again
+        # once the next test is shown), only escape closes it.
+        self.unbind('<Key>')
+        self.unbind('<space>')
+        self.unbind('<Control_L>')
         self.bind('<Escape>', self._close_summary)
         self.protocol('WM_DELETE_WINDOW', self._close_summary)
 
-        while self.displaying_summary:
-            self.update()
-            sleep(self.update_delay)
+        # Program is blocked until the summary is closed.
+        self.mainloop()
 
     # Closes summary
     def _close_summary(self, event=None) -> None:
 
         self.displaying_summary = False
+        self.quit()
 
     # POST-CORRECTION METHODS
 
     # Resets fields to default values.
     def _reset_test(self):
 
-        self.Correct_letters = {}
-        self.Total_letters = {}
+        self.Engine = ScoringEngine([])
         self.Graph_values = {}
 
-        self.current_word_index = 0
-        self.current_index = 0
+        self.Page_words = iter(())
+        self.Page_lengths.clear()
 
         self.terminate = False
-
-        self.timer_0 = 0
-        self.timer_current = 0
-        self.precision = 0.00
-        self.correct_char_sum = 0
-        self.total_char_sum = 0
-        self.word_sum = 0
-        self.chars_per_minute = 0.00
-        self.words_per_minute = 0.00
-
-        self.Time_value.set('0:00')
-        self.Precision_value.set('0 %')
-        self.Chars_per_minute_value.set('0.00')
-        self.Words_per_minute_value.set('0.00')
-
-        if self.Canvas is not None:
-            self.Canvas.get_tk_widget().grid_forget()
-            self.Canvas = None
-            self.Figure = None
-            self.Graph = None
+        self.Ghost = None
+
+        self.Metrics.reset()
+        self.Timeline.reset()
+
+        self._display(self.Time_value, '0:00')
+        self._display(self.Precision_value, '0 %')
+        self._display(self.Chars_per_minute_value, '0.00')
+        self._display(self.Words_per_minute_value, '0.00')
+        self._display(self.Recent_words_per_minute_value, '0.00')
+        self._display(self.Peak_words_per_minute_value, '0.00')
+        self._display(self.Median_interval_value, '0 ms')
+        self._display(self.Slow_interval_value, '0 ms')
+
+        # Destroys the widgets of the test as they are
+        # created again for the next one.
+        self.Tags.cancel()
+        self.Tags = None
+        if self.live_trace is not None:
+            self.Typed_value.trace_remove('write', self.live_trace)
+            self.live_trace = None
+        self.Text_label.destroy()
+        self.Entry_word.destroy()
+
+        if self.Summary_graph is not None:
+            self.Summary_graph.widget().grid_forget()
+            self.Summary_graph = None
+        if self.Speed_graph is not None:
+            self.Speed_graph.widget().grid_forget()
         self.Typing_frame.grid(row=0, column=0, padx=10)
 
         self.display_summary = self.display_stats or \
-              self.display_final_graph
+              self.display_final_graph or self.display_speed_graph
@@ -0,0 +1,428 @@
+from collections.abc import Callable
+from getpass import getuser
+from multiprocessing import (Pipe, get_context)
+from os import getpid
+from os.path import (basename, isfile, join, splitext)
+from time import time_ns
+from Src.keystrokelog import (KeystrokeLog, remove_log)
+from Src.resultchannel import (decode_message, encode_progress,
+                               encode_result, encode_shown,
+                               encode_started)
+from Src.sessionstore import SessionStore
+from Src.textpack import text_hash
+
+
+# Returns the name of the Tk application of a worker process.
+def worker_app_name(pid: int) -> str:
+
+    """
+    Returns the name the typing window of the worker process with the given pid is registered under
+        (see Tk's send and winfo interps).
+    """
+
+    return 'Typing worker ' + str(pid)
+
+
+# Runs tests in the worker process until it's told to stop.
+def worker_main(connection, icon_path: str = '', log_folder: str = '',
+                 history_path: str = '') -> None:
+
+    """
+    Keeps a single TypingWindow alive and runs the tests received through connection back to back.
+    Every test is a dict of TypingWorker.run_test arguments, None stops the worker.
+    Sends back a shown message once the typing window is drawn, a started message once the first keystroke is accepted,
+        progress messages while the test is running
+        and a result message once it's finished
+        (followed by the keystroke records if they were requested), see Src.resultchannel.
+    """
+
+    from Src.typingwindow import TypingWindow
+
+    Typing_window = TypingWindow('', icon_path=icon_path,
+                                  log_folder=log_folder)
+    Typing_window.set_progress_callback(
+        lambda Engine: connection.send_bytes(encode_progress(Engine)))
+    Typing_window.set_shown_callback(
+        lambda: connection.send_bytes(encode_shown()))
+    Typing_window.set_started_callback(
+        lambda: connection.send_bytes(encode_started()))
+    # Names the interpreter after the process, so other Tk applications
+    # (like the startup tests) can tell which window is whose.
+    Typing_window.tk.call('tk', 'appname', worker_app_name(getpid()))
+
+    while True:
+        try:
+            test = connection.recv()
+        except EOFError:
+            break
+        if test is None:
+            break
+
+        Typing_window.set_text_path(test['text_path'])
+        Typing_window.set_display(test['display_time'],
+                                   test['display_precision'],
+                                   test['display_chars_per_minute'],
+                                   test['display_words_per_minute'],
+                                   test['display_final_graph'],
+                                   test['display_speed_graph'])
+        Typing_window.set_profile(test['profile'])
+        Typing_window.set_keystroke_log_path(test['keystroke_log_path'])
+
+        text_name = test['text_name']
+        if text_name == '':
+            text_name = splitext(basename(test['text_path']))[0]
+
+        # Hashes the text so sessions and the ghost
+        # belong to the version of the text typed.
+        try:
+            content_hash = text_hash(test['text_path'])
+        except (FileNotFoundError, ValueError):
+            content_hash = ''
+
+        # Races the best earlier session of the text if it was logged.
+        ghost_log_path = ''
+        if test['race_best'] and history_path != '' and \
+              content_hash != '':
+            with SessionStore(history_path) as History:
+                Best = History.best_run(getuser(), text_name,
+                                        content_hash)
+            if Best is not None and isfile(Best['keystroke_log']):
+                ghost_log_path = Best['keystroke_log']
+        Typing_window.set_ghost(ghost_log_path)
+
+        try:
+            Engine = Typing_window.initiate_typing()
+        except FileNotFoundError:
+            connection.send_bytes(encode_result('no_such_file'))
+            continue
+
+        # Saves the results if at least one word was typed.
+        saved = history_path != '' and Engine.word_sum > 0
+        if saved:
+            with SessionStore(history_path) as History:
+                History.add(Engine, text_name, getuser(),
+                             keystroke_log=
+                             Typing_window.keystroke_log_path,
+                             text_hash=content_hash)
+
+        # Sends the keystroke records straight from the mapped log.
+        if test['include_keystrokes'] and \
+              Typing_window.keystroke_log_path != '':
+            with KeystrokeLog(Typing_window.keystroke_log_path) as Log:
+                Records = Log.records()
+                connection.send_bytes(encode_result('finished', Engine,
+                                                    len(Records)))
+                if len(Records) > 0:
+                    connection.send_bytes(Records)
+                del Records
+        else:
+            connection.send_bytes(encode_result('finished', Engine))
+
+        # Deletes the keystroke log of a session which wasn't saved
+        # (the log of a cancelled one is deleted by TypingWorker.cancel).
+        if not saved and Typing_window.keystroke_log_path != '':
+            remove_log(Typing_window.keystroke_log_path)
+
+    connection.close()
+
+
+# Objects of this class run typing tests in a long-lived process.
+class TypingWorker:
+
+    """Description:
+    ----------------
+
+    Pre-spawned process keeping a TypingWindow alive, so back to back tests don't pay for starting
+        the interpreter, importing modules and building the window every time.
+    Tests are sent to the process through a pipe and their progress and results are sent back
+        as compact binary messages (see Src.resultchannel).
+
+    Methods:
+    ----------------
+
+    start() -> None:
+        Spawns the worker process (if it isn't running).
+
+    run_test(text_path : str, display_time : bool, ..., text_name : str, include_keystrokes : bool, profile : str, race_best : bool,
+             on_progress : Callable[[dict], None] | None) -> dict:
+        Runs a test in the worker process and returns its result.
+
+    submit(text_path : str, display_time : bool, ..., text_name : str, include_keystrokes : bool, profile : str, race_best : bool) -> None:
+        Sends a test to the worker process without waiting for it.
+
+    poll() -> list[dict]:
+        Returns the messages of the submitted test received so far without blocking.
+
+    cancel() -> None:
+        Ends the submitted test by terminating the worker process.
+
+    close() -> None:
+        Stops the worker process.
+
+    Useful Info:
+    ----------------
+
+    - if the worker process crashes the test is reported as 'crashed' and a new process is spawned for the next one;
+    - run_test blocks until the test is finished, so it shouldn't be called from the thread running tkinter,
+        submit and poll (called periodically, e.g. by tkinter's after) run a test without blocking;
+    - busy tells whether a submitted test hasn't returned its result yet.
+    """
+
+    def __init__(self, icon_path: str = '', log_folder: str = '',
+                  history_path: str = '',
+                  start_method: str | None = None) -> None:
+
+        """
+        Inits TypingWorker object (the process is not spawned until start or run_test is called).
+
+        Optional Args:
+
+            icon_path(str):
+                Specifies the icon used by the typing window.
+
+            log_folder(str):
+                Specifies the folder keystroke logs are recorded to (see TypingWindow),
+                    logs of tests which aren't saved (cancelled or without a typed word) are deleted.
+
+            history_path(str):
+                Specifies the session store results are saved to (nothing is saved if it's empty).
+
+            start_method(str | None):
+                Specifies the multiprocessing start method (default one of the platform if None).
+        """
+
+        self.icon_path = icon_path
+        self.log_folder = log_folder
+        self.history_path = history_path
+        self.Context = get_context(start_method)
+
+        self.Process = None
+        self.Connection = None
+
+        self.busy = False
+        self.include_keystrokes = False
+        # Defines the path to the keystroke log of the submitted test.
+        self.keystroke_log_path = ''
+
+    # Spawns the worker process.
+    def start(self) -> None:
+
+        """
+        Spawns the worker process (does nothing if it's already running).
+        """
+
+        if self.Process is not None and self.Process.is_alive():
+            return
+
+        self._discard_process()
+
+        self.Connection, child_connection = Pipe()
+        self.Process = self.Context.Process(target=worker_main,
+                                            args=(child_connection,
+                                                  self.icon_path,
+                                                  self.log_folder,
+                                                  self.history_path),
+                                            daemon=True)
+        self.Process.start()
+        child_connection.close()
+
+    # Runs a test in the worker process.
+    def run_test(self, text_path: str, display_time: bool = True,
+                  display_precision: bool = True,
+                  display_chars_per_minute: bool = True,
+                  display_words_per_minute: bool = True,
+                  display_final_graph: bool = True,
+                  display_speed_graph: bool = True,
+                  text_name: str = '',
+                  include_keystrokes: bool = False,
+                  profile: str = 'off',
+                  race_best: bool = False,
+                  on_progress: Callable[[dict], None] | None = None
+                  ) -> dict:
+
+        """
+        Runs a test in the worker process (spawning it if needed) and blocks until it's finished.
+        on_progress is called with every progress message (see Src.resultchannel.decode_message)
+            while the test is running.
+        Returns the result message of the test, its status is 'finished', 'no_such_file' or 'crashed'.
+        If include_keystrokes is True the result also holds the raw keystroke records of the test as 'keystrokes'
+            (see Src.keystrokelog).
+        profile specifies whether the test is profiled ('off', 'timings' or 'cprofile', see TypingWindow),
+            profiles are written next to the keystroke log of the test.
+        If race_best is True the best earlier session of the user on the text (with a keystroke log) is raced
+            as a ghost (see Src.ghostrace).
+        """
+
+        self.submit(text_path, display_time, display_precision,
+                    display_chars_per_minute, display_words_per_minute,
+                    display_final_graph, display_speed_graph, text_name,
+                    include_keystrokes, profile, race_best)
+
+        try:
+            while True:
+                message = decode_message(self.Connection.recv_bytes())
+                if message['type'] == 'result':
+                    return self._finish(message)
+                if on_progress is not None and \
+                      message['type'] == 'progress':
+                    on_progress(message)
+        except (EOFError, OSError):
+            return self._crashed()
+
+    # Sends a test to the worker process.
+    def submit(self, text_path: str, display_time: bool = True,
+                display_precision: bool = True,
+                display_chars_per_minute: bool = True,
+                display_words_per_minute: bool = True,
+                display_final_graph: bool = True,
+                display_speed_graph: bool = True,
+                text_name: str = '',
+                include_keystrokes: bool = False,
+                profile: str = 'off',
+                race_best: bool = False) -> None:
+
+        """
+        Sends a test to the worker process (spawning it if needed) and returns at once,
+            its messages are returned by poll (see run_test for the arguments).
+        Raises RuntimeError if the previous test didn't return its result yet.
+        """
+
+        if self.busy:
+            raise RuntimeError('the worker is already running a test')
+
+        self.start()
+        self.busy = True
+        self.include_keystrokes = include_keystrokes
+        self.keystroke_log_path = '' if self.log_folder == '' else \
+            join(self.log_folder, str(time_ns()) + '.keys')
+
+        try:
+            self.Connection.send({'text_path': text_path,
+                                  'display_time': display_time,
+                                  'display_precision': display_precision,
+                                  'display_chars_per_minute':
+                                  display_chars_per_minute,
+                                  'display_words_per_minute':
+                                  display_words_per_minute,
+                                  'display_final_graph':
+                                  display_final_graph,
+                                  'display_speed_graph':
+                                  display_speed_graph,
+                                  'text_name': text_name,
+                                  'include_keystrokes':
+                                  include_keystrokes,
+                                  'profile': profile,
+                                  'race_best': race_best,
+                                  'keystroke_log_path':
+                                  self.keystroke_log_path})
+        except OSError:
+            # The crash is reported by the next poll.
+            pass
+
+    # Reads the messages received so far.
+    def poll(self) -> list[dict]:
+
+        """
+        Returns the messages of the submitted test received since the last call without blocking
+            (see Src.resultchannel.decode_message), the last one is the result once the test is finished
+            (as returned by run_test, 'crashed' if the worker process died).
+        Returns [] if no test is running.
+        """
+
+        messages = []
+
+        try:
+            while self.busy and self.Connection.poll():
+                message = decode_message(self.Connection.recv_bytes())
+                if message['type'] == 'result':
+                    message = self._finish(message)
+                messages.append(message)
+
+            # Everything the process sent was read,
+            # so if it's gone the test won't finish.
+            if self.busy and not self.Process.is_alive():
+                raise EOFError
+        except (EOFError, OSError):
+            messages.append(self._crashed())
+
+        return messages
+
+    # Ends the test by terminating the worker process.
+    def cancel(self) -> dict | None:
+
+        """
+        Ends the submitted test by terminating the worker process (which closes its window)
+            and spawns a new one for the next test.
+        Returns the 'cancelled' result (None if no test is running), nothing is saved for the test
+            and its keystroke log is deleted.
+        """
+
+        if not self.busy:
+            return None
+
+        self.busy = False
+        self._discard_process()
+        remove_log(self.keystroke_log_path)
+        self.start()
+
+        return decode_message(encode_result('cancelled'))
+
+    # Receives the keystrokes sent after the result.
+    def _finish(self, message: dict) -> dict:
+
+        if message['keystrokes_size'] > 0:
+            message['keystrokes'] = self.Connection.recv_bytes()
+        elif self.include_keystrokes:
+            message['keystrokes'] = b''
+        self.busy = False
+
+        return message
+
+    # Reports the test as crashed.
+    def _crashed(self) -> dict:
+
+        # Respawns the worker so the next test starts warm.
+        self.busy = False
+        self._discard_process()
+        self.start()
+
+        return decode_message(encode_result('crashed'))
+
+    # Stops the worker process.
+    def close(self, timeout: float = 1.0) -> None:
+
+        """
+        Stops the worker process (terminating it if it doesn't stop within timeout seconds).
+        """
+
+        if self.Process is None:
+            return
+
+        # The window of a running test is closed without saving it.
+        if self.busy:
+            self.busy = False
+            self._discard_process()
+            remove_log(self.keystroke_log_path)
+            return
+
+        try:
+            self.Connection.send(None)
+        except OSError:
+            pass
+
+        self.Process.join(timeout)
+        self._discard_process()
+
+    # Terminates and forgets the worker process.
+    def _discard_process(self) -> None:
+
+        if self.Connection is not None:
+            self.Connection.close()
+            self.Connection = None
+
+        if self.Process is not None:
+            if self.Process.is_alive():
+                self.Process.terminate()
+                self.Process.join()
+            self.Process.close()
+            self.Process = None
@@ -0,0 +1,54 @@
+from argparse import ArgumentParser
+from datetime import datetime
+from os.path import isfile
+from Src.historyexport import (EXPORT_TABLES, HistoryExport, export_formats)
+from Src.sessionstore import SessionStore
+
+
+# Converts a date (or date and time) to a timestamp.
+def parse_date(date: str) -> float | None:
+
+    """
+    Returns the timestamp of the local date in ISO format (None if date is empty).
+    """
+
+    if date == '':
+        return None
+    return datetime.fromisoformat(date).timestamp()
+
+
+if __name__ == '__main__':
+
+    Parser = ArgumentParser(description='Exports the stored sessions, their '
+                            'per-character counters and their keystrokes '
+                            'to CSV (or Arrow IPC and Parquet if pyarrow is '
+                            'installed) in chunks of bounded size.')
+    Parser.add_argument('folder', help='folder the tables are written to')
+    Parser.add_argument('--history', default='Data/history.sqlite3')
+    Parser.add_argument('--format', default='csv', choices=export_formats())
+    Parser.add_argument('--tables', nargs='+', default=list(EXPORT_TABLES),
+                        choices=EXPORT_TABLES)
+    Parser.add_argument('--user', default=None)
+    Parser.add_argument('--text', default=None)
+    Parser.add_argument('--since', default='',
+                        help='date (YYYY-MM-DD or any ISO format) the '
+                        'sessions start from')
+    Parser.add_argument('--until', default='',
+                        help='date the sessions end before (exclusive)')
+    Parser.add_argument('--chunk-size', type=int, default=65536)
+    Arguments = Parser.parse_args()
+
+    # Opening a missing history would create an empty one.
+    if not isfile(Arguments.history):
+        Parser.error('no such history: ' + Arguments.history)
+
+    with SessionStore(Arguments.history) as History:
+        Export = HistoryExport(History, Arguments.user, Arguments.text,
+                               parse_date(Arguments.since),
+                               parse_date(Arguments.until),
+                               Arguments.chunk_size)
+        counts = Export.write_all(Arguments.folder, Arguments.format,
+                                  tuple(Arguments.tables))
+
+    for table, count in counts.items():
+        print(table + ':', count, 'rows')
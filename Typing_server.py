@@ -0,0 +1,51 @@
+import asyncio
+from argparse import ArgumentParser
+from Src.scoringserver import ScoringServer
+from Src.textpack import TextCorpus
+
+
+# Runs the scoring server until it's interrupted.
+async def serve(Server: ScoringServer, host: str, port: int,
+                 unix_socket: str) -> None:
+
+    if unix_socket != '':
+        Listener = await Server.serve_unix(unix_socket)
+        print('Scoring sessions on', unix_socket)
+    else:
+        Listener = await Server.serve_tcp(host, port)
+        print('Scoring sessions on', host + ':' + str(port))
+
+    async with Listener:
+        await Listener.serve_forever()
+
+
+if __name__ == '__main__':
+
+    Parser = ArgumentParser(description='Scores typing sessions streamed '
+                            'by clients (see Src.scoringserver) without '
+                            'any display.')
+    Parser.add_argument('--host', default='127.0.0.1')
+    Parser.add_argument('--port', type=int, default=8765)
+    Parser.add_argument('--unix', default='',
+                        help='path to a Unix socket to listen on instead '
+                        'of TCP')
+    Parser.add_argument('--history', default='Data/history.sqlite3',
+                        help='session store results are saved to (empty '
+                        'to not save them)')
+    Parser.add_argument('--progress-interval', type=float, default=0.1)
+    Arguments = Parser.parse_args()
+
+    # Compiles the texts the clients can type, the same ones
+    # the options menu lists.
+    Corpus = TextCorpus('Texts', 'Data/Packs')
+    Corpus.refresh()
+
+    Server = ScoringServer(Corpus, Arguments.history,
+                           Arguments.progress_interval)
+    try:
+        asyncio.run(serve(Server, Arguments.host, Arguments.port,
+                          Arguments.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        Server.close()
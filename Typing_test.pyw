@@ -1,10 +1,19 @@
-from os import listdir
-from sys import exit
-from multiprocessing import Process
+from datetime import datetime
+from getpass import getuser
+from importlib.util import find_spec
+from os import (makedirs, remove)
+from os.path import join
+from sys import (argv, exit)
 from threading import Thread
+from time import time_ns
 from tkinter import *
 from tkinter import ttk
-from Src.typingwindow import TypingWindow
+from Src.adaptivetext import (ADAPTIVE_TEXT, WordIndex, adaptive_text)
+from Src.sessionstore import SessionStore
+from Src.sessionsupervisor import (Active_statuses, SessionSupervisor)
+from Src.textpicker import TextPicker
+from Src.typingworker import TypingWorker
+from Src.textpack import (PACK_EXTENSION, TextCorpus)
 
 
 # Negates the value of display_time.
@@ -42,120 +51,265 @@ def set_final_graph(event) -> None:
 
     Display_final_graph.set(not Display_final_graph.get())
 
-# Sets the dropdown menu value to the one above the current one 
+# Negates the value of display_speed_graph.
+def set_speed_graph(event) -> None:
+
+    global Display_speed_graph
+
+    Display_speed_graph.set(not Display_speed_graph.get())
+
+# Negates the value of race_best.
+def set_race_best(event) -> None:
+
+    global Race_best
+
+    Race_best.set(not Race_best.get())
+
+# Chooses the text above the current one in the text picker
 #   (if it's the first one it does nothing).
 def text_up(event) -> None:
 
-    global Text_source, List_of_texts, Dropdown_text
-
-    try:
-        index_of_text = List_of_texts.index(Text_source.get())
-    except IndexError:
-        index_of_text = -1
+    global Text_picker
 
-    if (len(List_of_texts) > 0 and index_of_text > 0):
-        Text_source.set(List_of_texts[index_of_text - 1])
+    Text_picker.move(-1)
 
-# Sets the dropdown menu value to the one below the current one 
+# Chooses the text below the current one in the text picker
 #   (if it's the last one it does nothing).
 def text_down(event) -> None:
 
-    global Text_source, List_of_texts, Dropdown_text
+    global Text_picker
 
-    length_of_list = len(List_of_texts)
+    Text_picker.move(1)
 
+# Starts building the word index and the weights of the adaptive practice
+# in the background (once the texts are compiled).
+def prepare_adaptive() -> None:
+
+    global Adaptive_builder
+
+    Adaptive_builder = Thread(target=build_adaptive, daemon=True)
+    Adaptive_builder.start()
+
+# Builds the word index and the weights of the adaptive practice
+# from the history of the user (through its own connection
+# as connections can't be shared between threads).
+def build_adaptive() -> None:
+
+    global Corpus, Word_index, Adaptive
+
+    Index = WordIndex(Corpus)
     try:
-        index_of_text = List_of_texts.index(Text_source.get())
-    except IndexError:
-        index_of_text = -1
-
-    if (length_of_list > 0 and index_of_text < length_of_list - 1):
-        Text_source.set(List_of_texts[index_of_text + 1])
-
-# Intermediates between main and start.
-def start_mid(event) -> None:
-    Thread(target=start).start()
-
-# Starts the typing test if it's not already running.
-def start() -> None:
-
-    global typing_running, Options, Prompt_no_text, \
-    Prompt_test_already_running, Prompt_tried_to_close_window, \
-    Prompt_no_such_file
-
-    if (Text_source.get() in List_of_texts) and (not typing_running):
-
-        typing_running = True
-
-        # Changes the protocol and bind for closing the window
-        # as to not cause unexpected behavior.
-        Options.bind('<Escape>', close_not)
-        Options.protocol('WM_DELETE_WINDOW', close_not)
-
-        # Gets rid of all prompts.
-        Prompt_no_text.grid_forget()
-        Prompt_test_already_running.grid_forget()
-        Prompt_tried_to_close_window.grid_forget()
-        Prompt_no_such_file.grid_forget()
-
-        # Creates the typing window in seperate process.
-        typing_test = Process(target=start_process,
-            args=('Texts/' + Text_source.get() + '.txt', 
-            Display_time.get(), Display_precision.get(),
-            Display_chars_per_minute.get(),
-            Display_words_per_minute.get(), 
-            Display_final_graph.get(),
-            icon_path_window))
-        
-        typing_test.start()
-        typing_test.join()
-
-        # Displays prompt if the file couldn't be opened.
-        if typing_test.exitcode > 0:
-            Prompt_no_such_file.grid(row=103, column=0, columnspan=2)
-        
-        typing_test.close()
-
-        typing_running = False
-
-        Options.focus()
-        # Reenables the option to close the window.
-        Options.bind('<Escape>', close)
-        Options.protocol('WM_DELETE_WINDOW', close)
-
-    # Displays prompt if no text is selected.  
-    elif not typing_running:
-        Prompt_no_text.grid(row=100, column=0, columnspan=2)
+        with SessionStore(history_path) as Builder_history:
+            Weights = adaptive_text(Index, Builder_history, Corpus,
+                                    getuser())
+    except ValueError:
+        # There are no words to draw from.
+        Weights = None
+
+    Word_index, Adaptive = Index, Weights
+
+# Generates the adaptive practice and returns its path (the word index
+# and weights are built once and updated with the results of every
+# session, every session gets its own drill).
+def generate_drill() -> str:
 
-    # Displays prompt if the test is already running.
+    global History, Corpus, Word_index, Adaptive, Adaptive_builder
+
+    # Waits for the weights if they are still being built, builds them
+    # again if the texts changed and adds the sessions stored meanwhile.
+    if Adaptive_builder is not None:
+        Adaptive_builder.join()
+        Adaptive_builder = None
+    if Adaptive is None or not Word_index.is_current(Corpus):
+        build_adaptive()
+    if Adaptive is not None:
+        Adaptive.update_from(History, getuser())
+
+    makedirs(drill_folder, exist_ok=True)
+    drill_path = join(drill_folder, str(time_ns()) + PACK_EXTENSION)
+    if Adaptive is not None:
+        Adaptive.write(drill_length, drill_path)
+    # Otherwise the test reports the missing text.
+
+    return drill_path
+
+# Adds the character counters of the sessions stored since the weights
+# of the adaptive practice were built or last updated (sessions finished
+# while they are built are added once they are, as every session is
+# stored before its result arrives).
+def update_adaptive() -> None:
+
+    global History, Adaptive, Adaptive_builder
+
+    if Adaptive_builder is not None and Adaptive_builder.is_alive():
+        return
+
+    if Adaptive is not None:
+        Adaptive.update_from(History, getuser())
+
+# Returns the names of the texts listed in the text picker
+# (the adaptive practice is listed only if there are texts to draw from).
+def list_texts() -> list[str]:
+
+    names = Corpus.names()
+    return names + [ADAPTIVE_TEXT] if len(names) > 0 else names
+
+# Starts a typing test of the chosen text
+# (it waits in the queue if as many tests as allowed are running).
+def start(event=None) -> None:
+
+    global Supervisor, Prompt_no_text, Prompt_tried_to_close_window
+
+    name = Text_source.get()
+
+    # Displays prompt if no text is selected.
+    if not Text_picker.has(name):
+        Prompt_no_text.grid(row=100, column=0, columnspan=2)
+        return
+
+    # Gets rid of all prompts.
+    Prompt_no_text.grid_forget()
+    Prompt_tried_to_close_window.grid_forget()
+
+    # Runs the test in a worker process
+    # (which keeps the typing window alive between tests).
+    Supervisor.submit({'text_path': generate_drill()
+                       if name == ADAPTIVE_TEXT
+                       else Corpus.pack_path(name),
+                       'display_time': Display_time.get(),
+                       'display_precision': Display_precision.get(),
+                       'display_chars_per_minute':
+                       Display_chars_per_minute.get(),
+                       'display_words_per_minute':
+                       Display_words_per_minute.get(),
+                       'display_final_graph': Display_final_graph.get(),
+                       'display_speed_graph': Display_speed_graph.get(),
+                       'text_name': name,
+                       'profile': profile,
+                       'race_best': Race_best.get() and
+                       name != ADAPTIVE_TEXT})
+
+# Shows the status of a session in the sessions table
+# (called by the supervisor on the main thread).
+def show_session(Session: dict) -> None:
+
+    global Sessions_table
+
+    # Shows the last stats of running and finished sessions.
+    message = Session['result'] or Session['progress']
+    progress = ''
+    if message is not None and (message['type'] == 'progress' or
+                                Session['status'] == 'finished'):
+        progress = str(message['timer_current'] // 60) + ':' + \
+            str(message['timer_current'] % 60).rjust(2, '0') + '   ' + \
+            '{:.2f}'.format(message['words_per_minute']) + ' WPM'
+        if message['type'] == 'progress' or message['word_sum'] > 0:
+            show_progress(message)
+
+    values = (Session['test']['text_name'],
+              Session_status_names[Session['status']], progress)
+    row = str(Session['id'])
+    if Sessions_table.exists(row):
+        Sessions_table.item(row, values=values)
     else:
-        Prompt_test_already_running.grid(row=101, column=0,
-                                          columnspan=2)
-
-# Starts the typing test.
-def start_process(text_source : str, display_time : bool,
-                   display_precision : bool,
-                   display_chars_per_minute : bool,
-                   display_words_per_minute : bool,
-                   display_final_graph : bool,
-                   icon_path_window : str) -> None:
-
-    # Creates TypingWindow object.
-    Typing_window = TypingWindow(text_source, display_time,
-                                   display_precision,
-                                   display_chars_per_minute,
-                                   display_words_per_minute,
-                                   display_final_graph,
-                                   icon_path=icon_path_window)
-    # Starts the typing test.
-    Typing_window.initiate_typing()
-
-# Terminates the program.
+        Sessions_table.insert('', 0, iid=row, values=values)
+
+    if Session['status'] not in Active_statuses:
+        if Session['status'] == 'finished':
+            update_adaptive()
+
+        # Removes the drill of the adaptive practice.
+        if Session['test']['text_name'] == ADAPTIVE_TEXT:
+            try:
+                remove(Session['test']['text_path'])
+            except OSError:
+                pass
+        show_history()
+
+# Cancels the sessions selected in the sessions table.
+def cancel_sessions(event=None) -> None:
+
+    global Supervisor, Sessions_table
+
+    for row in Sessions_table.selection():
+        Supervisor.cancel(int(row))
+
+# Changes how many tests can run at once.
+def set_session_limit(*args) -> None:
+
+    global Supervisor, Session_limit
+
+    try:
+        Supervisor.set_limit(Session_limit.get())
+    except TclError:
+        # Ignores the spinbox while its value is not a number.
+        pass
+
+# Compiles texts which changed since the last start
+# and updates the text picker if the list of texts changed.
+def refresh_texts() -> None:
+
+    global Corpus, List_of_texts, Text_picker
+
+    if not Corpus.refresh():
+        return
+
+    List_of_texts = list_texts()
+    Text_picker.set_names(List_of_texts)
+
+# Shows the stats of the running (or the last) test.
+def show_progress(message: dict) -> None:
+
+    global Progress_value
+
+    Progress_value.set(
+        ('Running: ' if message['type'] == 'progress' else 'Last test: ') +
+        str(message['timer_current'] // 60) + ':' +
+        str(message['timer_current'] % 60).rjust(2, '0') + '   ' +
+        '{:.2f}'.format(message['words_per_minute']) + ' WPM   ' +
+        str(int(message['precision'] * 100)) + ' %')
+
+# Shows the most recent sessions in the history table.
+def show_history() -> None:
+
+    global History, History_table
+
+    History_table.delete(*History_table.get_children())
+
+    for session in History.recent(history_length):
+        History_table.insert('', END, values=(
+            session['text'],
+            '{:.2f}'.format(session['words_per_minute']),
+            str(int(session['precision'] * 100)) + ' %',
+            datetime.fromtimestamp(session['timestamp'])
+            .strftime('%d.%m. %H:%M')))
+
+# Opens the analytics of the stored sessions
+# (they are calculated with numpy so nothing opens without it).
+def show_analytics(event=None) -> None:
+
+    global History, Corpus, Prompt_no_numpy
+
+    if find_spec('numpy') is None:
+        Prompt_no_numpy.grid(row=1, column=0)
+        return
+
+    # Imported only when needed as it imports numpy.
+    from Src.analyticswindow import AnalyticsWindow
+
+    AnalyticsWindow(Options, History, Corpus, icon_path_window)
+
+# Terminates the program (unless tests are running).
 def close(event=None) -> None:
 
+    if Supervisor.active() > 0:
+        close_not()
+        return
+
+    Supervisor.close()
     exit()
 
-# Close substitute gets called when test is already running
+# Close substitute gets called when a test is running
 # as not to cause unexpected behavior.
 def close_not(event=None) -> None:
 
@@ -164,36 +318,71 @@ def close_not(event=None) -> None:
 
 if __name__ == '__main__':
 
-    # Defines the list of texts that the user can choose from.
-    List_of_texts = []
-    # Defines the variable that indicates whether the
-    # typing test is currently running.
-    typing_running = False
-
     # Defines the path to the icon used by the windows.
     icon_path_window = 'Icon/icon_test-Window.ico'
 
-    # Gets all .txt files from the Texts folder and adds them
-    # to the list (stripping the extension for user experience).
-    for file in listdir('Texts'):
-        if file.endswith('.txt'):
-            List_of_texts.append(file.strip('.txt'))
+    # Defines the folder keystroke logs of the tests are recorded to.
+    keystroke_log_folder = 'Data/Keystrokes'
+
+    # Defines the path to the store of the results of the tests
+    # and how many of the most recent ones are shown.
+    history_path = 'Data/history.sqlite3'
+    history_length = 5
+    History = SessionStore(history_path)
+
+    # Defines whether the tests are profiled (running the app with
+    # --profile records timing histograms of every test next to its
+    # keystroke log, --cprofile also records cProfile stats).
+    if '--cprofile' in argv:
+        profile = 'cprofile'
+    elif '--profile' in argv:
+        profile = 'timings'
+    else:
+        profile = 'off'
+
+    # Defines how many tests can run at once by default
+    # (every one in its own process and window) and the names
+    # of the statuses of the tests.
+    session_limit = 1
+    Session_status_names = {'queued': 'Queued', 'running': 'Running',
+                            'finished': 'Finished',
+                            'no_such_file': 'No such file',
+                            'crashed': 'Crashed, try again',
+                            'cancelled': 'Cancelled'}
+
+    # Defines the list of texts that the user can choose from
+    # using the manifest of the compiled texts (the Texts folder
+    # is checked for changes once the options menu is displayed).
+    Corpus = TextCorpus('Texts', 'Data/Packs')
+    List_of_texts = list_texts()
+
+    # Defines where the adaptive practice is generated to, how many words
+    # it has, the index and weights it's generated from and the thread
+    # building them (started once the texts are compiled).
+    drill_folder = 'Data/Drills'
+    drill_length = 1000
+    Word_index = None
+    Adaptive = None
+    Adaptive_builder = None
 
     Options = Tk()
     Options.title('Typing Speed Test Options')
-    Options.minsize(450, 250)
-    Options.maxsize(450, 250)
+    Options.minsize(450, 715)
+    Options.maxsize(450, 715)
     Options.iconbitmap(icon_path_window)
 
     Main_frame = ttk.LabelFrame(Options, text='Options')
     Main_frame.pack(padx=10, pady=10)
 
     Text_source = StringVar(Main_frame)
+    Progress_value = StringVar(Main_frame)
     Display_time = BooleanVar(Main_frame, value=TRUE)
     Display_precision = BooleanVar(Main_frame, value=TRUE)
     Display_chars_per_minute = BooleanVar(Main_frame, value=TRUE)
     Display_words_per_minute = BooleanVar(Main_frame, value=TRUE)
     Display_final_graph = BooleanVar(Main_frame, value=TRUE)
+    Display_speed_graph = BooleanVar(Main_frame, value=TRUE)
+    Race_best = BooleanVar(Main_frame, value=FALSE)
 
     Show_Time = ttk.Checkbutton(Main_frame,
                                  text='Show Time',
@@ -209,42 +398,96 @@ if __name__ == '__main__':
     Show_final_graph = ttk.Checkbutton(Main_frame,
                                         text='Show Final Graph',
                                         variable=Display_final_graph)
-
-    # Sets the default value of the dropdown to the name of the
-    # first .txt file in Texts folder or to "No text in folder"
-    # if no files were found. 
-    try:
-        default = List_of_texts[0]
-    except IndexError:
-        default = 'No text in folder'
-    Dropdown_text = ttk.OptionMenu(Main_frame, Text_source,
-                                    default, *List_of_texts)
+    Show_speed_graph = ttk.Checkbutton(Main_frame,
+                                        text='Show Speed Graph',
+                                        variable=Display_speed_graph)
+    Race_best_run = ttk.Checkbutton(Main_frame,
+                                     text='Race Best Run',
+                                     variable=Race_best)
+
+    # Defines the searchable list of texts which chooses the first text
+    # (it shows "No text in folder" if no files were found).
+    Text_picker = TextPicker(Main_frame, Text_source, List_of_texts)
+    Text_picker.Entry.bind('<Return>', start)
 
     # Defines the prompts for different situations.
     Prompt_no_text = ttk.Label(Main_frame,
                                 text='No text chosen')
-    Prompt_test_already_running = ttk.Label(Main_frame,
-                                             text=
-                                             'Test is already running')
     Prompt_tried_to_close_window = ttk.Label(Main_frame, 
                                               text=
                                               "Can't close options " +
-                                              "while test is running")
-    Prompt_no_such_file = ttk.Label(Main_frame, 
-                                              text=
-                                              "No such file") 
+                                              "while tests are running")
 
     Show_Time.grid(row=0, column=0, sticky=W)
     Show_precision.grid(row=0, column=1, sticky=W)
     Show_chars_per_minute.grid(row=1, column=0, sticky=W)
     Show_words_per_minute.grid(row=1, column=1, sticky=W)
-    Show_final_graph.grid(row=2, column=0, columnspan=2)
-    Dropdown_text.grid(row=99, column=0, columnspan=2, padx=20, pady=5)
+    Show_final_graph.grid(row=2, column=0, sticky=W)
+    Show_speed_graph.grid(row=2, column=1, sticky=W)
+    Race_best_run.grid(row=3, column=0, sticky=W)
+    Text_picker.widget().grid(row=99, column=0, columnspan=2, padx=20,
+                              pady=5)
+    Progress_label = ttk.Label(Main_frame, textvariable=Progress_value)
+    Progress_label.grid(row=105, column=0, columnspan=2)
+
+    # Defines the table of the most recent sessions.
+    History_frame = ttk.LabelFrame(Options, text='History')
+    History_table = ttk.Treeview(History_frame,
+                                  columns=('text', 'wpm',
+                                           'precision', 'date'),
+                                  show='headings',
+                                  height=history_length)
+    for column, heading, width in (('text', 'Text', 150),
+                                   ('wpm', 'WPM', 70),
+                                   ('precision', 'Precision', 80),
+                                   ('date', 'Date', 100)):
+        History_table.heading(column, text=heading)
+        History_table.column(column, width=width, anchor=W)
+    History_table.grid(row=0, column=0, padx=5, pady=5)
+    Analytics_button = ttk.Button(History_frame, text='Analytics',
+                                   command=show_analytics)
+    Analytics_button.grid(row=2, column=0, pady=(0, 5))
+    Prompt_no_numpy = ttk.Label(History_frame,
+                                 text='Analytics need numpy installed')
+    History_frame.pack(padx=10, pady=(0, 10))
+    show_history()
+
+    # Defines the table of the tests started since the options menu
+    # was displayed, how many of them can run at once and
+    # the supervisor running them.
+    Sessions_frame = ttk.LabelFrame(Options, text='Sessions')
+    Sessions_table = ttk.Treeview(Sessions_frame,
+                                   columns=('text', 'status', 'progress'),
+                                   show='headings', height=3)
+    for column, heading, width in (('text', 'Text', 150),
+                                   ('status', 'Status', 110),
+                                   ('progress', 'Progress', 140)):
+        Sessions_table.heading(column, text=heading)
+        Sessions_table.column(column, width=width, anchor=W)
+    Sessions_table.grid(row=0, column=0, columnspan=3, padx=5, pady=5)
+    Cancel_button = ttk.Button(Sessions_frame, text='Cancel',
+                                command=cancel_sessions)
+    Cancel_button.grid(row=1, column=0, pady=(0, 5))
+    Session_limit = IntVar(Sessions_frame, value=session_limit)
+    ttk.Label(Sessions_frame, text='At once:').grid(row=1, column=1,
+                                                    sticky=E, pady=(0, 5))
+    Session_limit_box = ttk.Spinbox(Sessions_frame, from_=1, to=8,
+                                     width=4, textvariable=Session_limit)
+    Session_limit_box.grid(row=1, column=2, sticky=W, pady=(0, 5))
+    # Keeps the shortcuts of the window from firing while typing the limit.
+    Session_limit_box.bindtags((str(Session_limit_box), 'TSpinbox', 'all'))
+    Session_limit.trace_add('write', set_session_limit)
+    Sessions_frame.pack(padx=10, pady=(0, 10))
+
+    Supervisor = SessionSupervisor(
+        Options, lambda: TypingWorker(icon_path_window,
+                                      keystroke_log_folder, history_path),
+        session_limit, on_update=show_session)
 
     # Binds escape to terminate the application and
     # enter to start the test.
     Options.bind('<Escape>', close)
-    Options.bind('<Return>', start_mid)
+    Options.bind('<Return>', start)
 
     # Binds keyboard shortcuts to operate the options menu.
     Options.bind('t', set_time)
@@ -252,14 +495,23 @@ if __name__ == '__main__':
     Options.bind('c', set_chars_per_minute)
     Options.bind('w', set_words_per_minute)
     Options.bind('f', set_final_graph)
+    Options.bind('s', set_speed_graph)
+    Options.bind('r', set_race_best)
+    Options.bind('a', show_analytics)
     Options.bind('<Up>', text_up)
     Options.bind('<Down>', text_down)
+    Options.bind('<Delete>', cancel_sessions)
 
     # Makes sure ending the process is handled correctly when
     # the user closes the window by another means.
     Options.protocol('WM_DELETE_WINDOW', close)
 
     Options.focus()
+
+    Options.after(0, refresh_texts)
+    Options.after(0, prepare_adaptive)
+    # Spawns the worker ahead of time so the first test starts quickly.
+    Options.after(0, Supervisor.prestart)
     
     Options.mainloop()
     
\ No newline at end of file
@@ -0,0 +1,185 @@
+import unittest
+from os import environ
+from os.path import (abspath, dirname, join)
+from shutil import which
+from statistics import median
+from subprocess import run
+from sys import (executable, path, platform)
+from time import (perf_counter_ns, sleep)
+
+# Makes the Src package and the benchmarks importable
+# when the tests are run from anywhere.
+Root_folder = dirname(dirname(abspath(__file__)))
+path.insert(0, Root_folder)
+path.insert(0, join(Root_folder, 'Benchmarks'))
+
+from Src.sessionsupervisor import (Active_statuses, SessionSupervisor)
+from Src.typingworker import (TypingWorker, worker_app_name)
+from typing_latency import start_virtual_display
+
+
+# Defines whether windows can be displayed (Windows and macOS always can)
+# and placeholder for the virtual display started if they can't.
+has_display = platform in ('win32', 'darwin') or \
+    environ.get('DISPLAY', '') != ''
+Virtual_display = None
+
+# Defines the key pressed once the typing window is drawn
+# (sent to the worker's interpreter, see worker_app_name).
+Press_key = ('focus -force [focus -lastfor .]; '
+             'event generate [focus -lastfor .] <KeyPress> -keysym a')
+
+
+# Starts a virtual display if there is none and Xvfb is installed.
+def setUpModule() -> None:
+
+    global has_display, Virtual_display
+
+    if has_display or which('Xvfb') is None:
+        return
+
+    Virtual_display = start_virtual_display(':98')
+    has_display = True
+
+
+# Stops the virtual display.
+def tearDownModule() -> None:
+
+    if Virtual_display is not None:
+        Virtual_display.terminate()
+
+
+# Checks which heavy modules get imported along with the typing window.
+def heavy_imports(modules: tuple[str, ...] = ('matplotlib',)) -> list[str]:
+
+    """
+    Imports Src.typingwindow in a fresh interpreter and returns the given modules that got imported along with it.
+    """
+
+    result = run([executable, '-c',
+                  'import sys\n'
+                  'import Src.typingwindow\n'
+                  'print(*(module for module in ' + repr(modules) +
+                  ' if module in sys.modules))'],
+                 cwd=Root_folder, capture_output=True, text=True,
+                 check=True)
+
+    return result.stdout.split()
+
+
+class StartupBudgetTest(unittest.TestCase):
+
+    """
+    Checks that the first keystroke of the typing test is accepted within its budget after the test is submitted
+        the way the options menu submits it (pressing enter calls SessionSupervisor.submit which sends the test
+        to a TypingWorker), both when the worker has to be spawned (cold) and when it was started ahead of time
+        (prestarted).
+    The key is pressed as soon as the window is drawn and the clock stops once it started the test's timer.
+    Without a display (and Xvfb to start one) the budgets are skipped, on CI they fail instead.
+    """
+
+    # Defines the seconds allowed from submitting the test to its first accepted keystroke,
+    # how many prestarted starts are measured (their median is checked)
+    # and how long a prestarted worker is given to import and build its window.
+    cold_budget = 1.0
+    warm_budget = 0.5
+    warm_runs = 3
+    settle_time = 3.0
+
+    # Defines the test submitted (nothing is saved for it).
+    Test = {'text_path': join(Root_folder, 'Texts', 'Lorem Ipsum.txt'),
+            'display_final_graph': False, 'text_name': 'startup budget'}
+
+    def test_matplotlib_not_imported(self) -> None:
+
+        self.assertEqual(heavy_imports(), [])
+
+    def test_cold_start(self) -> None:
+
+        self._open_supervisor()
+        seconds = self._first_keystroke()
+        self.assertLessEqual(seconds, self.cold_budget)
+
+    def test_prestarted_start(self) -> None:
+
+        self._open_supervisor()
+        # A cancelled test's worker is respawned at once,
+        # so every run starts from a prestarted worker.
+        self.Supervisor.prestart()
+        times = []
+        for _ in range(self.warm_runs):
+            sleep(self.settle_time)
+            times.append(self._first_keystroke())
+
+        self.assertLessEqual(median(times), self.warm_budget)
+
+    def setUp(self) -> None:
+
+        self.Master = None
+
+    def tearDown(self) -> None:
+
+        if self.Master is None:
+            return
+
+        self.Supervisor.close()
+        self.Master.destroy()
+
+    # Creates the supervisor the tests are submitted to.
+    def _open_supervisor(self) -> None:
+
+        if not has_display:
+            if environ.get('CI', '') != '':
+                self.fail('no display to enforce the startup budget on '
+                          '(install Xvfb)')
+            self.skipTest('needs a display (or Xvfb)')
+
+        from tkinter import Tk
+
+        self.Master = Tk()
+        self.Master.withdraw()
+        # Polls often so the poll interval barely adds to the times.
+        self.Supervisor = SessionSupervisor(self.Master, TypingWorker,
+                                            poll_interval=1)
+
+    # Submits the test, presses a key once it's drawn and returns the seconds
+    # until the key was accepted.
+    def _first_keystroke(self, timeout: float = 30.0) -> float:
+
+        started = []
+        pressed = []
+
+        # Presses the key in the session's worker once its window is drawn.
+        def on_update(Session: dict) -> None:
+
+            if Session['started'] and len(started) < 1:
+                started.append(perf_counter_ns())
+            elif Session['shown'] and len(pressed) < 1:
+                pressed.append(True)
+                Worker = self.Supervisor.Running[Session['id']]
+                self.Master.tk.call('send', '-async',
+                                    worker_app_name(Worker.Process.pid),
+                                    Press_key)
+
+        self.Supervisor.on_update = on_update
+
+        start = perf_counter_ns()
+        session_id = self.Supervisor.submit(dict(self.Test))
+        Session = self.Supervisor.Sessions[session_id]
+
+        while len(started) < 1:
+            self.assertIn(Session['status'], Active_statuses,
+                          'the test ended before a key was accepted')
+            self.assertLess(perf_counter_ns() - start, timeout * 1e9,
+                            'no key was accepted within the timeout')
+            self.Master.update()
+            sleep(0.001)
+
+        self.Supervisor.cancel(session_id)
+
+        return (started[0] - start) / 1e9
+
+
+if __name__ == '__main__':
+
+    unittest.main()
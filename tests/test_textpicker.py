@@ -0,0 +1,68 @@
+import unittest
+from os.path import (abspath, dirname)
+from sys import path
+
+# Makes the Src package importable when the tests are run from anywhere.
+Root_folder = dirname(dirname(abspath(__file__)))
+path.insert(0, Root_folder)
+
+from Src.textpicker import TextIndex
+
+
+# Returns the positions the index should return for the query.
+def scan(Index: TextIndex, query: str) -> list[int]:
+
+    query = query.casefold()
+    prefixed = [i for i, name in enumerate(Index.Folded)
+                if name.startswith(query)]
+    return prefixed + [i for i, name in enumerate(Index.Folded)
+                       if query in name and not name.startswith(query)]
+
+
+class TextIndexTest(unittest.TestCase):
+
+    """
+    Checks that TextIndex.search returns the same positions as scanning every name,
+        whether the query extends the previous one (typing) or not (pasting or editing it).
+    """
+
+    Names = ['Lorem Ipsum', 'Alpha', 'Beta', 'alphabet', 'Gamma Ray',
+             'The Raven', 'Ipsum Lorem', 'Zeta']
+
+    def setUp(self) -> None:
+
+        self.Index = TextIndex(self.Names)
+
+    def test_character_in_no_name(self) -> None:
+
+        self.assertEqual(list(TextIndex(['Lorem Ipsum', 'Alpha', 'Beta'])
+                              .search('lz')), [])
+        for query in ('q', 'lq', 'q', 'qa'):
+            self.assertEqual(list(self.Index.search(query)), [])
+
+    def test_typing(self) -> None:
+
+        for name in self.Names:
+            for end in range(1, len(name) + 1):
+                query = name[:end]
+                self.assertEqual(list(self.Index.search(query)),
+                                 scan(self.Index, query), query)
+            self.assertEqual(list(self.Index.search('')),
+                             list(range(len(self.Names))))
+
+    def test_queries_not_extending_the_previous_one(self) -> None:
+
+        for query in ('lo', 'ip', 'a', 'ra', 'lq', 'ma r', 'e', 'ET',
+                      'alpha', 'um', 'z', 'ta', 'lz', 'rem'):
+            self.assertEqual(list(self.Index.search(query)),
+                             scan(self.Index, query), query)
+
+    def test_prefix_matches_first(self) -> None:
+
+        found = [self.Index.Names[i] for i in self.Index.search('ip')]
+        self.assertEqual(found, ['Ipsum Lorem', 'Lorem Ipsum'])
+
+
+if __name__ == '__main__':
+
+    unittest.main()